@@ -0,0 +1,77 @@
+"""Query latency of the ranked fuzzy window search at 1k/10k titles.
+
+Runs headless against synthetic titles from SimulatedDesktop:
+
+    python benchmarks/bench_fuzzy_search.py [--sizes 1000 10000] [--repeat 20]
+
+For every size it reports index build time and, per query, the mean/p95
+latency of a full filter pass plus how many entries the character mask
+rejected before scoring (compared to scoring every title).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enumeration import take_snapshot  # noqa: E402
+from fuzzy_search import FuzzyQuery, fuzzy_score  # noqa: E402
+from window_backend import SimulatedDesktop  # noqa: E402
+from window_filter import WindowFilter  # noqa: E402
+
+QUERIES = ("chrome", "purple", "p", "vsc", "map 12", "inbox99", "zzz", "discord chat")
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_size(size, repeat):
+    desktop = SimulatedDesktop()
+    desktop.populate(size, hidden_ratio=0.0)
+    windows = take_snapshot(desktop).windows
+
+    started = time.perf_counter()
+    index = WindowFilter()
+    index.load(windows)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"\n{size} titles: index build {build_ms:.2f} ms")
+    print(f"{'query':<14}{'matches':>9}{'masked out':>12}{'mean ms':>10}{'p95 ms':>9}{'no-mask ms':>12}")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            filter_pass = index.begin(query)
+            while not filter_pass.step(budget=size):
+                pass
+            timings.append((time.perf_counter() - started) * 1000)
+
+        fuzzy = FuzzyQuery(query)
+        masked_out = sum(1 for entry in index.entries.values() if fuzzy.mask & ~entry.mask)
+
+        # Baseline: score every title without the mask prefilter
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for entry in index.entries.values():
+                fuzzy_score(fuzzy.text, entry.key)
+        brute_ms = (time.perf_counter() - started) * 1000 / repeat
+
+        print(f"{query!r:<14}{len(filter_pass.matches):>9}{masked_out:>12}"
+              f"{statistics.mean(timings):>10.3f}{percentile(timings, 0.95):>9.3f}{brute_ms:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench_size(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
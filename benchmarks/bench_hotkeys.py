@@ -0,0 +1,117 @@
+"""Per-keystroke cost of each hotkey delivery style on synthetic input.
+
+Runs headless with FakeHotkeyBackend and the tool's eight combos:
+
+    python benchmarks/bench_hotkeys.py [--keys 200000] [--repeat 5]
+
+"hook" hands every key event to Python, which tracks modifiers and
+matches chords, like the `keyboard` library's low-level hook (with the
+supervisor's liveness hook attached, as in the app).  "registered" only
+wakes Python for registered chords, like RegisterHotKey.  The OS-side
+translation is done before timing, so the numbers are the Python work
+each keystroke costs while typing in other applications.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hotkey_backends import FakeHotkeyBackend  # noqa: E402
+from hotkey_supervisor import HotkeySupervisor  # noqa: E402
+
+COMBOS = ('shift+0', 'alt+0', 'ctrl+1', 'alt+1', 'ctrl+2', 'alt+2', 'ctrl+3', 'alt+3')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def tap(key, modifiers=()):
+    return ([(m, True) for m in modifiers] + [(key, True), (key, False)]
+            + [(m, False) for m in reversed(modifiers)])
+
+
+def typing_stream(count, rng):
+    """Prose: letters, spaces, some shifted capitals and digits"""
+    events = []
+    while len(events) < count:
+        ch = rng.choice(string.ascii_lowercase * 4 + string.digits + '  ')
+        key = 'space' if ch == ' ' else ch
+        events += tap(key, ('shift',) if rng.random() < 0.05 else ())
+    return events[:count]
+
+
+def shortcut_stream(count, rng):
+    """Editor use: typing mixed with ctrl/alt shortcuts, a few of them ours"""
+    events = []
+    while len(events) < count:
+        roll = rng.random()
+        if roll < 0.02:
+            modifier, key = rng.choice(COMBOS).split('+')
+            events += tap(key, (modifier,))
+        elif roll < 0.2:
+            events += tap(rng.choice('acsvxzf'), (rng.choice(('ctrl', 'alt')),))
+        else:
+            events += tap(rng.choice(string.ascii_lowercase))
+    return events[:count]
+
+
+def gaming_stream(count, rng):
+    """Held modifiers with movement keys"""
+    events = []
+    while len(events) < count:
+        modifiers = ('shift',) if rng.random() < 0.3 else ()
+        events += tap(rng.choice('wasdqe123'), modifiers)
+    return events[:count]
+
+
+STREAMS = {'typing': typing_stream, 'shortcuts': shortcut_stream, 'gaming': gaming_stream}
+
+
+def make_backend(delivery):
+    backend = FakeHotkeyBackend(delivery)
+    hits = []
+    supervisor = HotkeySupervisor(backend, interval=3600)
+    for combo in COMBOS:
+        supervisor.add(combo, lambda combo=combo: hits.append(combo))
+    supervisor.register()
+    return backend, supervisor, hits
+
+
+def bench_stream(name, events, repeat):
+    print(f"\n{name}: {len(events)} key events")
+    print(f"{'delivery':<12}{'wakeups/key':>12}{'ns/key':>10}{'p95 ns/key':>12}{'hotkeys':>9}")
+    for delivery in ('hook', 'registered'):
+        backend, supervisor, hits = make_backend(delivery)
+        messages = backend.translate(events)
+        deliver = backend.deliver
+        timings = []
+        for _ in range(repeat):
+            hits.clear()
+            started = time.perf_counter()
+            for message in messages:
+                deliver(message)
+            timings.append((time.perf_counter() - started) * 1e9 / len(events))
+        supervisor.unregister()
+        print(f"{delivery:<12}{len(messages) / len(events):>12.3f}{statistics.mean(timings):>10.1f}"
+              f"{percentile(timings, 0.95):>12.1f}{len(hits):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name, build in STREAMS.items():
+        bench_stream(name, build(args.keys, random.Random(args.seed)), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Per-operation cost of the hidden-window journal on a hide/show stream.
+
+Runs headless against the simulated desktop and a temporary journal:
+
+    python benchmarks/bench_journal.py [--ops 20000] [--windows 200]
+
+Each operation is what a hide/show hotkey does: ShowWindow on the
+simulated desktop, then (except for "none") the journal record.
+"batched" is the app's setting (write per record, background fsync at
+most every 0.2 s); "fsync each" syncs inside every operation, which is
+what the hotkey would pay without batching.  In both journaled modes the
+background thread compacts at its first fsync after 1000 records.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import window_backend as wb  # noqa: E402
+from window_journal import WindowJournal, replay  # noqa: E402
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def make_stream(count, hwnds, rng):
+    """(hwnd, hide?) pairs; a window is only shown after it was hidden"""
+    hidden = set()
+    stream = []
+    for _ in range(count):
+        hwnd = rng.choice(hwnds)
+        hide = hwnd not in hidden
+        (hidden.add if hide else hidden.discard)(hwnd)
+        stream.append((hwnd, hide))
+    return stream
+
+
+def run(mode, desktop, stream, folder):
+    path = os.path.join(folder, f"{mode.replace(' ', '_')}.journal")
+    journal = None
+    if mode != "none":
+        journal = WindowJournal(path)
+        journal.open()
+    identity = {hwnd: (window.process_name, window.class_name, window.title)
+                for hwnd, window in desktop.windows.items()}
+    samples = []
+    started = time.perf_counter()
+    for hwnd, hide in stream:
+        begin = time.perf_counter()
+        desktop.ShowWindow(hwnd, wb.SW_HIDE if hide else wb.SW_SHOW)
+        if journal is not None:
+            if hide:
+                journal.hidden(hwnd, *identity[hwnd])
+            else:
+                journal.shown(hwnd)
+            if mode == "fsync each":
+                journal.sync()
+        samples.append((time.perf_counter() - begin) * 1e6)
+    elapsed = time.perf_counter() - started
+
+    syncs = compactions = size = 0
+    if journal is not None:
+        expected = sorted(journal.entries)
+        journal.sync()
+        syncs, compactions = journal.syncs, journal.compactions
+        size = os.path.getsize(path)
+        assert sorted(replay(path)) == expected
+        journal.close()
+    print(f"{mode:<12}{len(stream) / elapsed:>11.0f}{statistics.mean(samples):>10.2f}"
+          f"{percentile(samples, 0.99):>10.2f}{max(samples):>10.0f}{syncs:>8}{compactions:>9}{size / 1024:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--windows", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    desktop = wb.SimulatedDesktop()
+    hwnds = desktop.populate(args.windows, seed=args.seed, hidden_ratio=0)
+    stream = make_stream(args.ops, hwnds, random.Random(args.seed))
+    print(f"{args.ops} hide/show operations on {args.windows} windows")
+    print(f"{'journal':<12}{'ops/s':>11}{'mean µs':>10}{'p99 µs':>10}{'max µs':>10}"
+          f"{'fsyncs':>8}{'compact':>9}{'file KB':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for mode in ("none", "batched", "fsync each"):
+            run(mode, desktop, stream, folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Benchmark suite: the tool's hot paths end to end on the simulated desktop.
+
+Drives a real CustomTestTool (withdrawn Tk window) against SimulatedDesktop
+at several desktop sizes and writes the results as JSON:
+
+    python benchmarks/bench_suite.py [--sizes 100 1000 10000] [--latency 0.0001]
+        [--output results.json] [--baseline baseline.json] [--save-baseline baseline.json]
+        [--trace trace.json]
+
+Scenarios, timed per operation until the UI shows the result:
+
+    refresh        refresh_list() -> snapshot shown
+    filter         typing a query -> filter pass shown
+    select         on_select() for a list row (slider/checkbox loaded)
+    slider_tick    one update_level() call on the Tk thread
+    slider_settle  last tick of a 255 -> 0 sweep -> alpha on the window
+    taskbar        toggle_taskbar() -> change made and the row updated
+    restore        restore_all_windows() -> job finished and list refreshed
+    hotkey         hide/show hotkey press -> ShowWindow done
+
+Each result has ops, mean/p50/p95/max (ms) and simulated win32 calls per
+operation.  With --baseline, every p50 is compared to the stored run and
+the script exits with status 1 if one is more than --threshold times
+slower (and at least --min-ms slower).  Message boxes are answered
+automatically and rules/journal go to a temporary folder.  --trace
+records every win32 call of the measured runs and writes one Chrome
+trace per size (trace-100.json, ...); timings then include the tracing.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_record import app_idle  # noqa: E402
+
+SCENARIOS = ('refresh', 'filter', 'select', 'slider_tick', 'slider_settle', 'taskbar', 'restore', 'hotkey')
+QUERIES = ("chrome", "visual studio", "p", "zzz", "")
+SETTLE_TIMEOUT = 60.0
+PUMP_SLEEP = 0.0002  # between Tk updates; a busy loop would starve the worker threads of the GIL
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples, calls):
+    """ms statistics of samples (seconds) plus win32 calls per operation"""
+    ms = [sample * 1000 for sample in samples]
+    return {'ops': len(ms), 'mean': round(statistics.mean(ms), 4), 'p50': round(percentile(ms, 0.50), 4),
+            'p95': round(percentile(ms, 0.95), 4), 'max': round(max(ms), 4),
+            'calls_per_op': round(calls / len(ms), 1)}
+
+
+class Bench:
+    """One CustomTestTool on a simulated desktop of size windows"""
+
+    def __init__(self, size, latency, seed, trace=None):
+        import tkinter as tk
+        import main
+        from window_backend import SimulatedDesktop
+        self.desktop = SimulatedDesktop()
+        self.desktop.populate(size, seed=seed, hidden_ratio=0.0)
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.app = main.CustomTestTool(self.root, backend=self.desktop, list_mode="tree")
+        self.app.filter_var.set("")
+        self.wait_idle()
+        self.desktop.latency = latency  # startup is not measured
+        self.tracer = None
+        if trace:
+            from win32_trace import CallTracer
+            base, ext = os.path.splitext(trace)
+            self.tracer = CallTracer(f"{base}-{size}{ext or '.json'}").install(self.desktop)
+
+    def pump(self):
+        self.root.update()
+
+    def wait(self, done, timeout=SETTLE_TIMEOUT):
+        deadline = time.perf_counter() + timeout
+        while not done():
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Timed out waiting for the UI to settle")
+            self.pump()
+            time.sleep(PUMP_SLEEP)
+
+    def idle(self):
+        return app_idle(self.app)
+
+    def wait_idle(self):
+        self.wait(self.idle)
+        self.pump()
+
+    def calls(self):
+        return sum(self.desktop.call_counts.values())
+
+    def measure(self, operations, run):
+        """run(operation) -> seconds for each operation; returns the summary"""
+        calls = self.calls()
+        samples = [run(operation) for operation in operations]
+        return summarize(samples, self.calls() - calls)
+
+    def listed(self, count):
+        return [hwnd for hwnd in self.app.registry.order[:count] if hwnd != self.app.get_own_hwnd()]
+
+    # --- scenarios ---
+
+    def refresh(self, repeat):
+        def run(_):
+            started = time.perf_counter()
+            self.app.refresh_list()
+            self.wait_idle()
+            return time.perf_counter() - started
+        return self.measure(range(repeat), run)
+
+    def filter(self, repeat):
+        def run(query):
+            started = time.perf_counter()
+            self.app.filter_var.set(query)
+            self.wait_idle()
+            return time.perf_counter() - started
+        result = self.measure([query for _ in range(repeat) for query in QUERIES], run)
+        self.app.filter_var.set("")
+        self.wait_idle()
+        return result
+
+    def select(self, repeat):
+        app = self.app
+
+        def run(hwnd):
+            app.tree.selection_set(app.registry.get(hwnd).item_id)
+            started = time.perf_counter()
+            app.on_select(None)
+            return time.perf_counter() - started
+        return self.measure(self.listed(10 * repeat), run)
+
+    def slider(self, repeat):
+        app = self.app
+        hwnd = self.listed(1)[0]
+        app.select_window(hwnd)
+        ticks = []
+        settles = []
+        calls = self.calls()
+        for _ in range(repeat):
+            for level in range(255, -1, -5):
+                started = time.perf_counter()
+                app.update_level(level)
+                ticks.append(time.perf_counter() - started)
+                self.pump()
+            self.wait(lambda: self.desktop.windows[hwnd].alpha == 0)
+            settles.append(time.perf_counter() - started)
+            app.update_level(255)
+            self.wait_idle()
+        calls = self.calls() - calls
+        return {'slider_tick': summarize(ticks, calls), 'slider_settle': summarize(settles, calls)}
+
+    def taskbar(self, repeat):
+        app = self.app
+        hwnd = self.listed(1)[0]
+        app.select_window(hwnd)
+
+        def run(show):
+            started = time.perf_counter()
+            app.taskbar_var.set(show)
+            app.toggle_taskbar()
+            self.wait_idle()
+            return time.perf_counter() - started
+        return self.measure([show for _ in range(repeat) for show in (False, True)], run)
+
+    def restore(self, repeat, count):
+        from bulk_restore import set_taskbar_visible
+        app = self.app
+        samples = []
+        calls = 0
+        for _ in range(repeat):
+            hwnds = self.listed(count)
+            for hwnd in hwnds:  # setup, not measured
+                set_taskbar_visible(self.desktop, hwnd, False)
+            app.hidden_windows.update(hwnds)
+            before = self.calls()
+            started = time.perf_counter()
+            app.restore_all_windows()
+            self.wait_idle()
+            samples.append(time.perf_counter() - started)
+            calls += self.calls() - before
+        return summarize(samples, calls)
+
+    def hotkey(self, repeat):
+        app = self.app
+        keys = app.hotkeys.backend
+        app.hotkey_target_hwnd = self.listed(1)[0]
+
+        def run(combo):
+            started = time.perf_counter()
+            keys.press(combo)
+            return time.perf_counter() - started
+        result = self.measure(['alt+1', 'alt+2'] * (10 * repeat), run)
+        self.wait_idle()
+        return result
+
+    def close(self):
+        if self.tracer is not None:
+            self.tracer.uninstall()
+            print(f"\nWrote {self.tracer.export()}")
+            print(self.tracer.format(limit=8))
+        self.desktop.latency = 0.0
+        self.app.perform_exit()
+
+
+def run_size(size, args):
+    bench = Bench(size, args.latency, args.seed, args.trace)
+    results = {}
+    try:
+        results['refresh'] = bench.refresh(args.repeat)
+        results['filter'] = bench.filter(args.repeat)
+        results['select'] = bench.select(args.repeat)
+        results.update(bench.slider(args.repeat))
+        results['taskbar'] = bench.taskbar(args.repeat)
+        results['restore'] = bench.restore(args.repeat, min(args.restore_count, size))
+        results['hotkey'] = bench.hotkey(args.repeat)
+    finally:
+        bench.close()
+    return results
+
+
+def compare(results, baseline, threshold, min_ms):
+    """Print current vs baseline p50; returns the regressed result names"""
+    print(f"\n{'result':<24}{'p50 ms':>10}{'baseline':>10}{'ratio':>8}")
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<24}{row['p50']:>10.3f}{'-':>10}{'-':>8}")
+            continue
+        ratio = row['p50'] / base['p50'] if base['p50'] else float('inf')
+        regressed = ratio > threshold and row['p50'] - base['p50'] > min_ms
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24}{row['p50']:>10.3f}{base['p50']:>10.3f}{ratio:>8.2f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per win32 call (default 0: pure CPU cost)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--restore-count", type=int, default=100, help="windows hidden per restore run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--trace", help="write a Chrome trace of the win32 calls per size (PATH-<size>.json)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore p50 differences below this")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="ctt-bench-")
+    os.environ['CTT_RULES'] = os.path.join(folder, "window_rules.json")
+    os.environ['CTT_JOURNAL'] = os.path.join(folder, "hidden_windows.journal")
+    os.environ['CTT_HOTKEYS'] = "fake"
+    for name in ('CTT_CONTROL', 'CTT_RECORD'):
+        os.environ.pop(name, None)
+
+    import main as app_module
+    answered = []
+    for name in ('showinfo', 'showwarning', 'showerror'):
+        setattr(app_module.messagebox, name, lambda *a, **k: answered.append(a))
+
+    results = {}
+    for size in args.sizes:
+        started = time.perf_counter()
+        for name, row in run_size(size, args).items():
+            results[f"{name}@{size}"] = row
+        print(f"\n{size} windows ({time.perf_counter() - started:.1f} s, latency {args.latency * 1e6:.0f} µs/call)")
+        print(f"{'scenario':<16}{'ops':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'calls/op':>10}")
+        for name in SCENARIOS:
+            row = results[f"{name}@{size}"]
+            print(f"{name:<16}{row['ops']:>6}{row['mean']:>10.3f}{row['p50']:>10.3f}{row['p95']:>10.3f}"
+                  f"{row['max']:>10.3f}{row['calls_per_op']:>10}")
+
+    report = {'meta': {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+                       'platform': platform.platform(), 'latency': args.latency, 'repeat': args.repeat,
+                       'restore_count': args.restore_count, 'seed': args.seed},
+              'unit': 'ms', 'results': results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nWrote {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('latency') != args.latency:
+            print(f"\nNote: baseline was run with latency {baseline.get('meta', {}).get('latency')}")
+        regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
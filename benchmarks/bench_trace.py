@@ -0,0 +1,70 @@
+"""Cost of win32 call tracing, disabled vs enabled.
+
+Runs headless against the simulated desktop:
+
+    python benchmarks/bench_trace.py [--windows 10000] [--calls 200000] [--repeat 5]
+
+Disabled tracing installs nothing, so "off" is the backend's own method;
+"on" goes through the CallTracer wrapper.  Reported per call
+(GetWindowLong in a tight loop) and per full enumeration (take_snapshot,
+which also times every EnumWindows callback).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import window_backend as wb  # noqa: E402
+from enumeration import take_snapshot  # noqa: E402
+from win32_trace import CallTracer  # noqa: E402
+
+
+def per_call(desktop, hwnd, calls):
+    get = desktop.GetWindowLong
+    started = time.perf_counter()
+    for _ in range(calls):
+        get(hwnd, wb.GWL_EXSTYLE)
+    return (time.perf_counter() - started) / calls
+
+
+def per_snapshot(desktop, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        take_snapshot(desktop)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, default=10000)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    desktop = wb.SimulatedDesktop()
+    hwnds = desktop.populate(args.windows, hidden_ratio=0)
+    tracer = CallTracer()
+
+    off_call = per_call(desktop, hwnds[0], args.calls)
+    off_snapshot = per_snapshot(desktop, args.repeat)
+    tracer.install(desktop)
+    on_call = per_call(desktop, hwnds[0], args.calls)
+    on_snapshot = per_snapshot(desktop, args.repeat)
+    tracer.uninstall()
+    after_call = per_call(desktop, hwnds[0], args.calls)
+
+    print(f"{'tracing':<16}{'call µs':>10}{'snapshot ms':>14}")
+    print(f"{'off':<16}{off_call * 1e6:>10.3f}{off_snapshot * 1000:>14.2f}")
+    print(f"{'on':<16}{on_call * 1e6:>10.3f}{on_snapshot * 1000:>14.2f}")
+    print(f"{'off again':<16}{after_call * 1e6:>10.3f}{'':>14}")
+    print(f"\ntraced: {sum(stats[0] for stats in tracer.calls.values())} calls, "
+          f"{len(tracer.events)} events kept ({tracer.dropped} dropped), "
+          f"{len({hwnd for _, hwnd in tracer.by_hwnd})} windows in the per-window breakdown")
+
+
+if __name__ == "__main__":
+    main()
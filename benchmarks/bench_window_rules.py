@@ -0,0 +1,125 @@
+"""Rule matching cost for newly created windows, per rule count.
+
+Runs headless on synthetic rules and window-creation streams:
+
+    python benchmarks/bench_window_rules.py [--windows 20000] [--rules 10 100 500 1000]
+
+"linear" checks every rule against each window (WindowRule.matches) and
+merges the hits; "compiled" is RuleMatcher: (process, class) buckets and
+one combined title regex per bucket.  Both must agree on every window.
+Rules are a mix of process-only, process+title, class+title and
+title-only; about half the windows come from processes that have rules.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from window_rules import RuleMatcher, WindowRule, WindowSettings  # noqa: E402
+
+CLASSES = ('Chrome_WidgetWin_1', 'Notepad', 'CabinetWClass', 'MozillaWindowClass',
+           'ConsoleWindowClass', 'SunAwtFrame', 'Qt5QWindowIcon', 'ApplicationFrameWindow')
+WORDS = ('Inbox', 'Docs', 'Report', 'Build', 'Game', 'Chat', 'Settings', 'Test',
+         'Project', 'Music', 'Map', 'Wiki', 'Invoice', 'Draft', 'Player', 'Stream')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def make_rules(count, processes, rng):
+    rules = []
+    for i in range(count):
+        kind = i % 4
+        alpha = rng.randrange(40, 256)
+        taskbar = rng.choice((None, True, False))
+        if kind == 0:
+            rules.append(WindowRule(rng.choice(processes), alpha=alpha, taskbar=taskbar))
+        elif kind == 1:
+            rules.append(WindowRule(rng.choice(processes), title=f"{rng.choice(WORDS)} {i}\\b",
+                                    alpha=alpha, taskbar=taskbar))
+        elif kind == 2:
+            rules.append(WindowRule(class_name=rng.choice(CLASSES), title=f"^{rng.choice(WORDS)}.* - {i}$",
+                                    alpha=alpha, taskbar=taskbar))
+        else:
+            rules.append(WindowRule(title=f"(?:{rng.choice(WORDS)}|{rng.choice(WORDS)}) #{i}",
+                                    alpha=alpha, taskbar=taskbar))
+    return rules
+
+
+def make_stream(count, processes, rule_count, rng):
+    """(process, class, title) of created windows"""
+    stream = []
+    for _ in range(count):
+        process = rng.choice(processes) if rng.random() < 0.5 else f"app{rng.randrange(5000)}.exe"
+        title = f"{rng.choice(WORDS)} {rng.randrange(rule_count * 2)} - {rng.randrange(rule_count * 2)}"
+        if rng.random() < 0.2:
+            title += f" #{rng.randrange(rule_count * 2)}"
+        stream.append((process, rng.choice(CLASSES), title))
+    return stream
+
+
+def linear_match(rules, process, class_name, title):
+    alpha = taskbar = None
+    matched = False
+    for rule in rules:
+        if rule.matches(process, class_name, title):
+            matched = True
+            if alpha is None:
+                alpha = rule.alpha
+            if taskbar is None:
+                taskbar = rule.taskbar
+    return WindowSettings(alpha, taskbar) if matched else None
+
+
+def run(name, match, stream, repeat):
+    timings = []
+    hits = 0
+    for _ in range(repeat):
+        per_window = []
+        hits = 0
+        for window in stream:
+            started = time.perf_counter()
+            if match(*window) is not None:
+                hits += 1
+            per_window.append(time.perf_counter() - started)
+        timings.append(per_window)
+    samples = [t * 1e6 for per_window in timings for t in per_window]
+    total = sum(samples) / repeat / 1e6
+    print(f"  {name:<10}{len(stream) / total:>12.0f}{statistics.mean(samples):>10.2f}"
+          f"{percentile(samples, 0.99):>10.2f}{max(samples):>10.1f}{hits / len(stream):>8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, default=20000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for count in args.rules:
+        rng = random.Random(args.seed)
+        processes = [f"tool{i}.exe" for i in range(max(4, count // 5))]
+        rules = make_rules(count, processes, rng)
+        stream = make_stream(args.windows, processes, count, rng)
+
+        started = time.perf_counter()
+        matcher = RuleMatcher(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+        for window in stream:
+            assert matcher.match(*window) == linear_match(rules, *window), window
+
+        print(f"\n{count} rules, {len(stream)} windows (compile {compile_ms:.1f}ms)")
+        print(f"  {'matcher':<10}{'windows/s':>12}{'mean µs':>10}{'p99 µs':>10}{'max µs':>10}{'hit':>8}")
+        run("linear", lambda *window: linear_match(rules, *window), stream, args.repeat)
+        run("compiled", matcher.match, stream, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
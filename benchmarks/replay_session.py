@@ -0,0 +1,455 @@
+"""Replay a recorded session (CTT_RECORD) on the simulated desktop.
+
+Rebuilds the recorded desktop in a SimulatedDesktop, starts a real
+CustomTestTool (withdrawn Tk window) on it and performs the recorded user
+actions at their recorded times, then compares both runs:
+
+    python benchmarks/replay_session.py session.ctt.gz [--speed 1] [--latency recorded]
+        [--output report.json] [--baseline report.json] [--save-baseline report.json]
+
+--speed 1 keeps the recorded timing, 10 replays ten times faster and 0
+runs the actions back to back (waiting for the UI to settle in between).
+The desktop follows what the original run observed: windows appearing in
+or vanishing from an enumeration, titles, visibility, styles, alpha, hung
+and foreground windows are applied at the time they were read, unless the
+tool's own recorded change explains them (see external_changes).  With
+--latency recorded (default) every simulated call takes the median time
+the same call took when recording (medians under MIN_LATENCY count as 0,
+below what time.sleep can wait for); a number sets one latency for all.
+
+The replay is recorded too (--record, default a temporary file), and the
+report lists per action the handler and settle (action -> UI idle) times
+of both runs and per win32 call the count and total time.  With
+--baseline, every settle p50 is compared to an earlier replay report and
+the script exits with status 1 if one is more than --threshold times
+slower (and at least --min-ms slower).
+"""
+import argparse
+import bisect
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import window_backend as wb  # noqa: E402
+from session_record import app_idle, load_session, summarize  # noqa: E402
+from window_rules import RULES_VERSION  # noqa: E402
+
+MIN_LATENCY = 0.0005  # seconds; shorter recorded medians are not simulated
+SETTLE_TIMEOUT = 60.0
+PUMP_SLEEP = 0.0002  # between Tk updates; a busy loop would starve the worker threads of the GIL
+
+TITLE_CALLS = ('GetWindowText', 'GetWindowTextTimeout', 'InternalGetWindowText')
+READ_PROPERTIES = {'IsHungAppWindow': 'hung', 'IsIconic': 'iconic', 'GetWindowProcessName': 'process',
+                   'GetClassName': 'class'}
+
+
+def build_desktop(header):
+    """SimulatedDesktop holding the windows of a recording's header"""
+    desktop = wb.SimulatedDesktop()
+    state = header['desktop']
+    for hwnd, title, class_name, process, visible, iconic, exstyle, alpha, flags, hung in reversed(state['windows']):
+        desktop.add_window(title, class_name, process, visible, exstyle, hwnd=hwnd)
+        window = desktop.windows[hwnd]
+        window.iconic = iconic
+        window.alpha = alpha
+        window.layered_flags = flags
+        window.hung = hung
+    if state['foreground'] in desktop.windows:
+        desktop.foreground = state['foreground']
+    return desktop
+
+
+def recorded_latency(session, floor=MIN_LATENCY):
+    """call name -> median recorded seconds (medians under floor left out)"""
+    durations = {}
+    for call in session.calls:
+        if call.name != 'EnumWindows':  # its time includes the callbacks' calls
+            durations.setdefault(call.name, []).append(call.duration)
+    medians = {name: statistics.median(values) for name, values in durations.items()}
+    return {name: median for name, median in medians.items() if median >= floor}
+
+
+def observe(desktop, call):
+    """Bring the simulated desktop in line with what one recorded read saw"""
+    name = call.name
+    result = call.result
+    if name == 'EnumWindows':
+        for hwnd in result:
+            if hwnd not in desktop.windows:
+                # Appeared since the last look; the reads that follow fill it in
+                desktop.add_window("", "", "", visible=False, exstyle=0, hwnd=hwnd)
+        if call.error is None:
+            listed = set(result)
+            for hwnd in [hwnd for hwnd in desktop.windows if hwnd not in listed]:
+                desktop.destroy_window(hwnd)
+        desktop.restack(result)
+        return
+    if name == 'GetForegroundWindow':
+        if result in desktop.windows:
+            desktop.foreground = result
+        return
+    if call.error is not None or not call.args:
+        return
+    hwnd = call.args[0]
+    window = desktop.windows.get(hwnd)
+    if window is None:
+        if name == 'IsWindow':
+            return
+        # A new window read (live tracking) before any enumeration listed it
+        desktop.add_window("", "", "", visible=False, exstyle=0, hwnd=hwnd)
+        window = desktop.windows[hwnd]
+    if name == 'IsWindow':
+        if not result:
+            desktop.destroy_window(hwnd)
+    elif name == 'IsWindowVisible':
+        desktop.set_visible(hwnd, bool(result))
+    elif name in TITLE_CALLS:
+        if result is not None and result != window.title:
+            desktop.set_title(hwnd, result)
+    elif name == 'IsHungAppWindow':
+        window.hung = bool(result)
+    elif name == 'IsIconic':
+        window.iconic = bool(result)
+    elif name == 'GetWindowLong':
+        if call.args[1] == wb.GWL_EXSTYLE:
+            window.exstyle = result
+    elif name == 'GetLayeredWindowAttributes':
+        window.alpha, window.layered_flags = result[1], result[2]
+    elif name == 'GetWindowProcessName':
+        window.process_name = result
+    elif name == 'GetClassName':
+        window.class_name = result
+
+
+# --- replaying actions: fn(app, handler, params) -> False if it could not be replayed ---
+
+def _call(app, handler, params):
+    handler(*params)
+
+
+def _select(app, handler, params):
+    record = app.registry.get(params[0])
+    if record is None:
+        return False  # not listed in the replay
+    if app.virtual_list is not None:
+        app.virtual_list.select(record.hwnd)
+    else:
+        app.tree.selection_set(record.item_id)  # <<TreeviewSelect>> runs the recorded on_select
+
+
+def _filter(app, handler, params):
+    app.filter_var.set(params[0])  # the variable trace is the recorded handler
+
+
+def _level(app, handler, params):
+    app.level_var.set(int(float(params[0])))
+    handler(params[0])
+
+
+def _with_var(var_name):
+    def replay(app, handler, params):
+        getattr(app, var_name).set(params[0])
+        handler()
+    return replay
+
+
+REPLAY = {
+    'refresh': _call, 'restore': _call, 'target': _call, 'register': _call, 'hide': _call,
+    'show': _call, 'group': _call, 'command': _call,
+    'select': _select, 'filter': _filter, 'level': _level,
+    'live': _with_var('live_var'), 'taskbar': _with_var('taskbar_var'),
+    'group_add': _with_var('group_var'), 'group_clear': _with_var('group_var'),
+}
+
+
+def _read(call):
+    """(hwnd, property, value) a read call saw, or None"""
+    name, args, result = call.name, call.args, call.result
+    if call.error is not None:
+        return None
+    if name == 'GetForegroundWindow':
+        return None, 'foreground', result
+    if not args:
+        return None
+    if name == 'IsWindowVisible':
+        return args[0], 'visible', bool(result)
+    if name in TITLE_CALLS:
+        return (args[0], 'title', result) if result is not None else None
+    if name == 'GetWindowLong':
+        return (args[0], 'exstyle', result) if args[1] == wb.GWL_EXSTYLE else None
+    if name == 'GetLayeredWindowAttributes':
+        return args[0], 'alpha', (result[1], result[2])
+    if name == 'IsWindow':
+        return args[0], 'exists', bool(result)
+    prop = READ_PROPERTIES.get(name)
+    return (args[0], prop, result) if prop else None
+
+
+def _written(call):
+    """(hwnd, property, value) pairs one of the tool's own changes set"""
+    name, args = call.name, call.args
+    if call.error is not None or not args:
+        return ()
+    if name == 'SetWindowLong' and args[1] == wb.GWL_EXSTYLE:
+        return ((args[0], 'exstyle', args[2]),)
+    if name == 'SetLayeredWindowAttributes':
+        return ((args[0], 'alpha', (args[2], args[3])),)
+    if name == 'ShowWindow':
+        return ((args[0], 'visible', args[1] != wb.SW_HIDE),)
+    if name == 'SetForegroundWindow':
+        return ((None, 'foreground', args[0]),)
+    return ()
+
+
+def external_changes(session):
+    """The reads that saw something the tool had not done itself.
+
+    A read matching the last value read or written is dropped: the
+    replayed tool makes its own changes, and re-applying what the
+    original saw afterwards could undo them when timing differs.
+    """
+    known = {(hwnd, 'exists'): True for hwnd, *_ in session.header['desktop']['windows']}
+    for hwnd, title, class_name, process, visible, iconic, exstyle, alpha, flags, hung \
+            in session.header['desktop']['windows']:
+        known.update({(hwnd, 'title'): title, (hwnd, 'class'): class_name, (hwnd, 'process'): process,
+                      (hwnd, 'visible'): visible, (hwnd, 'iconic'): iconic, (hwnd, 'exstyle'): exstyle,
+                      (hwnd, 'alpha'): (alpha, flags), (hwnd, 'hung'): hung})
+    known[(None, 'foreground')] = session.header['desktop']['foreground']
+    order = [hwnd for hwnd, *_ in session.header['desktop']['windows']]
+    changes = []
+    for call in session.calls:
+        if call.name == 'EnumWindows':
+            if call.result != order:
+                changes.append(call)
+                if call.error is None:
+                    order = call.result
+                for hwnd in call.result:
+                    known[(hwnd, 'exists')] = True
+            continue
+        for hwnd, prop, value in _written(call):
+            known[(hwnd, prop)] = value
+        read = _read(call)
+        if read is not None:
+            hwnd, prop, value = read
+            if known.get((hwnd, prop)) != value:
+                known[(hwnd, prop)] = value
+                changes.append(call)
+    return changes
+
+
+def timeline(session):
+    """(time, order, kind, item) of every external change and action, in replay order"""
+    changes = external_changes(session)
+    events = [(call.t, 0, 'observe', call) for call in changes]
+    starts = [call.t for call in changes]
+    for action in session.actions:
+        if action.name == 'startup':
+            continue  # replayed by starting the app
+        events.append((action.t, 1, 'action', action))
+        # The foreground window a hotkey read while running is needed before it runs
+        first = bisect.bisect_left(starts, action.t)
+        last = bisect.bisect_right(starts, action.t + action.duration)
+        for call in changes[first:last]:
+            if call.name == 'GetForegroundWindow' and call.thread == action.thread:
+                events.append((action.t, 0, 'observe', call))
+    events.sort(key=lambda event: event[:2])
+    return events
+
+
+class Replayer:
+    """One CustomTestTool replaying session on a rebuilt simulated desktop"""
+
+    def __init__(self, session, latency, list_mode=None):
+        import tkinter as tk
+        import main
+        self.session = session
+        self.desktop = build_desktop(session.header)
+        if latency == 'recorded':
+            self.desktop.call_latency = recorded_latency(session)
+        else:
+            self.desktop.latency = float(latency)
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.app = main.CustomTestTool(self.root, backend=self.desktop,
+                                       list_mode=list_mode or session.header.get('list_mode'))
+        self.skipped = {}  # action name -> count not replayed
+        self.lag = []      # seconds each action ran behind its scaled time
+
+    def pump(self):
+        self.root.update()
+
+    def wait(self, done, timeout=SETTLE_TIMEOUT):
+        deadline = time.perf_counter() + timeout
+        while not done():
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Timed out waiting for the UI to settle")
+            self.pump()
+            time.sleep(PUMP_SLEEP)
+
+    def wait_until(self, due):
+        while time.perf_counter() < due:
+            self.pump()
+            time.sleep(min(PUMP_SLEEP, max(0.0, due - time.perf_counter())))
+
+    def wait_idle(self):
+        self.wait(lambda: app_idle(self.app) and not self.app.recorder.unsettled)
+        self.pump()
+
+    def perform(self, action):
+        replay = REPLAY.get(action.name)
+        handler = self.app.recorder.handlers.get(action.name)
+        if replay is None or handler is None or replay(self.app, handler, action.params) is False:
+            self.skipped[action.name] = self.skipped.get(action.name, 0) + 1
+
+    def run(self, speed):
+        origin = self.app.recorder.origin
+        for t, _, kind, item in timeline(self.session):
+            if speed > 0:
+                due = origin + t / speed
+                self.wait_until(due)
+            elif kind == 'action':
+                self.wait_idle()
+            if kind == 'observe':
+                observe(self.desktop, item)
+            else:
+                if speed > 0:
+                    self.lag.append(time.perf_counter() - due)
+                self.perform(item)
+        self.wait_idle()
+
+    def close(self):
+        self.desktop.latency = 0.0
+        self.desktop.call_latency = {}
+        self.app.perform_exit()
+
+
+def print_report(original, replay):
+    print(f"\n{'action':<12}{'count':>12}{'handler p50 ms':>20}{'settle p50 ms':>22}{'ratio':>10}")
+    for name in sorted(set(original['actions']) | set(replay['actions'])):
+        before = original['actions'].get(name)
+        after = replay['actions'].get(name)
+        counts = f"{before['count'] if before else 0}/{after['count'] if after else 0}"
+        handler = settle = ratio = "-"
+        if before and after:
+            handler = f"{before['handler']['p50']:.2f}/{after['handler']['p50']:.2f}"
+            if before['settle'] and after['settle']:
+                settle = f"{before['settle']['p50']:.2f}/{after['settle']['p50']:.2f}"
+                if before['settle']['p50']:
+                    ratio = f"{after['settle']['p50'] / before['settle']['p50']:.2f}"
+        print(f"{name:<12}{counts:>12}{handler:>20}{settle:>22}{ratio:>10}")
+    print("(original/replay)")
+
+    print(f"\n{'call':<28}{'count':>16}{'total ms':>22}")
+    for name in list(original['calls'])[:12]:
+        before = original['calls'][name]
+        after = replay['calls'].get(name, {'count': 0, 'total_ms': 0.0})
+        print(f"{name:<28}{before['count']:>8}/{after['count']:<7}"
+              f"{before['total_ms']:>11.1f}/{after['total_ms']:<10.1f}")
+
+
+def compare(actions, baseline, threshold, min_ms):
+    """Print settle p50 against a baseline replay; returns the regressed action names"""
+    print(f"\n{'action':<12}{'settle p50':>12}{'baseline':>10}{'ratio':>8}")
+    regressions = []
+    for name, row in sorted(actions.items()):
+        base = baseline.get(name)
+        if not row['settle'] or not base or not base['settle']:
+            continue
+        now, before = row['settle']['p50'], base['settle']['p50']
+        ratio = now / before if before else float('inf')
+        regressed = ratio > threshold and now - before > min_ms
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<12}{now:>12.3f}{before:>10.3f}{ratio:>8.2f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("session", help="recording made with CTT_RECORD=<file>")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1: recorded timing, N: N times faster, 0: back to back")
+    parser.add_argument("--latency", default="recorded",
+                        help="'recorded' (median per call) or seconds per simulated call")
+    parser.add_argument("--list-mode", choices=("tree", "virtual"), help="default: as recorded")
+    parser.add_argument("--record", help="keep the replay's own recording here")
+    parser.add_argument("--output", help="write the report JSON here")
+    parser.add_argument("--baseline", help="compare against this report JSON (an earlier replay)")
+    parser.add_argument("--save-baseline", help="also write the report here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="settle p50 ratio counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore settle p50 differences below this")
+    args = parser.parse_args()
+
+    session = load_session(args.session)
+    header = session.header
+    print(f"{args.session}: {len(header['desktop']['windows'])} windows, {len(session.actions)} actions, "
+          f"{len(session.calls)} calls, {session.duration:.1f} s ({header.get('platform', '?')})")
+
+    folder = tempfile.mkdtemp(prefix="ctt-replay-")
+    os.environ['CTT_RULES'] = os.path.join(folder, "window_rules.json")
+    os.environ['CTT_JOURNAL'] = os.path.join(folder, "hidden_windows.journal")
+    os.environ['CTT_RECORD'] = args.record or os.path.join(folder, "replay.ctt.gz")
+    os.environ['CTT_HOTKEYS'] = "fake"
+    for name in ('CTT_CONTROL', 'CTT_TRACE'):
+        os.environ.pop(name, None)
+    with open(os.environ['CTT_RULES'], 'w', encoding='utf-8') as f:
+        json.dump({'version': RULES_VERSION, 'rules': header.get('rules', [])}, f)
+
+    import main as app_module
+    for name in ('showinfo', 'showwarning', 'showerror'):
+        setattr(app_module.messagebox, name, lambda *a, **k: None)
+    app_module.messagebox.askyesno = lambda *a, **k: False
+
+    replayer = Replayer(session, args.latency, args.list_mode)
+    simulated = len(replayer.desktop.call_latency)
+    started = time.perf_counter()
+    try:
+        replayer.run(args.speed)
+    finally:
+        replayer.close()
+    elapsed = time.perf_counter() - started
+
+    replay = load_session(os.environ['CTT_RECORD'])
+    original_summary = summarize(session)
+    replay_summary = summarize(replay)
+    print(f"\nReplayed in {elapsed:.1f} s at speed {args.speed:g} "
+          f"(latency {args.latency}, {simulated} calls with recorded latency)")
+    if replayer.lag:
+        print(f"Actions ran up to {max(replayer.lag) * 1000:.1f} ms behind schedule")
+    if replayer.skipped:
+        print(f"Not replayed: {', '.join(f'{name} x{count}' for name, count in sorted(replayer.skipped.items()))}")
+    print_report(original_summary, replay_summary)
+
+    report = {'meta': {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'session': os.path.abspath(args.session),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'speed': args.speed, 'latency': args.latency, 'elapsed_s': round(elapsed, 3),
+                       'max_lag_ms': round(max(replayer.lag) * 1000, 3) if replayer.lag else None,
+                       'skipped': replayer.skipped},
+              'unit': 'ms', 'original': original_summary, 'replay': replay_summary}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"\nWrote {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('speed') != args.speed:
+            print(f"\nNote: baseline was replayed at speed {baseline.get('meta', {}).get('speed')}")
+        regressions = compare(replay_summary['actions'], baseline.get('replay', {}).get('actions', {}),
+                              args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
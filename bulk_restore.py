@@ -0,0 +1,188 @@
+"""Restore many hidden windows in parallel within a time budget.
+
+Restoring a window takes five cross-process calls, and any of them can
+block for as long as the owning application is hung.  A RestoreJob fans
+the windows out to a small pool of daemon threads (daemon so a thread
+stuck in a hung window can never hold up interpreter exit), gives each
+window window_timeout seconds and the whole job a deadline.  A window
+that overruns is reported as timed out and its thread is replaced, so
+one hung application costs one thread, not the whole job.  Windows that
+IsHungAppWindow already flags are queued last, so they cannot tie up
+every thread while responsive windows wait behind them.
+"""
+import queue
+import threading
+import time
+
+import window_backend as wb
+
+
+def restore_window(backend, hwnd):
+    """Show hwnd and put it back on the taskbar (remove TOOLWINDOW, add APPWINDOW)"""
+    style = backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+    new_style = (style & ~wb.WS_EX_TOOLWINDOW) | wb.WS_EX_APPWINDOW
+
+    # Apply style
+    backend.ShowWindow(hwnd, wb.SW_HIDE)
+    backend.SetWindowLong(hwnd, wb.GWL_EXSTYLE, new_style)
+    backend.ShowWindow(hwnd, wb.SW_SHOW)
+
+    # Force update frame
+    backend.SetWindowPos(hwnd, 0, 0, 0, 0, 0,
+                         wb.SWP_NOMOVE | wb.SWP_NOSIZE |
+                         wb.SWP_NOZORDER | wb.SWP_FRAMECHANGED)
+
+
+def set_taskbar_visible(backend, hwnd, show):
+    """Put hwnd on or take it off the taskbar, keeping its placement; returns (old, new) exstyle"""
+    # Style-based Method
+    # Save current window placement
+    placement = backend.GetWindowPlacement(hwnd)
+    
+    style = backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+    
+    if show:
+        # Show in taskbar: Remove TOOLWINDOW, Add APPWINDOW
+        new_style = (style & ~wb.WS_EX_TOOLWINDOW) | wb.WS_EX_APPWINDOW
+    else:
+        # Hide from taskbar: Add TOOLWINDOW, Remove APPWINDOW
+        new_style = (style | wb.WS_EX_TOOLWINDOW) & ~wb.WS_EX_APPWINDOW
+    
+    # Need to hide/show to apply style change for taskbar
+    backend.ShowWindow(hwnd, wb.SW_HIDE)
+    backend.SetWindowLong(hwnd, wb.GWL_EXSTYLE, new_style)
+    backend.ShowWindow(hwnd, wb.SW_SHOWNOACTIVATE)
+    
+    # Restore window placement
+    backend.SetWindowPlacement(hwnd, placement)
+    return style, new_style
+
+
+class RestoreJob:
+    """One bulk restore; start() it, then poll() from a timer or wait().
+
+    Results: restored (hwnds), failed (hwnd -> exception), timed_out
+    (hwnds still running at their timeout or at the deadline) and skipped
+    (never started before the deadline).
+    """
+
+    def __init__(self, backend, hwnds, workers=8, window_timeout=1.0, deadline=5.0,
+                 action=restore_window):
+        self.backend = backend
+        self.hwnds = list(hwnds)
+        self.workers = max(1, min(workers, len(self.hwnds)))
+        self.window_timeout = window_timeout
+        self.deadline = deadline
+        self.action = action
+        self.restored = []
+        self.failed = {}
+        self.timed_out = []
+        self.skipped = []
+        self.elapsed = 0.0
+        self.done = not self.hwnds
+        self._work = queue.Queue()
+        self._results = queue.Queue()
+        self._running = {}  # hwnd -> start time
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        hung = [hwnd for hwnd in self.hwnds if self._is_hung(hwnd)]
+        for hwnd in [hwnd for hwnd in self.hwnds if hwnd not in hung] + hung:
+            self._work.put(hwnd)
+        for _ in range(self.workers):
+            self._spawn()
+        return self
+
+    def cancel(self):
+        """Finish now: queued windows are skipped, those in flight timed out"""
+        if self._started_at is not None and not self.done:
+            self.deadline = 0.0
+            self.poll()
+        return self
+
+    def _is_hung(self, hwnd):
+        try:
+            return self.backend.IsHungAppWindow(hwnd)  # never sends a message
+        except Exception:
+            return False
+
+    def _spawn(self):
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _worker(self):
+        while True:
+            # Taken and marked running in one step, so poll() always sees the window somewhere
+            with self._lock:
+                if self._cancelled:
+                    return
+                try:
+                    hwnd = self._work.get_nowait()
+                except queue.Empty:
+                    return
+                self._running[hwnd] = time.monotonic()
+            try:
+                self.action(self.backend, hwnd)
+                error = None
+            except Exception as e:
+                error = e
+            with self._lock:
+                self._running.pop(hwnd, None)
+            self._results.put((hwnd, error))
+
+    def poll(self):
+        """Collect finished windows and enforce the timeouts; returns done"""
+        if self.done:
+            return True
+        now = time.monotonic()
+        expired = now - self._started_at >= self.deadline
+        # Snapshot before draining: a window finishing in between is then drained, not lost
+        with self._lock:
+            running = list(self._running.items())
+            if expired:
+                self._cancelled = True
+                while True:
+                    try:
+                        self.skipped.append(self._work.get_nowait())
+                    except queue.Empty:
+                        break
+        while True:
+            try:
+                hwnd, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if hwnd in self.timed_out:
+                self.timed_out.remove(hwnd)  # finished late, but before the deadline
+            if error is None:
+                self.restored.append(hwnd)
+            else:
+                self.failed[hwnd] = error
+
+        for hwnd, started in running:
+            if hwnd in self.timed_out or hwnd in self.restored or hwnd in self.failed:
+                continue
+            if expired:
+                self.timed_out.append(hwnd)
+            elif now - started > self.window_timeout:
+                self.timed_out.append(hwnd)
+                self._spawn()  # the stuck thread keeps its window; the rest go on
+
+        if expired:
+            self._finish()
+        elif len(self.restored) + len(self.failed) + len(self.timed_out) + len(self.skipped) >= len(self.hwnds):
+            self._finish()
+        return self.done
+
+    def wait(self, interval=0.01):
+        """Block until done (at most about deadline seconds)"""
+        if self._started_at is None:
+            self.start()
+        while not self.poll():
+            time.sleep(interval)
+        return self
+
+    def _finish(self):
+        self.done = True
+        self.elapsed = time.monotonic() - self._started_at
@@ -0,0 +1,333 @@
+"""Local control API: JSON-RPC 2.0 over a loopback TCP socket.
+
+Scripts drive the tool with newline-delimited JSON-RPC 2.0: one request
+(or batch array) per line, one response line back.  A batch runs its
+calls in order and answers with one array holding a result or an error
+per call, so many operations cost one round trip:
+
+    [{"jsonrpc": "2.0", "id": 1, "method": "set_opacity", "params": {"hwnd": 132456, "percent": 60}},
+     {"jsonrpc": "2.0", "id": 2, "method": "set_taskbar", "params": {"hwnd": 132456, "visible": false}}]
+
+Connections are served on worker threads and requests run one at a
+time.  Window changes go through the app's ActionExecutor, in order with
+the UI's own changes, and are waited for; the tool's own book-keeping
+(hidden windows, journal, list rows) runs on the Tk thread through the
+app's UiQueue, so a client or a slow window never blocks the Tk loop.
+
+A line that is not JSON closes the connection, so e.g. a web page
+posting to the port cannot smuggle a call in after its HTTP headers.
+"""
+import inspect
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import CancelledError, TimeoutError
+
+import window_backend as wb
+from enumeration import take_snapshot
+from opacity import set_window_alpha
+from window_actions import OPACITY
+from window_filter import WindowFilter
+
+CONTROL_HOST = "127.0.0.1"
+TK_TIMEOUT = 5.0      # seconds a call waits for the Tk thread's book-keeping
+ACTION_TIMEOUT = 5.0  # seconds a call waits for its window change
+
+# JSON-RPC 2.0 error codes (-32000 and up are ours)
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+WINDOW_ERROR = -32000  # no such window, or the win32 call failed
+BUSY = -32001          # a restore is already running
+
+
+class RpcError(Exception):
+    """Error returned to the client as a JSON-RPC error object"""
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+    def to_dict(self):
+        error = {'code': self.code, 'message': self.message}
+        if self.data is not None:
+            error['data'] = self.data
+        return error
+
+
+def error_response(request_id, error):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': error.to_dict()}
+
+
+class JsonRpcDispatcher:
+    """JSON-RPC 2.0 requests and batches over a method table (name -> callable)"""
+
+    def __init__(self, methods):
+        self.methods = dict(methods)
+        self.calls = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def dispatch(self, message):
+        """Response object for a decoded message (None if nothing is answered)"""
+        with self._lock:  # a batch runs as a unit
+            if isinstance(message, list):
+                if not message:
+                    return error_response(None, RpcError(INVALID_REQUEST, "Empty batch"))
+                self.batches += 1
+                responses = [response for response in map(self._call, message) if response is not None]
+                return responses or None
+            return self._call(message)
+
+    def _call(self, request):
+        if not isinstance(request, dict):
+            return error_response(None, RpcError(INVALID_REQUEST, "Request must be an object"))
+        request_id = request.get('id')
+        notification = 'id' not in request
+        try:
+            if request.get('jsonrpc') != '2.0' or not isinstance(request.get('method'), str):
+                raise RpcError(INVALID_REQUEST, "Not a JSON-RPC 2.0 request")
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Unknown method: {request['method']}")
+            params = request.get('params', {})
+            if isinstance(params, list):
+                args, kwargs = params, {}
+            elif isinstance(params, dict):
+                args, kwargs = [], params
+            else:
+                raise RpcError(INVALID_PARAMS, "params must be an array or an object")
+            try:
+                inspect.signature(method).bind(*args, **kwargs)
+            except TypeError as e:
+                raise RpcError(INVALID_PARAMS, str(e))
+            self.calls += 1
+            result = method(*args, **kwargs)
+        except RpcError as e:
+            return None if notification else error_response(request_id, e)
+        except Exception as e:
+            print(f"Control call {request.get('method')} failed: {e}")
+            return None if notification else error_response(request_id, RpcError(INTERNAL_ERROR, str(e)))
+        return None if notification else {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """One client connection: a JSON message per line"""
+
+    def handle(self):
+        dispatcher = self.server.dispatcher
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self._send(error_response(None, RpcError(PARSE_ERROR, "Parse error")))
+                return
+            response = dispatcher.dispatch(message)
+            if response is not None:
+                self._send(response)
+
+    def _send(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    """Loopback-only server for a JsonRpcDispatcher (port 0 picks a free port)"""
+
+    daemon_threads = True
+    allow_reuse_address = False
+
+    def __init__(self, dispatcher, port=0, host=CONTROL_HOST):
+        self.dispatcher = dispatcher
+        self._thread = None
+        super().__init__((host, port), _ControlHandler)
+
+    def server_bind(self):
+        if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+            # Windows: no other process may bind the same port over us
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        super().server_bind()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.1,), name="control", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+
+class ControlApi:
+    """The tool's control methods; they run on the server's worker threads"""
+
+    def __init__(self, app):
+        self.app = app
+        self.backend = app.backend
+        self._own_hwnd = None
+
+    def methods(self):
+        return {'list_windows': self.list_windows,
+                'set_opacity': self.set_opacity,
+                'set_taskbar': self.set_taskbar,
+                'hide': self.hide,
+                'show': self.show,
+                'restore_all': self.restore_all}
+
+    # --- methods ---
+
+    def list_windows(self, query="", limit=0):
+        """Listable windows ranked by query like the search box (all if empty)"""
+        snapshot = take_snapshot(self.backend, cache=self.app.state_cache)
+        index = WindowFilter()
+        index.load(snapshot.windows)
+        filter_pass = index.begin(str(query))
+        while not filter_pass.step():
+            pass
+        windows = index.commit(filter_pass)
+        if limit:
+            windows = windows[:int(limit)]
+        hidden = self.on_tk(lambda: set(self.app.hidden_windows))
+        return [{'hwnd': info.hwnd, 'title': info.title, 'process': info.process,
+                 'alpha': info.alpha, 'opacity': int(info.alpha / 255 * 100),
+                 'taskbar': not info.style & wb.WS_EX_TOOLWINDOW,
+                 'hidden': info.hwnd in hidden, 'hung': info.hung}
+                for info in windows]
+
+    def set_opacity(self, hwnd, alpha=None, percent=None):
+        """Set alpha (0-255) or percent (0-100) opacity"""
+        if (alpha is None) == (percent is None):
+            raise RpcError(INVALID_PARAMS, "Give exactly one of alpha (0-255) or percent (0-100)")
+        if percent is not None:
+            alpha = round(_number(percent, 'percent') * 255 / 100)
+        alpha = int(_number(alpha, 'alpha'))
+        if not 0 <= alpha <= 255:
+            raise RpcError(INVALID_PARAMS, "Opacity out of range")
+        self._window(hwnd)
+        style = self._wait(self.app.actions.submit(OPACITY, hwnd, alpha, set_window_alpha))
+        self.on_tk(self.app.note_window_change, hwnd, alpha, style)
+        return {'hwnd': hwnd, 'alpha': alpha}
+
+    def set_taskbar(self, hwnd, visible):
+        """Show hwnd in (visible=true) or hide it from the taskbar"""
+        self._window(hwnd, allow_own=False)
+        visible = bool(visible)
+        # set_taskbar_state's own completion does the book-keeping
+        self._wait(self.app.set_taskbar_state(hwnd, visible))
+        return {'hwnd': hwnd, 'taskbar': visible}
+
+    def hide(self, hwnd):
+        """Hide hwnd (SW_HIDE); restore_all and exit bring it back"""
+        self._window(hwnd, allow_own=False)
+        self._wait(self.app.set_visible_state(hwnd, False))
+        return {'hwnd': hwnd, 'visible': False}
+
+    def show(self, hwnd):
+        self._window(hwnd)
+        self._wait(self.app.set_visible_state(hwnd, True))
+        return {'hwnd': hwnd, 'visible': True}
+
+    def restore_all(self):
+        """Show every window the tool has hidden and put it back on the taskbar"""
+        # Started on the Tk thread like the button, so the UI sees it as app.restore_job
+        job = self.on_tk(self._start_restore)
+        if job is None:
+            return {'restored': [], 'failed': {}, 'timed_out': [], 'elapsed': 0.0}
+        limit = time.monotonic() + job.deadline + TK_TIMEOUT
+        while not job.done:
+            if time.monotonic() > limit:
+                raise RpcError(INTERNAL_ERROR, "The UI thread did not finish the restore")
+            time.sleep(0.02)
+        # poll_restore books the result in the Tk callback that finished the job
+        self.on_tk(lambda: None)
+        return {'restored': job.restored,
+                'failed': {str(hwnd): str(error) for hwnd, error in job.failed.items()},
+                'timed_out': job.timed_out + job.skipped,
+                'elapsed': round(job.elapsed, 3)}
+
+    # --- helpers ---
+
+    def _start_restore(self):
+        if self.app.restore_job is not None:
+            raise RpcError(BUSY, "A restore is already running")
+        return self.app.restore_all_windows(report=False)
+
+    def on_tk(self, fn, *args):
+        """Run fn on the Tk thread and wait for its result"""
+        done = threading.Event()
+        result = {}
+
+        def run():
+            try:
+                result['value'] = fn(*args)
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+        self.app.ui_queue.post(run)
+        if not done.wait(TK_TIMEOUT):
+            raise RpcError(INTERNAL_ERROR, "The UI thread did not respond")
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def _window(self, hwnd, allow_own=True):
+        if not isinstance(hwnd, int) or isinstance(hwnd, bool):
+            raise RpcError(INVALID_PARAMS, "hwnd must be an integer")
+        if not allow_own:
+            if self._own_hwnd is None:
+                self._own_hwnd = self.on_tk(self.app.get_own_hwnd)
+            if hwnd == self._own_hwnd:
+                raise RpcError(WINDOW_ERROR, "Not allowed on the tool's own window")
+        if not self._win32(self.backend.IsWindow, hwnd):
+            raise RpcError(WINDOW_ERROR, f"No such window: {hwnd}")
+
+    def _wait(self, future):
+        """Result of a submitted window change (None if its inverse cancelled it)"""
+        try:
+            return future.result(ACTION_TIMEOUT)
+        except CancelledError:
+            return None  # the window is back in the requested state
+        except TimeoutError:
+            raise RpcError(WINDOW_ERROR, "The window did not respond")
+        except Exception as e:
+            raise RpcError(WINDOW_ERROR, str(e))
+
+    def _win32(self, fn, *args):
+        try:
+            return fn(*args)
+        except RpcError:
+            raise
+        except Exception as e:
+            raise RpcError(WINDOW_ERROR, str(e))
+
+
+def _number(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RpcError(INVALID_PARAMS, f"{name} must be a number")
+    return value
+
+
+def create_control_server(api, spec=None):
+    """Start serving api on the port named by spec or CTT_CONTROL; None when unset"""
+    spec = spec or os.environ.get("CTT_CONTROL")
+    if not spec:
+        return None
+    server = ControlServer(JsonRpcDispatcher(api.methods()), int(spec)).start()
+    print(f"Control API listening on {CONTROL_HOST}:{server.port}")
+    return server
@@ -0,0 +1,186 @@
+"""Window enumeration off the Tk thread.
+
+EnumerationWorker runs EnumWindows plus the per-window status probes on a
+background thread and publishes an immutable WindowSnapshot through a
+queue; the UI drains it with root.after.  A newer request supersedes an
+older one: the old pass stops at its next callback and is never published.
+
+GetWindowText on another process's window returns the stored title
+without sending a message, so it never blocks; only windows of this
+process get WM_GETTEXT, and one of them that hangs would block the read.
+Those are read with a per-window timeout, and once a pass has spent
+timeout_budget seconds waiting the rest are read the non-blocking way
+too.  Windows flagged by IsHungAppWindow are read without any message:
+the title from InternalGetWindowText, style and alpha from the cache's
+last known values.
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from window_state import WindowStateCache
+
+# Per-window title timeout and per-pass total (seconds)
+TEXT_TIMEOUT = 0.05
+TIMEOUT_BUDGET = 0.5
+
+# One probed window (immutable); process is the owning exe name, hung marks
+# a window that did not answer (title/style may be stale)
+WindowInfo = namedtuple('WindowInfo', 'hwnd title style alpha process hung', defaults=(False,))
+
+
+class WindowSnapshot(namedtuple('WindowSnapshot', 'generation filter_text windows elapsed error',
+                                 defaults=(None,))):
+    """Result of one enumeration pass; windows is a tuple of WindowInfo.
+
+    error is set (and windows empty) when the pass failed.
+    """
+
+    __slots__ = ()
+
+
+class Cancelled(Exception):
+    """Raised inside an enumeration pass that has been superseded"""
+
+
+def process_name(backend, hwnd):
+    try:
+        return backend.GetWindowProcessName(hwnd)
+    except Exception:
+        return ""
+
+
+def read_title(backend, hwnd, timeout=TEXT_TIMEOUT, blocking_allowed=True):
+    """(title, hung) for hwnd without ever waiting longer than timeout"""
+    if backend.IsHungAppWindow(hwnd):
+        return backend.InternalGetWindowText(hwnd), True
+    if backend.GetWindowThreadProcessId(hwnd)[1] != os.getpid():
+        return backend.GetWindowText(hwnd), False  # no message is sent to another process
+    if not blocking_allowed:
+        return backend.InternalGetWindowText(hwnd), False
+    title = backend.GetWindowTextTimeout(hwnd, timeout)
+    if title is None:
+        # Stopped answering without being flagged as hung (yet)
+        return backend.InternalGetWindowText(hwnd), True
+    return title, False
+
+
+def read_state(cache, hwnd, hung):
+    """(style, alpha) for hwnd; hung windows get the last known values"""
+    if hung:
+        entry = cache.last_known(hwnd)
+        if entry is not None:
+            return entry
+    try:
+        return cache.get(hwnd)
+    except Exception:
+        return 0, 255
+
+
+def take_snapshot(backend, filter_text="", generation=0, is_cancelled=None, cache=None,
+                  text_timeout=TEXT_TIMEOUT, timeout_budget=TIMEOUT_BUDGET):
+    """Enumerate visible titled windows containing filter_text and probe them.
+
+    Styles and alphas go through cache (a WindowStateCache) when given.
+    Raises Cancelled as soon as is_cancelled() turns true.
+    """
+    started = time.perf_counter()
+    windows = []
+    seen = set()  # every top-level window, for pruning the cache
+    waited = 0.0  # seconds spent on title reads that timed out
+    if cache is None:
+        cache = WindowStateCache(backend)
+
+    def enum_handler(hwnd, ctx):
+        nonlocal waited
+        if is_cancelled is not None and is_cancelled():
+            raise Cancelled()
+        seen.add(hwnd)
+        if backend.IsWindowVisible(hwnd):
+            read_started = time.perf_counter()
+            title, hung = read_title(backend, hwnd, text_timeout, waited < timeout_budget)
+            if hung:
+                waited += time.perf_counter() - read_started
+            if title and filter_text in title.lower():
+                style, alpha = read_state(cache, hwnd, hung)
+                windows.append(WindowInfo(hwnd, title, style, alpha, process_name(backend, hwnd), hung))
+        return True
+
+    backend.EnumWindows(enum_handler, None)
+    cache.prune(seen)  # closed windows would otherwise stay in last_known() forever
+    return WindowSnapshot(generation, filter_text, tuple(windows),
+                          time.perf_counter() - started)
+
+
+class EnumerationWorker:
+    """Background thread producing WindowSnapshots on request.
+
+    Every pass starts by invalidating cache, so each window's style and
+    alpha are read once per refresh.
+    """
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache if cache is not None else WindowStateCache(backend)
+        self.results = queue.Queue()
+        self.generation = 0
+        self._published = 0
+        self._requests = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="enumeration", daemon=True)
+        self._thread.start()
+
+    def request(self, filter_text=""):
+        """Ask for a new snapshot; supersedes any pass still running"""
+        self.generation += 1
+        self._requests.put((self.generation, filter_text))
+        return self.generation
+
+    @property
+    def busy(self):
+        """True while the newest request has not been published yet"""
+        return self.generation != self._published
+
+    def take_latest(self):
+        """Newest current snapshot from the result queue, or None (UI thread)"""
+        latest = None
+        while True:
+            try:
+                snapshot = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if snapshot.generation == self.generation:
+                latest = snapshot
+
+    def stop(self):
+        self._running = False
+        self._requests.put(None)
+
+    def _run(self):
+        while self._running:
+            request = self._requests.get()
+            # Skip straight to the newest queued request
+            while request is not None:
+                try:
+                    newer = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                request = newer
+            if request is None:
+                break
+            generation, filter_text = request
+            if generation != self.generation:
+                continue
+            self.cache.invalidate()
+            try:
+                snapshot = take_snapshot(self.backend, filter_text, generation,
+                                         lambda: generation != self.generation, self.cache)
+            except Cancelled:
+                continue
+            except Exception as e:
+                print(f"Enumeration failed: {e}")
+                snapshot = WindowSnapshot(generation, filter_text, (), 0.0, str(e))
+            self.results.put(snapshot)
+            self._published = generation
@@ -0,0 +1,110 @@
+"""Ranked fuzzy (subsequence) window search.
+
+Each window gets a SearchEntry once: its casefolded title, process name
+and a 64-bit character mask.  A query is rejected against an entry with a
+single AND on the masks when the title lacks one of its characters, so
+the scorer only runs for real candidates.  Scores reward consecutive
+characters, matches at word starts and a matching process name; the
+caller adds recency of focus (Z-order position) on top.
+"""
+import os
+
+SCORE_MATCH = 16
+BONUS_CONSECUTIVE = 8
+BONUS_BOUNDARY = 10
+BONUS_SUBSTRING = 24
+BONUS_PROCESS = 40
+MAX_GAP_PENALTY = 6
+RECENCY_WEIGHT = 12  # bonus for the most recently focused window
+
+_BOUNDARY_CHARS = frozenset(" -_./\\:|([{")
+
+
+def char_mask(text):
+    """Bit per character class: a-z -> 0-25, 0-9 -> 26-35, anything else hashed into 36-63"""
+    mask = 0
+    for ch in set(text):
+        if 'a' <= ch <= 'z':
+            mask |= 1 << (ord(ch) - 97)
+        elif '0' <= ch <= '9':
+            mask |= 1 << (ord(ch) - 22)
+        elif not ch.isspace():
+            mask |= 1 << (36 + ord(ch) % 28)
+    return mask
+
+
+class SearchEntry:
+    """Precomputed match data of one window"""
+
+    __slots__ = ('key', 'process', 'mask')
+
+    def __init__(self, title, process=""):
+        self.key = title.casefold()
+        # 'chrome.exe' -> 'chrome' so every query ending in x does not hit '.exe'
+        self.process = os.path.splitext(process)[0].casefold()
+        self.mask = char_mask(self.key) | char_mask(self.process)
+
+
+def fuzzy_score(needle, haystack):
+    """Score of needle as a subsequence of haystack (both casefolded), or None"""
+    if not needle:
+        return 0
+    # Fast path: a contiguous occurrence beats any scattered one
+    index = haystack.find(needle)
+    if index >= 0:
+        score = len(needle) * (SCORE_MATCH + BONUS_CONSECUTIVE) - BONUS_CONSECUTIVE + BONUS_SUBSTRING
+        if index == 0 or haystack[index - 1] in _BOUNDARY_CHARS:
+            score += BONUS_BOUNDARY
+        return score
+    # Forward pass: end of the first complete occurrence
+    find = haystack.find
+    index = -1
+    for ch in needle:
+        index = find(ch, index + 1)
+        if index < 0:
+            return None
+    # Backward pass: tightest start for that end
+    start = index
+    rfind = haystack.rfind
+    for ch in reversed(needle[:-1]):
+        start = rfind(ch, 0, start)
+
+    score = 0
+    previous = -2
+    index = start - 1
+    for ch in needle:
+        index = find(ch, index + 1)
+        score += SCORE_MATCH
+        if index == previous + 1:
+            score += BONUS_CONSECUTIVE
+        elif previous >= 0:
+            score -= min(index - previous - 1, MAX_GAP_PENALTY)
+        if index == 0 or haystack[index - 1] in _BOUNDARY_CHARS:
+            score += BONUS_BOUNDARY
+        previous = index
+    return score
+
+
+class FuzzyQuery:
+    """A casefolded query with its mask, scored against SearchEntries"""
+
+    __slots__ = ('text', 'mask')
+
+    def __init__(self, query):
+        self.text = query.casefold().strip()
+        self.mask = char_mask(self.text)
+
+    def score(self, entry):
+        """Match score for entry, or None when it does not match"""
+        if self.mask & ~entry.mask:
+            return None
+        return score_entry(self.text, entry)
+
+
+def score_entry(text, entry):
+    """Title score plus process-name bonus, or None (mask already checked)"""
+    score = fuzzy_score(text, entry.key)
+    if entry.process and text in entry.process:
+        score = (score or 0) + BONUS_PROCESS
+    return score
+
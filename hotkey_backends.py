@@ -0,0 +1,365 @@
+"""Hotkey delivery backends for HotkeySupervisor.
+
+The `keyboard` library installs a global low-level hook, so Python runs
+on every keystroke typed anywhere just to find the eight combos the tool
+uses.  RegisterHotKeyBackend lets Windows do the matching instead: its
+thread sleeps in GetMessage and only wakes for a registered chord.  It
+is opt-in (CTT_HOTKEYS=native): a registered chord is taken away from
+every other program, so with the default bindings Shift+0 would stop
+typing ")" and Ctrl+1..3 would stop switching browser tabs.  The hook
+only listens and never swallows the keys.
+FakeHotkeyBackend delivers synthetic key streams in either style for the
+simulated desktop and benchmarks/bench_hotkeys.py.
+
+Every backend has the keyboard-module surface HotkeySupervisor uses
+(add_hotkey, remove_hotkey, hook, unhook, send) plus close().
+needs_watchdog says whether the delivery can silently die and has to be
+probed (low-level hooks can, registered hotkeys cannot).  Before running
+a hotkey callback a backend sets last_received to the perf_counter() time
+the key message reached the process (see latency).
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+MOD_ALT = 0x0001
+MOD_CONTROL = 0x0002
+MOD_SHIFT = 0x0004
+MOD_WIN = 0x0008
+MOD_NOREPEAT = 0x4000
+
+WM_QUIT = 0x0012
+WM_HOTKEY = 0x0312
+WM_APP = 0x8000
+PM_NOREMOVE = 0x0000
+
+MODIFIERS = {'alt': MOD_ALT, 'ctrl': MOD_CONTROL, 'control': MOD_CONTROL,
+             'shift': MOD_SHIFT, 'win': MOD_WIN, 'windows': MOD_WIN}
+
+_NAMED_KEYS = {'space': 0x20, 'tab': 0x09, 'enter': 0x0D, 'esc': 0x1B, 'escape': 0x1B,
+               'home': 0x24, 'end': 0x23, 'insert': 0x2D, 'delete': 0x2E,
+               'page up': 0x21, 'page down': 0x22, 'pause': 0x13}
+
+KeyEvent = namedtuple('KeyEvent', 'name down')
+
+
+def virtual_key(name):
+    """Virtual-key code of a key name as written in combos ('1', 'a', 'f5', 'space')"""
+    if len(name) == 1 and ('0' <= name <= '9' or 'a' <= name <= 'z'):
+        return ord(name.upper())
+    if name[0] == 'f' and name[1:].isdigit() and 1 <= int(name[1:]) <= 24:
+        return 0x6F + int(name[1:])
+    if name in _NAMED_KEYS:
+        return _NAMED_KEYS[name]
+    raise ValueError(f"Unsupported hotkey key: {name!r}")
+
+
+def parse_combo(combo):
+    """'ctrl+1' -> (MOD_CONTROL, '1'); raises ValueError for unsupported combos"""
+    modifiers = 0
+    key = None
+    for part in combo.lower().split('+'):
+        part = part.strip()
+        if part in MODIFIERS:
+            modifiers |= MODIFIERS[part]
+        elif key is None and part:
+            key = part
+        else:
+            raise ValueError(f"Hotkey needs exactly one non-modifier key: {combo!r}")
+    if key is None:
+        raise ValueError(f"Hotkey needs exactly one non-modifier key: {combo!r}")
+    virtual_key(key)  # validate
+    return modifiers, key
+
+
+class HotkeyBackend:
+    """Interface of a hotkey delivery mechanism"""
+
+    name = "base"
+    needs_watchdog = False
+    last_received = None  # perf_counter() of the key message behind the running callback
+
+    def add_hotkey(self, combo, callback):
+        """Register combo; returns a handle for remove_hotkey (raises on failure)"""
+        raise NotImplementedError
+
+    def remove_hotkey(self, handle):
+        raise NotImplementedError
+
+    def hook(self, callback):
+        """Call callback(event) for every key event (only hook-style backends)"""
+        raise NotImplementedError
+
+    def unhook(self, handle):
+        raise NotImplementedError
+
+    def send(self, key):
+        """Inject a key press (used for the supervisor's heartbeat)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class KeyboardHookBackend(HotkeyBackend):
+    """The `keyboard` library's global low-level hook (Python runs per keystroke)"""
+
+    name = "keyboard"
+    needs_watchdog = True
+
+    def __init__(self):
+        import keyboard
+        self._keyboard = keyboard
+
+    def add_hotkey(self, combo, callback):
+        def run():
+            self.last_received = self._received()
+            callback()
+        return self._keyboard.add_hotkey(combo, run)
+
+    def _received(self):
+        """When the hook saw the chord's last key press (event.time is wall-clock)"""
+        now = time.perf_counter()
+        try:
+            pressed = list(self._keyboard._pressed_events.values())
+            newest = max(event.time for event in pressed)
+        except Exception:
+            return now
+        return now - max(0.0, time.time() - newest)
+
+    def remove_hotkey(self, handle):
+        self._keyboard.remove_hotkey(handle)
+
+    def hook(self, callback):
+        return self._keyboard.hook(callback)
+
+    def unhook(self, handle):
+        self._keyboard.unhook(handle)
+
+    def send(self, key):
+        self._keyboard.send(key)
+
+    def close(self):
+        self._keyboard.unhook_all()
+
+
+class RegisterHotKeyBackend(HotkeyBackend):
+    """Win32 RegisterHotKey on a dedicated message thread.
+
+    Hotkeys registered with hWnd=NULL belong to the registering thread, so
+    registration requests are run on the message thread (woken with a
+    WM_APP thread message).  The thread only wakes for WM_HOTKEY and those
+    requests; callbacks run on it.
+    """
+
+    name = "native"
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._msg = wintypes.MSG
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._callbacks = {}  # hotkey id -> callback
+        self._next_id = 1
+        self._requests = queue.Queue()
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def add_hotkey(self, combo, callback):
+        modifiers, key = parse_combo(combo)
+        hotkey_id = self._next_id
+        self._next_id += 1
+        self._callbacks[hotkey_id] = callback
+
+        def register():
+            if not self._user32.RegisterHotKey(None, hotkey_id, modifiers | MOD_NOREPEAT, virtual_key(key)):
+                raise OSError(f"RegisterHotKey failed for {combo!r} (in use by another program?)")
+        try:
+            self._on_thread(register)
+        except Exception:
+            del self._callbacks[hotkey_id]
+            raise
+        return hotkey_id
+
+    def remove_hotkey(self, handle):
+        if self._callbacks.pop(handle, None) is not None:
+            self._on_thread(lambda: self._user32.UnregisterHotKey(None, handle))
+
+    def close(self):
+        if self._thread is None:
+            return
+        for handle in list(self._callbacks):
+            self.remove_hotkey(handle)
+        self._user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread = None
+        self._ready.clear()
+
+    def _on_thread(self, fn):
+        """Run fn on the message thread and return its result"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            self._ready.wait()
+        if threading.get_ident() == self._thread.ident:
+            return fn()
+        done = threading.Event()
+        result = {}
+
+        def task():
+            try:
+                result['value'] = fn()
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+        self._requests.put(task)
+        self._user32.PostThreadMessageW(self._thread_id, WM_APP, 0, 0)
+        done.wait()
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def _run(self):
+        msg = self._msg()
+        pointer = self._ctypes.byref(msg)
+        # Create the thread's message queue before anyone posts to it
+        self._user32.PeekMessageW(pointer, None, 0, 0, PM_NOREMOVE)
+        self._thread_id = self._kernel32.GetCurrentThreadId()
+        self._ready.set()
+        while self._user32.GetMessageW(pointer, None, 0, 0) > 0:
+            if msg.message == WM_HOTKEY:
+                callback = self._callbacks.get(msg.wParam)
+                if callback is not None:
+                    # msg.time is the tick count at posting; counts time spent queued
+                    queued = (self._kernel32.GetTickCount() - msg.time) & 0xFFFFFFFF
+                    self.last_received = time.perf_counter() - queued / 1000.0
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Hotkey callback failed: {e}")
+            elif msg.message == WM_APP:
+                while True:
+                    try:
+                        task = self._requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    task()
+
+
+class FakeHotkeyBackend(HotkeyBackend):
+    """In-process hotkeys driven by synthetic key streams.
+
+    delivery='registered' behaves like RegisterHotKey: the "OS" side
+    (translate) matches chords and only matching ones reach Python.
+    delivery='hook' behaves like a low-level hook: every event is handed
+    to Python, which tracks modifiers and matches chords itself.  Events
+    are (key name, down) pairs; deliveries counts Python wake-ups and
+    alive=False drops everything, like a hook Windows has removed.
+    """
+
+    name = "fake"
+
+    def __init__(self, delivery='registered'):
+        if delivery not in ('registered', 'hook'):
+            raise ValueError(f"Unknown delivery: {delivery!r}")
+        self.delivery = delivery
+        self.needs_watchdog = delivery == 'hook'
+        self.alive = True
+        self.deliveries = 0
+        self._chords = {}     # (modifiers, key) -> callback
+        self._hooks = []
+        self._modifiers = 0   # modifier state seen by Python (hook delivery)
+        self._os_modifiers = 0  # modifier state seen by the "OS" (registered delivery)
+
+    def add_hotkey(self, combo, callback):
+        chord = parse_combo(combo)
+        self._chords[chord] = callback
+        return chord
+
+    def remove_hotkey(self, handle):
+        self._chords.pop(handle, None)
+
+    def hook(self, callback):
+        if self.delivery != 'hook':
+            raise NotImplementedError("Registered delivery has no key hook")
+        self._hooks.append(callback)
+        return callback
+
+    def unhook(self, handle):
+        self._hooks.remove(handle)
+
+    def send(self, key):
+        self.feed([(key, True), (key, False)])
+
+    def press(self, combo):
+        """Type combo: modifiers down, key down/up, modifiers up"""
+        parts = [part.strip() for part in combo.lower().split('+')]
+        events = [(part, True) for part in parts] + [(part, False) for part in reversed(parts)]
+        self.feed(events)
+
+    def feed(self, events):
+        for message in self.translate(events):
+            self.deliver(message)
+
+    def translate(self, events):
+        """What the OS would hand to Python for these events"""
+        if not self.alive:
+            return []
+        if self.delivery == 'hook':
+            return list(events)
+        chords = self._chords
+        matched = []
+        for name, down in events:
+            bit = MODIFIERS.get(name)
+            if bit:
+                self._os_modifiers = self._os_modifiers | bit if down else self._os_modifiers & ~bit
+            elif down and (self._os_modifiers, name) in chords:
+                matched.append((self._os_modifiers, name))
+        return matched
+
+    def deliver(self, message):
+        """Python-side handling of one translated message"""
+        self.deliveries += 1
+        self.last_received = time.perf_counter()
+        if self.delivery == 'registered':
+            callback = self._chords.get(message)
+            if callback is not None:
+                callback()
+            return
+        name, down = message
+        if self._hooks:
+            event = KeyEvent(name, down)
+            for hook in self._hooks:
+                hook(event)
+        bit = MODIFIERS.get(name)
+        if bit:
+            self._modifiers = self._modifiers | bit if down else self._modifiers & ~bit
+        elif down:
+            callback = self._chords.get((self._modifiers, name))
+            if callback is not None:
+                callback()
+
+
+def create_hotkey_backend(spec=None, backend=None):
+    """Build the hotkey backend named by spec or the CTT_HOTKEYS environment variable.
+
+    "keyboard" (low-level hook), "native" (RegisterHotKey, takes the chords
+    away from other programs) or "fake[:hook]".  The default is "fake" on a
+    simulated desktop, otherwise "keyboard".
+    """
+    spec = spec or os.environ.get("CTT_HOTKEYS")
+    if not spec:
+        spec = "fake" if backend is not None and backend.name == "simulated" else "keyboard"
+    name, _, arg = spec.partition(":")
+    if name == "native":
+        return RegisterHotKeyBackend()
+    if name == "keyboard":
+        return KeyboardHookBackend()
+    if name == "fake":
+        return FakeHotkeyBackend(arg or 'registered')
+    raise ValueError(f"Unknown hotkey backend: {spec!r}")
@@ -0,0 +1,217 @@
+"""Global hotkeys that are re-registered only when they actually fail.
+
+Windows silently drops a low-level keyboard hook whose callback was too
+slow once (LowLevelHooksTimeout), so hotkeys can die without an error.
+HotkeySupervisor watches the hook instead of re-registering on a timer:
+every key event the hook sees updates last_event, and only when the
+desktop has had input (GetLastInputInfo) that the hook did not see, and
+the mouse pointer did not move meanwhile (so it was probably typing), is
+a heartbeat key sent through it, at most once per heartbeat_gap.  A
+missed heartbeat is a failure: the hotkeys are re-registered and the
+time they were down is counted.
+Nothing polls while no hotkeys are registered, or at all with a backend
+that cannot silently die (see hotkey_backends).
+"""
+import threading
+import time
+
+HEARTBEAT_KEY = 'f24'  # exists on no physical keyboard; applications ignore it
+
+
+def input_idle_seconds(backend):
+    """Seconds since the last keyboard or mouse input on the desktop"""
+    ticks = (backend.GetTickCount() - backend.GetLastInputInfo()) & 0xFFFFFFFF
+    return ticks / 1000.0
+
+
+class HotkeySupervisor:
+    """Registers (combo, callback) bindings and keeps them alive.
+
+    backend is a HotkeyBackend (hotkey_backends); only backends with
+    needs_watchdog are monitored.  idle_seconds() returns the
+    desktop's input idle time; without it the hook is probed every
+    heartbeat_gap seconds.  pointer() returns the cursor position; input
+    that came with a pointer move is taken for the mouse and not probed.
+    grace only covers the tick resolution of GetLastInputInfo.
+    on_recover(supervisor) is called from the monitor thread after each
+    re-registration and when an outage ends.
+    """
+
+    def __init__(self, backend, idle_seconds=None, pointer=None, interval=1.0, grace=0.05,
+                 heartbeat_timeout=0.5, heartbeat_gap=5.0):
+        self.backend = backend
+        self.idle_seconds = idle_seconds
+        self.pointer = pointer
+        self.interval = interval
+        self.grace = grace
+        self.heartbeat_timeout = heartbeat_timeout
+        self.heartbeat_gap = heartbeat_gap
+        self.on_recover = None
+        self.bindings = []      # (combo, callback)
+        self.registered = False
+        self.conflicts = {}     # combo -> error of a chord that could not be registered
+        self.last_event = 0.0   # time.monotonic() of the newest key event seen by the hook
+        self.heartbeats = 0     # heartbeats sent
+        self.failures = 0       # heartbeats missed
+        self.reregistrations = 0
+        self.downtime = 0.0     # seconds between the last sign of life and recovery
+        self._handles = {}      # combo -> backend handle
+        self._hook = None
+        self._last_heartbeat = 0.0
+        self._seen_input = 0.0  # newest input (monotonic) already accounted for
+        self._last_pointer = None
+        self._down_since = None  # last_event when a failure was detected
+        self._heartbeat = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, combo, callback):
+        """Bind combo; raises if it cannot be registered (e.g. another program owns it)"""
+        self.bindings.append((combo, callback))
+        if self.registered:
+            with self._lock:
+                self._add_locked(combo, callback)
+            if combo in self.conflicts:
+                raise OSError(self.conflicts[combo])
+
+    def remove(self, combo):
+        """Drop the binding for combo (and its registration)"""
+        self.bindings = [binding for binding in self.bindings if binding[0] != combo]
+        with self._lock:
+            handle = self._handles.pop(combo, None)
+            if handle is not None:
+                self.backend.remove_hotkey(handle)
+
+    def register(self):
+        """Register every binding and start monitoring.
+
+        Each chord is registered on its own; returns the combos that could
+        not be (see conflicts), the others work.  Raises if the backend
+        itself fails (e.g. the hook cannot be installed).
+        """
+        if not self.bindings:
+            return []
+        with self._lock:
+            self._register_locked()
+            self.registered = True
+        self.last_event = self._seen_input = time.monotonic()
+        if self.backend.needs_watchdog and (self._thread is None or not self._thread.is_alive()):
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return list(self.conflicts)
+
+    def unregister(self):
+        """Remove the hotkeys and stop monitoring"""
+        with self._lock:
+            self.registered = False
+            self._unregister_locked()
+        self._wake.set()
+
+    def _register_locked(self):
+        self._unregister_locked()
+        if self.backend.needs_watchdog:
+            self._hook = self.backend.hook(self._on_key)
+        self.conflicts = {}
+        for combo, callback in self.bindings:
+            self._add_locked(combo, callback)
+
+    def _add_locked(self, combo, callback):
+        try:
+            self._handles[combo] = self.backend.add_hotkey(combo, callback)
+        except Exception as e:
+            self.conflicts[combo] = str(e)
+        else:
+            self.conflicts.pop(combo, None)
+
+    def _unregister_locked(self):
+        handles, self._handles = self._handles, {}
+        for handle in handles.values():
+            try:
+                self.backend.remove_hotkey(handle)
+            except Exception:
+                pass
+        if self._hook is not None:
+            try:
+                self.backend.unhook(self._hook)
+            except Exception:
+                pass
+            self._hook = None
+
+    def _on_key(self, event):
+        self.last_event = time.monotonic()
+        if event.name == HEARTBEAT_KEY:
+            self._heartbeat.set()
+
+    # --- monitoring ---
+
+    def _run(self):
+        while not self._wake.wait(self.interval):
+            if not self.registered:
+                break
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Hotkey check failed: {e}")
+
+    def check(self):
+        """Probe the hook once; re-register if it is dead.  Returns True if healthy."""
+        now = time.monotonic()
+        alive = None
+        if self.idle_seconds is not None:
+            last_input = now - self.idle_seconds()
+            pointer = self.pointer() if self.pointer is not None else None
+            moved, self._last_pointer = pointer != self._last_pointer, pointer
+            if last_input <= self.last_event + self.grace:
+                alive = True  # the hook saw the latest input
+            elif last_input <= self._seen_input + self.grace or moved:
+                # Nothing new, or mouse input the keyboard hook never sees
+                self._seen_input = max(self._seen_input, last_input)
+                return self._down_since is None
+        if alive is None:
+            if now - self._last_heartbeat < self.heartbeat_gap:
+                return self._down_since is None
+            alive = self._send_heartbeat()
+            self._seen_input = time.monotonic()
+        if alive:
+            self._mark_up()
+            return True
+
+        self.failures += 1
+        if self._down_since is None:
+            self._down_since = self.last_event
+        with self._lock:
+            if not self.registered:
+                return False
+            self._register_locked()
+        self.reregistrations += 1
+        alive = self._send_heartbeat()
+        print(f"Hotkeys re-registered ({self.reregistrations} times, "
+              f"{'recovered' if alive else 'still not responding'})")
+        if alive:
+            self._mark_up()
+        elif self.on_recover is not None:
+            self.on_recover(self)
+        return alive
+
+    def _mark_up(self):
+        if self._down_since is not None:
+            self.downtime += time.monotonic() - self._down_since
+            self._down_since = None
+            if self.on_recover is not None:
+                self.on_recover(self)
+
+    def _send_heartbeat(self):
+        self._last_heartbeat = time.monotonic()
+        self._heartbeat.clear()
+        self.heartbeats += 1
+        self.backend.send(HEARTBEAT_KEY)
+        return self._heartbeat.wait(self.heartbeat_timeout)
+
+    def stats(self):
+        return {'registered': self.registered, 'down': self._down_since is not None,
+                'conflicts': sorted(self.conflicts),
+                'heartbeats': self.heartbeats,
+                'failures': self.failures, 'reregistrations': self.reregistrations,
+                'downtime': round(self.downtime, 3)}
@@ -0,0 +1,151 @@
+"""End-to-end latency of hotkey actions.
+
+A hotkey action is timed from the moment its key message reached the
+process (received, stamped by the hotkey backend), through the handler
+starting (dispatch), to the win32 calls it makes (call start/end).  The
+stages are kept per action in log-bucketed histograms, so recording is
+O(1) and p50/p95/p99/max are available at any time:
+
+    dispatch  received -> handler start (hook/message thread delay)
+    call      first win32 call start -> last win32 call end
+    total     received -> last win32 call end
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ('dispatch', 'call', 'total')
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram (about 3% resolution, 1 µs and up)"""
+
+    BUCKETS_PER_OCTAVE = 24
+
+    def __init__(self):
+        self.buckets = {}  # bucket index -> count
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        seconds = max(seconds, 0.0)
+        index = int(math.log2(max(seconds * 1e6, 1.0)) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound (seconds) of the bucket holding the given fraction"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                upper = 2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        """count plus mean/p50/p95/p99/max in milliseconds"""
+        return {'count': self.count,
+                'mean': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                'p50': round(self.percentile(0.50) * 1000, 3),
+                'p95': round(self.percentile(0.95) * 1000, 3),
+                'p99': round(self.percentile(0.99) * 1000, 3),
+                'max': round(self.max * 1000, 3)}
+
+
+class _Trace:
+    __slots__ = ('action', 'received', 'dispatched', 'call_start', 'call_end')
+
+    def __init__(self, action, received, dispatched):
+        self.action = action
+        self.received = received
+        self.dispatched = dispatched
+        self.call_start = None
+        self.call_end = None
+
+
+class LatencyRecorder:
+    """Per-action stage histograms fed by start()/call()/finish().
+
+    A trace belongs to the thread that started it, so handlers running on
+    the hotkey thread and the Tk thread do not mix.  Times are
+    time.perf_counter() values.
+    """
+
+    def __init__(self):
+        self.histograms = {}  # (action, stage) -> LatencyHistogram
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self, action, received=None):
+        """Begin timing action on this thread (received defaults to now)"""
+        now = time.perf_counter()
+        self._local.trace = _Trace(action, received if received is not None else now, now)
+
+    @contextmanager
+    def call(self):
+        """Time a win32 call made by the current action"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace = getattr(self._local, 'trace', None)
+            if trace is not None:
+                if trace.call_start is None:
+                    trace.call_start = started
+                trace.call_end = time.perf_counter()
+
+    def finish(self):
+        """Record the current action's stages"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return
+        self._local.trace = None
+        self.record(trace.action, 'dispatch', trace.dispatched - trace.received)
+        if trace.call_start is not None:
+            self.record(trace.action, 'call', trace.call_end - trace.call_start)
+            self.record(trace.action, 'total', trace.call_end - trace.received)
+
+    def record(self, action, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get((action, stage))
+            if histogram is None:
+                histogram = self.histograms[(action, stage)] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def summary(self):
+        """{action: {stage: histogram summary}}"""
+        with self._lock:
+            items = sorted(self.histograms.items())
+            result = {}
+            for (action, stage), histogram in items:
+                result.setdefault(action, {})[stage] = histogram.summary()
+        return result
+
+    def format(self):
+        """Plain-text table of every action and stage (ms)"""
+        lines = [f"{'action':<12}{'stage':<10}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for action, stages in self.summary().items():
+            for stage in STAGES:
+                row = stages.get(stage)
+                if row is not None:
+                    lines.append(f"{action:<12}{stage:<10}{row['count']:>6}{row['p50']:>9.2f}"
+                                 f"{row['p95']:>9.2f}{row['p99']:>9.2f}{row['max']:>9.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path, **extra):
+        """Write the summary (plus any extra sections) as JSON to path"""
+        data = {'unit': 'ms', 'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'actions': self.summary()}
+        data.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
@@ -1,24 +1,80 @@
+import os
+import sys
+import single_instance
+
+if __name__ == "__main__":
+    # A second launch only hands its arguments to the running tool; this runs
+    # before tkinter, pystray and PIL are imported so it costs milliseconds
+    if single_instance.send(sys.argv[1:]):
+        sys.exit(0)
+    INSTANCE_LOCK = single_instance.acquire()
+    if INSTANCE_LOCK is None:
+        # The running tool holds the lock but is still starting up
+        if single_instance.send(sys.argv[1:], timeout=single_instance.CONNECT_TIMEOUT):
+            sys.exit(0)
+        print("Custom Test Tool is already running but did not answer.")
+        sys.exit(1)
+
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
-import win32gui
-import win32con
-import win32api
-import win32event
-import pystray
-from PIL import Image, ImageDraw
 import threading
 import time
-import keyboard
+import window_backend as wb
+from hotkey_backends import FakeHotkeyBackend, create_hotkey_backend
+from hotkey_supervisor import HotkeySupervisor, input_idle_seconds
+from latency import LatencyRecorder
+from bulk_restore import RestoreJob, set_taskbar_visible
+from window_groups import GROUP_SLOTS, WindowGroups, slot_hotkeys
+from window_registry import WindowRecord, WindowRegistry
+from enumeration import EnumerationWorker
+from window_events import WindowEventTracker, WindowPatch, create_event_source
+from opacity import OpacityApplier
+from window_state import WindowStateCache
+from window_filter import WindowFilter
+from virtual_list import VirtualWindowList
+from window_rules import WindowRule, WindowRules
+from window_journal import WindowJournal
+from control_server import ControlApi, create_control_server
+from ui_queue import UiQueue
+from window_actions import ACTIVATE, TASKBAR, VISIBLE, ActionExecutor, activate_window, set_window_visible
+from win32_trace import start_tracing
+from session_record import start_recording
+
+# Bulk restore budgets (seconds), see bulk_restore
+RESTORE_DEADLINE = 5.0
+EXIT_RESTORE_BUDGET = 2.0
+
+
+def build_arg_parser():
+    """Command line of main.py; a later launch forwards it to the running tool"""
+    parser = argparse.ArgumentParser(prog="CustomTestTool", description="Custom Test Tool")
+    parser.add_argument("--show", action="store_true", help="도구 창을 트레이에서 꺼내 앞으로 가져오기")
+    parser.add_argument("--hide-target", action="store_true", help="단축키 대상 창 숨기기")
+    parser.add_argument("--show-target", action="store_true", help="단축키 대상 창 보이기")
+    parser.add_argument("--profile", metavar="RULES.json", help="규칙 파일의 설정을 열린 창에 한 번 적용")
+    return parser
+
 
 class CustomTestTool:
-    def __init__(self, root):
+    def __init__(self, root, backend=None, list_mode=None):
         self.root = root
+        
+        # Other threads (hotkeys, tray, command server, control API) hand UI work to this
+        self.ui_queue = UiQueue(root).start()
+        
+        # Window-system backend (real win32 desktop or simulated desktop)
+        self.backend = backend or wb.create_backend()
+        
+        # Opt-in win32 call tracing (CTT_TRACE=<file>); nothing is wrapped otherwise
+        self.tracer = start_tracing(self.backend)
+        
+        # Exstyle/alpha read once per refresh; invalidated when we change a window
+        self.state_cache = WindowStateCache(self.backend)
+        
         self.root.title("Custom Test Tool")
         self.root.geometry("400x600")
         
-        # No mutex needed
-        self.mutex = None
-        
         # Handle window closing to properly exit tray
         self.root.protocol('WM_DELETE_WINDOW', self.on_closing)
         
@@ -26,18 +82,62 @@ class CustomTestTool:
         self.root.bind('<Unmap>', self.on_minimize)
         self.minimizing_to_tray = False  # 트레이로 최소화 중인지 구분하기 위한 플래그
 
-        self.window_list = []
+        # Listed windows: hwnd -> record, plus display order
+        self.registry = WindowRegistry()
         self.selected_hwnd = None
+        
+        # Enumeration runs on a worker thread; snapshots are polled via after()
+        self.enumerator = EnumerationWorker(self.backend, self.state_cache)
+        self.snapshot_poll = None
+        
+        # Every listable window of the last snapshot; the filter runs over it
+        self.window_filter = WindowFilter()
+        self.list_filter = ""  # query the listed windows were filtered with
+        self.filter_pass = None
+        self.filter_job = None
+        
+        # Live tracking: window events patch the list between refreshes
+        self.window_events = WindowEventTracker(self.backend, create_event_source(self.backend),
+                                                cache=self.state_cache)
+        self.events_poll = None  # after id of poll_window_events
+        self.patches_since_refresh = []
         self.tray_icon = None
         
         # Hotkey Target Window
         self.hotkey_target_hwnd = None
         
-        # Store opacity settings for each window (hwnd -> opacity value 0-255)
-        self.window_opacity_settings = {}
+        # Hotkey groups "1".."9" (several windows hidden/shown at once)
+        self.window_groups = WindowGroups(self.backend)
+        
+        # Saved per-app settings (process/class/title rules), applied to new windows
+        self.window_rules = WindowRules().load()
+        self.rule_checked = {}  # hwnd -> title last checked against the rules (None once applied)
+        
+        # Opt-in session recording (CTT_RECORD=<file>) for benchmarks/replay_session.py;
+        # handlers bound below go through recorded() so user actions are captured
+        self.recorder = start_recording(self)
+        
+        # Window changes run on one worker thread so a busy application cannot freeze the UI
+        self.actions = ActionExecutor(self.backend, notify=self.ui_queue.post).start()
+        
+        # Slider ticks are coalesced; at most max_rate writes per second
+        self.opacity = OpacityApplier(self.backend, self.root.after, max_rate=30, cache=self.state_cache,
+                                      executor=self.actions)
         
         # Track hidden windows manually
         self.hidden_windows = set()
+        self.restore_job = None  # running "작업표시줄 숨김 일괄 해제"
+        self.restore_report = True  # poll_restore shows the result dialog
+        
+        # Every hide/show/style change is journaled so a crash cannot strand hidden windows
+        self.journal = WindowJournal()
+        try:
+            orphans = self.journal.open()
+        except OSError as e:
+            print(f"Journal unavailable ({e}); hidden windows are not recorded")
+            orphans = {}
+        if orphans:
+            self.root.after(500, lambda: self.offer_orphan_restore(orphans))
 
         # Frame for controls
         control_frame = ttk.Frame(root, padding="10")
@@ -51,7 +151,14 @@ class CustomTestTool:
         self.filter_var = tk.StringVar(value="Chrome")
         self.filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
         self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-        self.filter_entry.bind('<Return>', lambda e: self.refresh_list())
+        refresh = self.recorded('refresh', self.refresh_list)
+        self.filter_entry.bind('<Return>', lambda e: refresh())
+        self.filter_var.trace_add('write', self.recorded('filter', self.on_filter_changed,
+                                                         lambda *args: [self.filter_var.get()]))
+        
+        self.live_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(filter_frame, text="실시간", variable=self.live_var,
+                        command=self.recorded('live', self.toggle_live_tracking, lambda: [self.live_var.get()])).pack(side=tk.LEFT)
 
         # Buttons Frame (Refresh and Restore)
         buttons_frame = ttk.Frame(control_frame)
@@ -61,26 +168,57 @@ class CustomTestTool:
         center_frame = ttk.Frame(buttons_frame)
         center_frame.pack(anchor=tk.CENTER)
         
-        ttk.Button(center_frame, text="새로고침", command=self.refresh_list).pack(side=tk.LEFT, padx=5)
-        ttk.Button(center_frame, text="단축키 대상 지정", command=self.set_hotkey_target_from_selection).pack(side=tk.LEFT, padx=5)
-        ttk.Button(center_frame, text="작업표시줄 숨김 일괄 해제", command=self.restore_all_windows).pack(side=tk.LEFT, padx=5)
+        ttk.Button(center_frame, text="새로고침", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(center_frame, text="단축키 대상 지정",
+                   command=self.recorded('target', self.set_hotkey_target_from_selection)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(center_frame, text="작업표시줄 숨김 일괄 해제",
+                   command=self.recorded('restore', self.restore_all_windows)).pack(side=tk.LEFT, padx=5)
 
         # Hotkey Target Info
         self.target_label_var = tk.StringVar(value="단축키 대상: 없음 (목록 선택 후 버튼 클릭)")
         ttk.Label(control_frame, textvariable=self.target_label_var, foreground="blue", font=("Malgun Gothic", 9)).pack(pady=2)
+        
+        # Hotkey Groups: Ctrl+Alt+N hides group N, Ctrl+Alt+Shift+N shows it
+        group_frame = ttk.Frame(control_frame)
+        group_frame.pack(anchor=tk.CENTER, pady=2)
+        ttk.Label(group_frame, text="그룹:").pack(side=tk.LEFT)
+        self.group_var = tk.StringVar(value="1")
+        ttk.Spinbox(group_frame, from_=1, to=GROUP_SLOTS, width=3, state='readonly',
+                    textvariable=self.group_var, command=self.update_group_label).pack(side=tk.LEFT, padx=5)
+        group_params = lambda: [self.group_var.get()]
+        ttk.Button(group_frame, text="선택 창 추가",
+                   command=self.recorded('group_add', self.add_selection_to_group, group_params)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(group_frame, text="그룹 비우기",
+                   command=self.recorded('group_clear', self.clear_group, group_params)).pack(side=tk.LEFT, padx=2)
+        self.group_label_var = tk.StringVar(value="")
+        ttk.Label(control_frame, textvariable=self.group_label_var, foreground="blue", font=("Malgun Gothic", 9)).pack(pady=2)
+        self.update_group_label()
+        
+        # Refresh status ("새로고침 중…" while the worker enumerates)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(control_frame, textvariable=self.status_var, foreground="gray", font=("Malgun Gothic", 8)).pack()
 
         # Treeview for windows with status
         tree_frame = ttk.Frame(control_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Configure Treeview with columns
-        self.tree = ttk.Treeview(tree_frame, columns=('transparency', 'taskbar'), show='tree headings', height=10, yscrollcommand=scrollbar.set)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.tree.yview)
+        # "virtual" only renders the visible rows (for thousands of windows)
+        list_mode = list_mode or os.environ.get("CTT_LIST_MODE", "tree")
+        self.virtual_list = None
+        if list_mode == "virtual":
+            self.virtual_list = VirtualWindowList(tree_frame, self.registry, self.recorded('select', self.select_window))
+            self.tree = self.virtual_list.tree
+        else:
+            # Scrollbar
+            scrollbar = ttk.Scrollbar(tree_frame)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            
+            # Configure Treeview with columns
+            self.tree = ttk.Treeview(tree_frame, columns=('transparency', 'taskbar'), show='tree headings', height=10, yscrollcommand=scrollbar.set)
+            self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar.config(command=self.tree.yview)
+            self.tree.bind('<<TreeviewSelect>>', self.recorded('select', self.on_select,
+                                                               lambda event: [self.tree_selection()]))
         
         # Column headers
         self.tree.heading('#0', text='창 이름')
@@ -91,8 +229,6 @@ class CustomTestTool:
         self.tree.column('#0', width=200, minwidth=150)
         self.tree.column('transparency', width=80, minwidth=60, anchor='center')
         self.tree.column('taskbar', width=80, minwidth=60, anchor='center')
-        
-        self.tree.bind('<<TreeviewSelect>>', self.on_select)
 
         # Test Level Slider (Opacity)
         # Range 0-255, where 255 is fully opaque
@@ -102,14 +238,24 @@ class CustomTestTool:
         level_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(level_frame, text="투명도:").pack(side=tk.LEFT)
-        self.scale = ttk.Scale(level_frame, from_=0, to=255, variable=self.level_var, orient=tk.HORIZONTAL, command=self.update_level)
+        self.scale = ttk.Scale(level_frame, from_=0, to=255, variable=self.level_var, orient=tk.HORIZONTAL,
+                               command=self.recorded('level', self.update_level))
         self.scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
         # Taskbar Visibility Checkbox
         self.taskbar_var = tk.BooleanVar(value=True)
-        self.taskbar_checkbox = ttk.Checkbutton(control_frame, text="작업표시줄 표시", variable=self.taskbar_var, command=self.toggle_taskbar)
+        self.taskbar_checkbox = ttk.Checkbutton(control_frame, text="작업표시줄 표시", variable=self.taskbar_var,
+                                                command=self.recorded('taskbar', self.toggle_taskbar, lambda: [self.taskbar_var.get()]))
         self.taskbar_checkbox.pack(pady=5)
         
+        # Saved Settings: reapplied whenever a matching window opens
+        rule_frame = ttk.Frame(control_frame)
+        rule_frame.pack(anchor=tk.CENTER)
+        ttk.Button(rule_frame, text="설정 저장", command=self.save_window_rule).pack(side=tk.LEFT, padx=2)
+        ttk.Button(rule_frame, text="설정 삭제", command=self.delete_window_rule).pack(side=tk.LEFT, padx=2)
+        self.rule_label_var = tk.StringVar(value=f"저장된 설정: {len(self.window_rules)}개")
+        ttk.Label(control_frame, textvariable=self.rule_label_var, foreground="gray", font=("Malgun Gothic", 8)).pack()
+        
         # Developer Info
         ttk.Label(control_frame, text="developed by 부트띠", font=("Arial", 8), foreground="gray").pack(pady=(10, 0))
         
@@ -130,135 +276,237 @@ class CustomTestTool:
             print(f"Failed to load window icon: {e}")
 
         # Setup hotkeys (may fail in admin mode or due to conflicts)
+        # The supervisor re-registers them only if the hook stops responding
+        try:
+            hotkey_backend = create_hotkey_backend(backend=self.backend)
+        except Exception as e:
+            print(f"Hotkey backend unavailable: {e}")
+            hotkey_backend = FakeHotkeyBackend()
+        self.latency = LatencyRecorder()
+        self.hotkeys = HotkeySupervisor(hotkey_backend, idle_seconds=lambda: input_idle_seconds(self.backend),
+                                        pointer=self.backend.GetCursorPos)
+        self.hotkeys.on_recover = lambda supervisor: self.ui_queue.post(self.show_hotkey_health)
         try:
-            self.setup_hotkeys()
-            # Start Hotkey Watchdog
-            self.running = True
-            self.start_hotkey_watchdog()
-            print("Hotkeys registered successfully")
+            conflicts = self.setup_hotkeys()
+            if conflicts:
+                print(f"Hotkeys in use by another program (not registered): {', '.join(conflicts)}")
+            else:
+                print("Hotkeys registered successfully")
         except Exception as e:
             print(f"Warning: Hotkeys failed to register: {e}")
             print("GUI will work, but hotkeys won't be available")
-            self.running = False
         
         self.refresh_list()
+        self.toggle_live_tracking(refresh=False)
+        
+        # Local JSON-RPC control API, only when CTT_CONTROL names a port
+        try:
+            self.control = create_control_server(ControlApi(self))
+        except (OSError, ValueError) as e:
+            print(f"Control API unavailable: {e}")
+            self.control = None
+        
+        if self.recorder is not None:
+            self.recorder.started()
 
-    def start_hotkey_watchdog(self):
-        """Start a background thread to re-register hotkeys periodically"""
-        def watchdog_loop():
-            while self.running:
-                time.sleep(10) # Check every 10 seconds for faster recovery
-                if self.running:
-                    self.reset_hotkeys()
-                    
-        threading.Thread(target=watchdog_loop, daemon=True).start()
+    def toggle_live_tracking(self, refresh=True):
+        """Start/stop patching the list from window events"""
+        # One poll chain at most, however fast the box is toggled
+        if self.events_poll is not None:
+            self.root.after_cancel(self.events_poll)
+            self.events_poll = None
+        if self.live_var.get():
+            try:
+                self.window_events.start()
+            except Exception as e:
+                print(f"Live tracking unavailable: {e}")
+                self.live_var.set(False)
+                return
+            self.events_poll = self.root.after(16, self.poll_window_events)
+            if refresh:
+                self.refresh_list()  # catch up on what changed while tracking was off
+        else:
+            self.window_events.stop()
+
+    def poll_window_events(self):
+        """Apply coalesced window-event patches once per frame (Tk thread)"""
+        self.events_poll = None
+        if not self.window_events.running:
+            return
+        patch = self.window_events.take_patches()
+        if patch is not None:
+            self.forget_closed_windows(patch.removed)
+            patch = patch._replace(updated=self.apply_rules(patch.updated))
+            self.apply_window_patch(patch)
+            if self.enumerator.busy:
+                # Re-applied on top of the snapshot that is still being taken
+                self.patches_since_refresh.append(patch)
+        self.events_poll = self.root.after(16, self.poll_window_events)
+
+    def setup_hotkeys(self):
+        """Setup global hotkeys for window control; returns the combos another program owns"""
+        hotkeys = self.hotkeys
+        register = self.timed_hotkey('register', self.recorded('register', self.on_hotkey_register))
+        hide = self.timed_hotkey('hide', self.recorded('hide', self.on_hotkey_hide))
+        show = self.timed_hotkey('show', self.recorded('show', self.on_hotkey_show))
+        # Register Target: Shift+0 OR Alt+0
+        hotkeys.add('shift+0', register)
+        hotkeys.add('alt+0', register)
+        
+        # Hide Target: Ctrl+1 OR Alt+1
+        hotkeys.add('ctrl+1', hide)
+        hotkeys.add('alt+1', hide)
+        
+        # Show Target: Ctrl+2 OR Alt+2
+        hotkeys.add('ctrl+2', show)
+        hotkeys.add('alt+2', show)
+        
+        # Force Hide Target: Ctrl+3 OR Alt+3
+        hotkeys.add('ctrl+3', hide)
+        hotkeys.add('alt+3', hide)
+        return hotkeys.register()
+
+    def add_selection_to_group(self):
+        """Add the selected window to the chosen group (binding its hotkeys on first use)"""
+        if not self.selected_hwnd:
+            messagebox.showwarning("경고", "목록에서 창을 먼저 선택하세요.")
+            return
+        name = self.group_var.get()
+        group = self.window_groups.get(name)
+        if group is None:
+            hide_key, show_key = slot_hotkeys(name)
+            group = self.window_groups.ensure(name, hide_key, show_key)
+            apply_group = self.recorded('group', self.on_group_hotkey)
+            try:
+                self.hotkeys.add(hide_key, self.timed_hotkey('group_hide', lambda: apply_group(name, False)))
+                self.hotkeys.add(show_key, self.timed_hotkey('group_show', lambda: apply_group(name, True)))
+            except Exception as e:
+                print(f"Failed to register group hotkeys: {e}")
+        group.add(self.selected_hwnd)
+        self.update_group_label()
+
+    def clear_group(self):
+        """Empty the chosen group and release its hotkeys"""
+        group = self.window_groups.delete(self.group_var.get())
+        if group is not None:
+            self.hotkeys.remove(group.hide_hotkey)
+            self.hotkeys.remove(group.show_hotkey)
+        self.update_group_label()
+
+    def update_group_label(self):
+        name = self.group_var.get()
+        group = self.window_groups.get(name)
+        if group is None or not group.hwnds:
+            self.group_label_var.set(f"그룹 {name}: 비어 있음")
+            return
+        titles = ", ".join(self.registry.title(hwnd, str(hwnd)) for hwnd in group.hwnds[:3])
+        more = f" 외 {len(group) - 3}개" if len(group) > 3 else ""
+        self.group_label_var.set(f"그룹 {name} ({len(group)}개, Ctrl+Alt+{name} 숨김 / "
+                                 f"Ctrl+Alt+Shift+{name} 보임): {titles}{more}")
+
+    def on_group_hotkey(self, name, visible):
+        """Hide or show every window of group name in one batch"""
+        try:
+            with self.latency.call():
+                if visible:
+                    applied, stale = self.window_groups.show(name)
+                else:
+                    applied, stale = self.window_groups.hide(name)
+        except Exception as e:
+            print(f"Error applying group {name}: {e}")
+            return
+        self.ui_queue.post(self.note_group_applied, name, visible, applied, stale)
+
+    def note_group_applied(self, name, visible, applied, stale):
+        """Book-keeping after a group hotkey (Tk thread)"""
+        for hwnd in applied:
+            self.note_visibility(hwnd, visible)  # Track them so we can restore on exit
+        if stale:
+            self.window_groups.prune(name, stale)
+            print(f"Group {name}: removed {len(stale)} closed window(s)")
+            self.update_group_label()
+
+    def recorded(self, action, handler, params=None):
+        """handler, recorded as a user action while a session is recorded (CTT_RECORD)"""
+        if self.recorder is None:
+            return handler
+        return self.recorder.wrap(action, handler, params)
+
+    def timed_hotkey(self, action, handler):
+        """Wrap a hotkey handler so its latency is recorded under action"""
+        def run():
+            self.latency.start(action, self.hotkeys.backend.last_received)
+            try:
+                handler()
+            finally:
+                self.latency.finish()
+        return run
 
-    def reset_hotkeys(self):
-        """Safely reset all hotkeys"""
+    def show_latency(self):
+        """Show the hotkey latency histograms (ms)"""
+        text = self.latency.format() if self.latency.histograms else "아직 기록된 단축키 입력이 없습니다."
+        text += "\n\n" + self.ui_queue.format()
+        messagebox.showinfo("단축키 지연 시간 (ms)", text)
+
+    def dump_latency(self):
+        """Save the hotkey latency histograms to a JSON file"""
+        path = os.path.abspath(time.strftime("hotkey_latency_%Y%m%d_%H%M%S.json"))
         try:
-            keyboard.unhook_all()
-            self.setup_hotkeys()
-            # print("Hotkeys refreshed by watchdog") # Debug
+            self.latency.dump(path, ui_queue=self.ui_queue.stats())
+            messagebox.showinfo("알림", f"지연 시간 기록을 저장했습니다:\n{path}")
         except Exception as e:
-            print(f"Hotkey reset failed: {e}")
+            messagebox.showerror("Error", f"Failed to save latency:\n{e}")
 
-    def setup_hotkeys(self):
-        """Setup global hotkeys for window control"""
+    def save_trace(self, quiet=False):
+        """Write the win32 call trace (CTT_TRACE) and print the costliest calls"""
         try:
-            # Register Target: Shift+0 OR Alt+0
-            keyboard.add_hotkey('shift+0', self.on_hotkey_register)
-            keyboard.add_hotkey('alt+0', self.on_hotkey_register)
-            
-            # Hide Target: Ctrl+1 OR Alt+1
-            keyboard.add_hotkey('ctrl+1', self.on_hotkey_hide)
-            keyboard.add_hotkey('alt+1', self.on_hotkey_hide)
-            
-            # Show Target: Ctrl+2 OR Alt+2
-            keyboard.add_hotkey('ctrl+2', self.on_hotkey_show)
-            keyboard.add_hotkey('alt+2', self.on_hotkey_show)
-            
-            # Force Hide Target: Ctrl+3 OR Alt+3
-            keyboard.add_hotkey('ctrl+3', self.on_hotkey_hide)
-            keyboard.add_hotkey('alt+3', self.on_hotkey_hide)
+            path = self.tracer.export()
         except Exception as e:
-            print(f"Failed to setup hotkeys: {e}")
+            print(f"Error saving call trace: {e}")
+            if not quiet:
+                messagebox.showerror("Error", f"Failed to save call trace:\n{e}")
+            return
+        print(self.tracer.format())
+        if not quiet:
+            messagebox.showinfo("알림", f"호출 추적을 저장했습니다 (chrome://tracing):\n{os.path.abspath(path)}")
+
+    def show_hotkey_health(self):
+        """Report hotkey outages and re-registrations in the status line"""
+        stats = self.hotkeys.stats()
+        if stats['down']:
+            self.status_var.set(f"단축키 응답 없음 (재등록 {stats['reregistrations']}회)")
+        else:
+            self.status_var.set(f"단축키 재등록 {stats['reregistrations']}회 "
+                                f"(중단 {stats['downtime']:.1f}초)")
 
     def on_hotkey_register(self):
         """Register the currently active window as target"""
         try:
-            hwnd = win32gui.GetForegroundWindow()
-            title = win32gui.GetWindowText(hwnd)
-            self.hotkey_target_hwnd = hwnd
+            with self.latency.call():
+                hwnd = self.backend.GetForegroundWindow()
+                title = self.backend.GetWindowText(hwnd)
             print(f"Target Registered: [{hwnd}] {title}")
-            
-            # Update UI label if possible (thread safety check might be needed but usually ok for simple var set)
-            try:
-                self.target_label_var.set(f"단축키 대상: {title}")
-            except:
-                pass
+            self.ui_queue.post(self.set_hotkey_target, hwnd, f"단축키 대상: {title}")
         except Exception as e:
             print(f"Error registering target: {e}")
-            
-    # ... (hide/show methods remain same) ...
 
-    def set_hotkey_target_from_selection(self):
-        """Set the hotkey target to the currently selected window in the list"""
-        if not self.selected_hwnd:
-            messagebox.showwarning("경고", "먼저 목록에서 창을 선택해주세요.")
-            return
+    def set_hotkey_target(self, hwnd, label):
+        """Book-keeping for the hotkey target (Tk thread; hotkeys post it)"""
+        self.hotkey_target_hwnd = hwnd
+        self.target_label_var.set(label)
             
-        self.hotkey_target_hwnd = self.selected_hwnd
-        
-        # Get title for display
-        title = ""
-        for t, h in self.window_list:
-            if h == self.hotkey_target_hwnd:
-                title = t
-                break
-                
-        self.target_label_var.set(f"단축키 대상: {title}")
-        messagebox.showinfo("설정 완료", f"단축키 대상이 설정되었습니다.\n[{title}]\n\n[사용법]\n숨김: Ctrl+1 또는 Alt+1\n보임: Ctrl+2 또는 Alt+2")
+    # ... (hide/show methods remain same) ...
 
     def on_hotkey_hide(self):
         """Hide the registered target window"""
-        if self.hotkey_target_hwnd:
-            # Validate window handle
-            if not win32gui.IsWindow(self.hotkey_target_hwnd):
-                print("Target window invalid.")
-                try:
-                    self.target_label_var.set("단축키 대상: 없음 (창 사라짐)")
-                except:
-                    pass
-                self.hotkey_target_hwnd = None
-                return
-
-            try:
-                win32gui.ShowWindow(self.hotkey_target_hwnd, win32con.SW_HIDE)
-                self.hidden_windows.add(self.hotkey_target_hwnd) # Track it so we can restore on exit
-            except Exception as e:
-                print(f"Error hiding target: {e}")
+        self.set_target_visible(False)
 
     def on_hotkey_show(self):
         """Show the registered target window"""
-        if self.hotkey_target_hwnd:
-            # Validate window handle
-            if not win32gui.IsWindow(self.hotkey_target_hwnd):
-                print("Target window invalid.")
-                try:
-                    self.target_label_var.set("단축키 대상: 없음 (창 사라짐)")
-                except:
-                    pass
-                self.hotkey_target_hwnd = None
-                return
-
-            try:
-                win32gui.ShowWindow(self.hotkey_target_hwnd, win32con.SW_SHOW)
-                if self.hotkey_target_hwnd in self.hidden_windows:
-                    self.hidden_windows.remove(self.hotkey_target_hwnd)
-            except Exception as e:
-                print(f"Error showing target: {e}")
+        self.set_target_visible(True)
 
     def create_icon(self):
+        from PIL import Image, ImageDraw
         # Load the custom app icon for the tray
         try:
             image = Image.open("app_icon.png")
@@ -296,9 +544,14 @@ class CustomTestTool:
                 self.activate_selected_window()
                 return
                 
+            import pystray  # Loaded on first use: keeps startup and second launches fast
             image = self.create_icon()
             menu = (pystray.MenuItem('복원', self.restore_from_tray, default=True),
-                    pystray.MenuItem('종료', self.quit_app))
+                    pystray.MenuItem('단축키 지연 시간', lambda icon, item: self.ui_queue.post(self.show_latency)),
+                    pystray.MenuItem('지연 시간 저장', lambda icon, item: self.ui_queue.post(self.dump_latency)))
+            if self.tracer is not None:
+                menu += (pystray.MenuItem('호출 추적 저장', lambda icon, item: self.ui_queue.post(self.save_trace)),)
+            menu += (pystray.MenuItem('종료', self.quit_app),)
             self.tray_icon = pystray.Icon("name", image, "Custom Test Tool", menu)
             
             # Run tray icon in a separate thread to not block tkinter
@@ -317,116 +570,253 @@ class CustomTestTool:
         if self.selected_hwnd:
             try:
                 # 툴 자신이면 패스
-                if self.selected_hwnd == self.root.winfo_id():
+                if self.selected_hwnd == self.get_own_hwnd():
                     return
                     
-                if win32gui.IsWindow(self.selected_hwnd):
-                    # 약간의 딜레이 후 활성화 시도
-                    def try_activate():
-                        try:
-                            # 만약 최소화되어 있다면 복구
-                            if win32gui.IsIconic(self.selected_hwnd):
-                                win32gui.ShowWindow(self.selected_hwnd, win32con.SW_RESTORE)
-                            
-                            # 보이게 설정
-                            win32gui.ShowWindow(self.selected_hwnd, win32con.SW_SHOW)
-                            
-                            # 맨 앞으로 가져오기
-                            win32gui.SetForegroundWindow(self.selected_hwnd)
-                        except Exception as e:
-                            print(f"Activation error: {e}")
+                hwnd = self.selected_hwnd
+                if self.backend.IsWindow(hwnd):
+                    def activated(future):
+                        if not future.cancelled() and future.exception() is not None:
+                            print(f"Activation error: {future.exception()}")
                     
-                    # Run in a separate thread
-                    threading.Timer(0.1, try_activate).start()
+                    # 약간의 딜레이 후 활성화 시도 (최소화 복구, 보이기, 맨 앞으로)
+                    self.root.after(100, lambda: self.actions.submit(ACTIVATE, hwnd, None, activate_window,
+                                                                     activated))
             except Exception as e:
                 print(f"Error activating window: {e}")
 
     def restore_from_tray(self, icon, item):
         self.tray_icon.stop()
-        self.root.after(0, self.root.deiconify) # Restore window on main thread
+        self.ui_queue.post(self.root.deiconify) # Restore window on main thread
+
+    def handle_command(self, cwd, argv):
+        """Run a launch's command line (ours, or a later launch's via single_instance)"""
+        try:
+            args = build_arg_parser().parse_args(argv)
+        except SystemExit:
+            print(f"Ignoring invalid command line: {argv}")
+            return
+        if args.show:
+            self.show_window()
+        if args.profile:
+            self.apply_profile(os.path.join(cwd, args.profile))
+        if args.hide_target:
+            self.set_target_visible(False)
+        if args.show_target:
+            self.set_target_visible(True)
+
+    def set_target_visible(self, visible):
+        """Queue hiding/showing the hotkey target (hotkey thread, --hide-target/--show-target)"""
+        hwnd = self.hotkey_target_hwnd
+        if not hwnd:
+            return
+        # Validate window handle
+        if not self.backend.IsWindow(hwnd):
+            print("Target window invalid.")
+            self.ui_queue.post(self.set_hotkey_target, None, "단축키 대상: 없음 (창 사라짐)")
+            return
+        try:
+            # Only queued here; ShowWindow runs on the action executor
+            with self.latency.call():
+                self.set_visible_state(hwnd, visible)
+        except Exception as e:
+            print(f"Error {'showing' if visible else 'hiding'} target: {e}")
+
+    def show_window(self):
+        """Bring the tool back from the tray or from behind other windows"""
+        if self.tray_icon and self.tray_icon._running:
+            self.tray_icon.stop()
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+
+    def apply_profile(self, path):
+        """Apply the settings of a rule file once to every open window it matches"""
+        if not os.path.exists(path):
+            self.status_var.set(f"프로필 파일 없음: {path}")
+            return
+        if self.enumerator.busy or self.snapshot_poll is not None:
+            self.root.after(50, self.apply_profile, path)  # Wait for the first snapshot
+            return
+        matcher = WindowRules(path).load().matcher
+        own_hwnd = self.get_own_hwnd()
+        changed = []
+        for info in list(self.window_filter.windows.values()):
+            if info.hwnd != own_hwnd and not info.hung:
+                updated = self.apply_rule_settings(info, matcher)
+                if updated is not info:
+                    changed.append(updated)
+        if changed:
+            self.apply_window_patch(WindowPatch(tuple(changed), (), 0))
+        self.status_var.set(f"프로필 적용: 창 {len(changed)}개 변경 ({os.path.basename(path)})")
 
     def perform_exit(self):
         """Actual exit logic to be run on main thread"""
-        self.running = False
-        
-        # Restore all hidden windows before exit
-        if self.hidden_windows:
-            for hwnd in list(self.hidden_windows):
-                try:
-                    # Remove TOOLWINDOW, Add APPWINDOW
-                    style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-                    new_style = (style & ~win32con.WS_EX_TOOLWINDOW) | win32con.WS_EX_APPWINDOW
-                    
-                    # Apply style
-                    win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
-                    win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, new_style)
-                    win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
-                    
-                    # Force update frame
-                    win32gui.SetWindowPos(hwnd, 0, 0, 0, 0, 0, 
-                                        win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | 
-                                        win32con.SWP_NOZORDER | win32con.SWP_FRAMECHANGED)
-                except:
-                    pass  # Ignore errors during exit
+        self.hotkeys.unregister()
+        self.enumerator.stop()
+        self.window_events.stop()
+        if self.control is not None:
+            self.control.stop()
+        self.actions.stop()  # Lets queued changes finish (briefly) before the restore below
+        
+        # A restore still running from the UI or the control API is cut short;
+        # its windows in flight keep their threads and are not started twice
+        in_flight = set()
+        if self.restore_job is not None:
+            job, self.restore_job = self.restore_job.cancel(), None
+            self.hidden_windows.difference_update(job.restored + list(job.failed))
+            self.journal.restored(job.restored)
+            self.journal.forget(job.failed)
+            in_flight.update(job.timed_out)
+        
+        # Restore all hidden windows before exit, in parallel and within a fixed
+        # budget: a hung window is left behind instead of blocking the exit
+        pending = [hwnd for hwnd in self.hidden_windows if hwnd not in in_flight]
+        if pending:
+            job = RestoreJob(self.backend, pending, deadline=EXIT_RESTORE_BUDGET).wait()
+            if job.timed_out or job.skipped:
+                print(f"Exit restore: {len(job.timed_out) + len(job.skipped)} window(s) not restored "
+                      f"within {EXIT_RESTORE_BUDGET}s: {job.timed_out + job.skipped}")
+            self.journal.restored(job.restored)
+            self.journal.forget(job.failed)
             self.hidden_windows.clear()
-            
-            # Give Windows time to process
-            self.root.update()
-            time.sleep(0.2)
+        # Windows left hidden stay in the journal and are offered again on the next start
+        self.journal.close()
         
         if self.tray_icon:
             self.tray_icon.stop()
             
         try:
-            keyboard.unhook_all()
+            self.hotkeys.backend.close()
         except:
             pass
             
+        if self.tracer is not None:
+            self.save_trace(quiet=True)
+        if self.recorder is not None:
+            self.recorder.close()
+        self.ui_queue.stop()
         self.root.destroy()
 
     def quit_app(self, icon, item):
-        self.root.after(0, self.perform_exit)
+        self.ui_queue.post(self.perform_exit)
 
-    def restore_all_windows(self):
-        """Restore all hidden windows to taskbar"""
+    def restore_all_windows(self, report=True):
+        """Restore all hidden windows to taskbar; returns the started RestoreJob or None.
+
+        report=False skips the dialogs, for callers (the control API) that
+        report the result themselves.
+        """
         if not self.hidden_windows:
-            messagebox.showinfo("알림", "숨겨진 창이 없습니다.")
+            if report:
+                messagebox.showinfo("알림", "숨겨진 창이 없습니다.")
+            return None
+        if self.restore_job is not None:
+            return None  # Already running
+        
+        # Windows are restored on worker threads; poll_restore collects the result
+        self.restore_job = RestoreJob(self.backend, self.hidden_windows, deadline=RESTORE_DEADLINE).start()
+        self.restore_report = report
+        self.status_var.set(f"창 {len(self.restore_job.hwnds)}개 복원 중…")
+        self.root.after(20, self.poll_restore)
+        return self.restore_job
+
+    def poll_restore(self):
+        """Finish restore_all_windows once its RestoreJob is done"""
+        job = self.restore_job
+        if not job.poll():
+            self.root.after(20, self.poll_restore)
             return
+        self.restore_job = None
         
-        count = len(self.hidden_windows)
-        restored = 0
-        errors = []
+        count = len(job.hwnds)
+        self.note_restored(job)
+        if not self.restore_report:
+            return
         
-        for hwnd in list(self.hidden_windows):
+        # Show result
+        pending = job.timed_out + job.skipped
+        if job.failed or pending:
+            message = f"총 {count}개 중 {len(job.restored)}개 해제 완료\n{len(job.failed)}개 실패"
+            if pending:
+                titles = ", ".join(self.registry.title(hwnd, str(hwnd)) for hwnd in pending[:5])
+                message += f"\n{len(pending)}개 응답 없음 ({job.window_timeout:.0f}초 초과): {titles}"
+            messagebox.showwarning("해제 완료", message)
+        else:
+            messagebox.showinfo("해제 완료", f"{len(job.restored)}개 창 모두 작업표시줄 표시로 변경됨")
+
+    def window_identity(self, hwnd):
+        """(process, class name, title) recorded with a journal entry"""
+        info = self.window_filter.windows.get(hwnd)
+        try:
+            process = info.process if info is not None else self.backend.GetWindowProcessName(hwnd)
+            class_name = self.backend.GetClassName(hwnd)
+        except Exception:
+            return "", "", ""
+        return process, class_name, info.title if info is not None else self.registry.title(hwnd, "")
+
+    def offer_orphan_restore(self, orphans):
+        """Offer to restore windows a crashed or killed previous run left hidden"""
+        live = []
+        for entry in orphans.values():
             try:
-                # Remove TOOLWINDOW, Add APPWINDOW
-                style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-                new_style = (style & ~win32con.WS_EX_TOOLWINDOW) | win32con.WS_EX_APPWINDOW
-                
-                # Apply style
-                win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
-                win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, new_style)
-                win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
-                
-                # Force update frame
-                win32gui.SetWindowPos(hwnd, 0, 0, 0, 0, 0, 
-                                    win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | 
-                                    win32con.SWP_NOZORDER | win32con.SWP_FRAMECHANGED)
-                restored += 1
-            except Exception as e:
-                errors.append(f"창 ID {hwnd}: {str(e)}")
+                # hwnds are reused: only the same program's window counts
+                if (self.backend.IsWindow(entry.hwnd)
+                        and self.backend.GetWindowProcessName(entry.hwnd) == entry.process
+                        and self.backend.GetClassName(entry.hwnd) == entry.class_name):
+                    live.append(entry)
+            except Exception:
+                pass
+        live_hwnds = [entry.hwnd for entry in live]
+        self.journal.forget([hwnd for hwnd in orphans if hwnd not in live_hwnds])
+        if not live:
+            return
         
-        self.hidden_windows.clear()
+        titles = "\n".join(f"- {entry.title or entry.process}" for entry in live[:10])
+        if len(live) > 10:
+            titles += f"\n- 외 {len(live) - 10}개"
+        if messagebox.askyesno("숨겨진 창 복구", f"지난 실행이 비정상 종료되어 숨겨진 채 남은 창이 "
+                                                f"{len(live)}개 있습니다:\n{titles}\n\n지금 복원할까요?"):
+            self.hidden_windows.update(live_hwnds)
+            self.restore_all_windows()
+        else:
+            self.journal.forget(live_hwnds)
+
+    def note_window_change(self, hwnd, alpha=None, style=None):
+        """Show a change made off the Tk thread (action executor, control API) in the list"""
+        if alpha is not None:
+            self.opacity.note(hwnd, alpha, style)
+        self.state_cache.invalidate(hwnd)
+        info = self.window_filter.windows.get(hwnd)
+        if info is not None:
+            if alpha is not None:
+                info = info._replace(alpha=alpha)
+            if style is not None:
+                info = info._replace(style=style)
+            self.apply_window_patch(WindowPatch((info,), (), 0))
+        if hwnd == self.selected_hwnd:
+            self.select_window(hwnd)  # Reload slider and checkbox
+
+    def note_visibility(self, hwnd, visible):
+        """Book-keeping after hwnd was hidden (SW_HIDE) or shown outside the hotkeys"""
+        if visible:
+            self.hidden_windows.discard(hwnd)
+            self.journal.shown(hwnd)
+        else:
+            self.hidden_windows.add(hwnd)
+            self.journal.hidden(hwnd, *self.window_identity(hwnd))
+
+    def note_restored(self, job):
+        """Book-keeping after a finished RestoreJob"""
+        for hwnd in job.restored + list(job.failed):
+            self.hidden_windows.discard(hwnd)
+            self.state_cache.invalidate(hwnd)
+        self.journal.restored(job.restored)
+        self.journal.forget(job.failed)
+        # Timed-out/skipped windows stay in hidden_windows for the exit restore
         
         # Refresh display
         self.refresh_list()
-        
-        # Show result
-        if errors:
-            messagebox.showwarning("해제 완료", 
-                                  f"총 {count}개 중 {restored}개 해제 완료\n{len(errors)}개 실패")
-        else:
-            messagebox.showinfo("해제 완료", f"{restored}개 창 모두 작업표시줄 표시로 변경됨")
 
     def toggle_taskbar(self):
         # Check if window is selected
@@ -439,51 +829,178 @@ class CustomTestTool:
             hwnd = self.selected_hwnd
             
             # Check if this is the tool's own window
-            is_self = False
-            for title, h in self.window_list:
-                if h == hwnd and title == "Custom Test Tool":
-                    is_self = True
-                    break
+            is_self = (hwnd == self.get_own_hwnd())
             
             # If hiding tool itself from taskbar, minimize to tray instead
             if is_self and not self.taskbar_var.get():
                 self.root.after(100, self.minimize_to_tray)
                 return
 
-            # Style-based Method
-            # Save current window placement
-            placement = win32gui.GetWindowPlacement(hwnd)
-            
-            style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-            
-            if self.taskbar_var.get():
-                # Show in taskbar: Remove TOOLWINDOW, Add APPWINDOW
-                new_style = (style & ~win32con.WS_EX_TOOLWINDOW) | win32con.WS_EX_APPWINDOW
-                if hwnd in self.hidden_windows:
-                    self.hidden_windows.remove(hwnd)
-            else:
-                # Hide from taskbar: Add TOOLWINDOW, Remove APPWINDOW
-                new_style = (style | win32con.WS_EX_TOOLWINDOW) & ~win32con.WS_EX_APPWINDOW
-                self.hidden_windows.add(hwnd)
-            
-            # Need to hide/show to apply style change for taskbar
-            win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
-            win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, new_style)
-            win32gui.ShowWindow(hwnd, win32con.SW_SHOWNOACTIVATE)
-            
-            # Restore window placement
-            win32gui.SetWindowPlacement(hwnd, placement)
-            
-            # Bring tool window back to front
-            self.root.lift()
-            self.root.focus_force()
+            def toggled(future):
+                if future.cancelled():
+                    return  # Undone by the next click before it ran
+                error = future.exception()
+                if error is not None:
+                    messagebox.showerror("오류", f"작업표시줄 토글 실패:\n{error}")
+                    print(f"Error toggling taskbar: {error}")
+                    if hwnd == self.selected_hwnd:
+                        self.select_window(hwnd)  # Reload the checkbox
+                    return
+                
+                # Bring tool window back to front
+                self.root.lift()
+                self.root.focus_force()
+                
+                # Update tree display
+                if hwnd == self.selected_hwnd:
+                    self.update_selected_tree_item()
             
-            # Update tree display
-            self.update_selected_tree_item()
+            self.set_taskbar_state(hwnd, self.taskbar_var.get(), toggled)
         except Exception as e:
             messagebox.showerror("오류", f"작업표시줄 토글 실패:\n{e}")
             print(f"Error toggling taskbar: {e}")
 
+    def set_taskbar_state(self, hwnd, show, on_done=None):
+        """Queue showing hwnd in or hiding it from the taskbar; returns the Future.
+
+        The book-keeping runs on the Tk thread once the change is made,
+        then on_done(future).
+        """
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                style, new_style = future.result()
+                self.note_taskbar_state(hwnd, style, new_style, show)
+                self.note_window_change(hwnd, style=new_style)
+            if on_done is not None:
+                on_done(future)
+        return self.actions.submit(TASKBAR, hwnd, show, set_taskbar_visible, done)
+
+    def set_visible_state(self, hwnd, visible, on_done=None):
+        """Queue showing (SW_SHOW) or hiding (SW_HIDE) hwnd; returns the Future.
+
+        note_visibility runs on the Tk thread once the change is made,
+        then on_done(future).
+        """
+        def done(future):
+            if not future.cancelled():
+                if future.exception() is None:
+                    self.note_visibility(hwnd, visible)
+                else:
+                    print(f"Error {'showing' if visible else 'hiding'} {hwnd}: {future.exception()}")
+            if on_done is not None:
+                on_done(future)
+        return self.actions.submit(VISIBLE, hwnd, visible, set_window_visible, done)
+
+    def note_taskbar_state(self, hwnd, style, new_style, show):
+        """Book-keeping after hwnd's taskbar style changed from style to new_style"""
+        if show:
+            self.hidden_windows.discard(hwnd)
+        else:
+            self.hidden_windows.add(hwnd)
+        self.state_cache.invalidate(hwnd)
+        record = self.registry.get(hwnd)
+        if record is not None:
+            record.style = new_style
+        self.journal.style_changed(hwnd, style, new_style, not show, *self.window_identity(hwnd))
+
+    def apply_rules(self, windows):
+        """Apply saved settings to windows not seen before; returns the updated WindowInfos.
+
+        A window is checked again when its title changes (apps often set
+        the title after creating the window) until a rule has been applied
+        once; after that the user's own changes are left alone.
+        """
+        matcher = self.window_rules.matcher
+        if not len(matcher):
+            return windows
+        checked = self.rule_checked
+        own_hwnd = self.get_own_hwnd()
+        result = []
+        for info in windows:
+            hwnd = info.hwnd
+            if hwnd not in checked or (checked[hwnd] is not None and checked[hwnd] != info.title):
+                checked[hwnd] = info.title
+                if hwnd != own_hwnd and not info.hung:
+                    info = self.apply_rule_settings(info, matcher)
+            result.append(info)
+        return result
+
+    def forget_closed_windows(self, hwnds):
+        """Drop the rule state of hwnds that no longer exist (merely hidden ones keep it)"""
+        for hwnd in hwnds:
+            if hwnd in self.rule_checked and not self.backend.IsWindow(hwnd):
+                del self.rule_checked[hwnd]
+
+    def apply_rule_settings(self, info, matcher):
+        """Apply the settings of the rules matching one window"""
+        hwnd = info.hwnd
+        try:
+            class_name = self.backend.GetClassName(hwnd) if matcher.uses_class else None
+            settings = matcher.match(info.process, class_name, info.title)
+            if settings is None:
+                return info
+            self.rule_checked[hwnd] = None
+            # Queued; the returned info shows the settings the window is getting
+            if settings.alpha is not None and settings.alpha != info.alpha:
+                self.opacity.set(hwnd, settings.alpha)
+                info = info._replace(alpha=settings.alpha)
+            if settings.taskbar is not None and settings.taskbar == bool(info.style & wb.WS_EX_TOOLWINDOW):
+                self.set_taskbar_state(hwnd, settings.taskbar)
+                if settings.taskbar:
+                    style = (info.style & ~wb.WS_EX_TOOLWINDOW) | wb.WS_EX_APPWINDOW
+                else:
+                    style = (info.style | wb.WS_EX_TOOLWINDOW) & ~wb.WS_EX_APPWINDOW
+                info = info._replace(style=style)
+        except Exception as e:
+            print(f"Error applying saved settings: {e}")
+        return info
+
+    def selected_rule(self):
+        """Rule matching the selected window's process and class (None if nothing is selected)"""
+        hwnd = self.selected_hwnd
+        if not hwnd:
+            messagebox.showwarning("경고", "먼저 창을 선택해주세요.")
+            return None
+        try:
+            process = self.backend.GetWindowProcessName(hwnd)
+            class_name = self.backend.GetClassName(hwnd)
+        except Exception as e:
+            messagebox.showerror("오류", f"창 정보를 읽을 수 없습니다:\n{e}")
+            return None
+        return WindowRule(process, class_name, alpha=self.level_var.get(),
+                          taskbar=bool(self.taskbar_var.get()))
+
+    def save_window_rule(self):
+        """Save the selected window's opacity/taskbar state for its app"""
+        rule = self.selected_rule()
+        if rule is None:
+            return
+        self.window_rules.put(rule)
+        self.save_rules()
+        self.rule_checked[self.selected_hwnd] = None  # Already has these settings
+        messagebox.showinfo("설정 저장", f"[{rule.process} / {rule.class_name}] 창이 열릴 때마다\n"
+                                          f"투명도 {int(rule.alpha / 255 * 100)}%, "
+                                          f"작업표시줄 {'표시' if rule.taskbar else '숨김'}으로 설정됩니다.")
+
+    def delete_window_rule(self):
+        """Forget the saved settings of the selected window's app"""
+        rule = self.selected_rule()
+        if rule is None:
+            return
+        if rule.key not in {existing.key for existing in self.window_rules.rules}:
+            messagebox.showinfo("설정 삭제", "이 창에 저장된 설정이 없습니다.")
+            return
+        self.window_rules.remove(rule)
+        self.save_rules()
+
+    def save_rules(self):
+        try:
+            self.window_rules.save()
+        except OSError as e:
+            messagebox.showerror("오류", f"설정 파일 저장 실패:\n{e}")
+            print(f"Error saving window rules: {e}")
+        self.rule_label_var.set(f"저장된 설정: {len(self.window_rules)}개")
+
     def on_closing(self):
         """X 버튼 클릭 시 종료 경고 및 확인"""
         # Create custom dialog
@@ -555,99 +1072,266 @@ class CustomTestTool:
         dialog.bind('<Return>', lambda e: confirm_exit())
         exit_btn.focus_set()
 
+    def get_own_hwnd(self):
+        """HWND of this tool's top-level window (the one EnumWindows reports)"""
+        try:
+            return int(self.root.wm_frame(), 16)
+        except Exception:
+            return self.root.winfo_id()
+
     def get_window_opacity(self, hwnd):
         """Get current window opacity (0-255)"""
         try:
-            style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-            if style & win32con.WS_EX_LAYERED:
-                # Window has layered style, get actual alpha value
-                try:
-                    # GetLayeredWindowAttributes returns (crKey, alpha, flags)
-                    _, alpha, flags = win32gui.GetLayeredWindowAttributes(hwnd)
-                    # LWA_ALPHA = 0x2, check if alpha flag is set
-                    if flags & 0x2:
-                        return alpha
-                except:
-                    pass
-            return 255
+            return self.state_cache.get(hwnd)[1]
         except:
             return 255
 
-    def get_taskbar_status(self, hwnd):
-        """Check if window is shown in taskbar"""
+    def get_taskbar_status(self, hwnd, style=None):
+        """Check if window is shown in taskbar (style: exstyle if already known)"""
         if hwnd in self.hidden_windows:
             return "숨김"
         
         # Fallback to style check (for windows hidden by other means or previous sessions if applicable)
         try:
-            style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-            is_toolwindow = bool(style & win32con.WS_EX_TOOLWINDOW)
+            if style is None:
+                style = self.state_cache.get(hwnd)[0]
+            is_toolwindow = bool(style & wb.WS_EX_TOOLWINDOW)
             return "숨김" if is_toolwindow else "표시"
         except:
             return "표시"
 
     def update_selected_tree_item(self):
         """Update the tree item for the currently selected window"""
-        if not self.selected_hwnd:
+        record = self.registry.get(self.selected_hwnd)
+        if record is None:
             return
-            
-        # Find the index of the selected window
-        for i, (title, hwnd) in enumerate(self.window_list):
-            if hwnd == self.selected_hwnd:
-                # Get the tree item at this index
-                items = self.tree.get_children()
-                if i < len(items):
-                    item = items[i]
-                    
-                    # Get current status
-                    opacity_percent = int((self.level_var.get() / 255) * 100)
-                    taskbar_status = self.get_taskbar_status(hwnd)
-                    
-                    # Update the tree item
-                    self.tree.item(item, values=(f'{opacity_percent}%', taskbar_status))
-                break
+        
+        # Get current status
+        opacity_percent = int((self.level_var.get() / 255) * 100)
+        taskbar_status = self.get_taskbar_status(record.hwnd, record.style)
+        values = (f'{opacity_percent}%', taskbar_status)
+        
+        # Update the tree item (and the cache used by sync_tree)
+        if record.values != values:
+            record.values = values
+            if self.virtual_list is not None:
+                self.virtual_list.update_row(record.hwnd)
+            else:
+                self.tree.item(record.item_id, values=values)
 
     def refresh_list(self):
-        # Re-register hotkeys to prevent timeout issues
-        self.reset_hotkeys()
-
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.window_list = []
-        filter_text = self.filter_var.get().lower()
-        
-        def enum_handler(hwnd, ctx):
-            if win32gui.IsWindowVisible(hwnd):
-                title = win32gui.GetWindowText(hwnd)
-                if title:
-                    if filter_text in title.lower():
-                        self.window_list.append((title, hwnd))
-                        
-                        # Get status
-                        opacity = self.get_window_opacity(hwnd)
-                        opacity_percent = int((opacity / 255) * 100)
-                        taskbar_status = self.get_taskbar_status(hwnd)
-                        
-                        # Insert into tree
-                        self.tree.insert('', 'end', text=title, values=(f'{opacity_percent}%', taskbar_status))
-        
-        win32gui.EnumWindows(enum_handler, None)
+        # Enumerate on the worker thread; a newer request cancels an older one
+        self.enumerator.request()
+        self.patches_since_refresh = []
+        self.status_var.set("새로고침 중…")
+        if self.snapshot_poll is None:
+            self.snapshot_poll = self.root.after(15, self.poll_snapshot)
 
-    def on_select(self, event):
+    def poll_snapshot(self):
+        """Apply the newest finished snapshot (runs on the Tk thread)"""
+        self.snapshot_poll = None
+        # Read busy first: once it is False the snapshot is already queued
+        busy = self.enumerator.busy
+        snapshot = self.enumerator.take_latest()
+        if snapshot is not None and snapshot.error is not None:
+            # Keep showing the last good list rather than an empty one
+            self.status_var.set(f"창 목록 갱신 실패: {snapshot.error}")
+        elif snapshot is not None:
+            listed = {info.hwnd for info in snapshot.windows}
+            self.forget_closed_windows([hwnd for hwnd in self.rule_checked if hwnd not in listed])
+            self.window_filter.load(self.apply_rules(snapshot.windows))
+            # Events seen while enumerating may be newer than the snapshot
+            for patch in self.patches_since_refresh:
+                self.window_filter.apply_patch(patch)
+            self.patches_since_refresh = []
+            
+            # Filter the new snapshot right away (supersedes a pass in progress)
+            filter_pass = self.window_filter.begin(self.filter_var.get())
+            while not filter_pass.step():
+                pass
+            self.filter_pass = None
+            self.show_filtered(filter_pass)
+            self.status_var.set(f"창 {len(self.registry)}/{len(self.window_filter)}개 "
+                                f"({snapshot.elapsed * 1000:.0f}ms)")
+        if busy:
+            self.snapshot_poll = self.root.after(15, self.poll_snapshot)
+
+    def on_filter_changed(self, *args):
+        """Re-filter the last snapshot as the user types (no re-enumeration)"""
+        # A newer keystroke simply replaces the pass being stepped
+        self.filter_pass = self.window_filter.begin(self.filter_var.get())
+        if self.filter_job is None:
+            self.filter_job = self.root.after_idle(self.step_filter)
+
+    def step_filter(self):
+        """Advance the current filter pass one chunk per Tk tick"""
+        self.filter_job = None
+        filter_pass = self.filter_pass
+        if filter_pass is None:
+            return
+        if not filter_pass.step():
+            self.filter_job = self.root.after(1, self.step_filter)
+            return
+        self.filter_pass = None
+        self.show_filtered(filter_pass)
+        self.status_var.set(f"창 {len(self.registry)}/{len(self.window_filter)}개")
+
+    def show_filtered(self, filter_pass):
+        """Show the result of a finished FilterPass"""
+        self.list_filter = filter_pass.query
+        self.sync_tree(self.window_filter.commit(filter_pass))
+
+    def sync_tree(self, windows):
+        """Reconcile registry and tree with a snapshot's WindowInfo tuple.
+
+        Only new windows are inserted, only vanished ones deleted and only
+        changed rows updated, so selection and scroll position survive.
+        """
+        if self.virtual_list is not None:
+            self.sync_registry(windows)
+            self.virtual_list.refresh()
+            return
+        
+        tree = self.tree
+        registry = self.registry
+        old_order = registry.order
+        new_order = [info.hwnd for info in windows]
+        new_index = {hwnd: i for i, hwnd in enumerate(new_order)}
+        
+        # Remember the first visible row so the view does not jump
+        anchor = None
+        if old_order:
+            top = int(tree.yview()[0] * len(old_order))
+            anchor = old_order[min(top, len(old_order) - 1)]
+        
+        stale = [hwnd for hwnd in old_order if hwnd not in new_index]
+        if stale:
+            tree.delete(*[registry.remove(hwnd).item_id for hwnd in stale])
+        survivors = [hwnd for hwnd in old_order if hwnd in new_index]
+        
+        # Invariant: the first `index` tree rows equal new_order[:index],
+        # followed by the not yet placed survivors in their old order
+        placed = set()
+        pending = 0
+        for index, info in enumerate(windows):
+            hwnd, title = info.hwnd, self.row_title(info)
+            values = self.row_values(info)
+            record = registry.get(hwnd)
+            if record is None:
+                record = registry.add(WindowRecord(hwnd, title))
+                tree.insert('', index, iid=record.item_id, text=title, values=values)
+            else:
+                while pending < len(survivors) and survivors[pending] in placed:
+                    pending += 1
+                if pending < len(survivors) and survivors[pending] == hwnd:
+                    pending += 1
+                else:
+                    tree.move(record.item_id, '', index)
+                if record.title != title or record.values != values:
+                    tree.item(record.item_id, text=title, values=values)
+            record.title = title
+            record.style = info.style
+            record.alpha = info.alpha
+            record.values = values
+            placed.add(hwnd)
+        
+        registry.order = new_order
+        if anchor in new_index:
+            tree.yview_moveto(new_index[anchor] / len(new_order))
+
+    def sync_registry(self, windows):
+        """Registry part of sync_tree; the virtual list renders from it"""
+        registry = self.registry
+        new_order = [info.hwnd for info in windows]
+        listed = set(new_order)
+        for hwnd in [hwnd for hwnd in registry.order if hwnd not in listed]:
+            registry.remove(hwnd)
+        for info in windows:
+            record = registry.get(info.hwnd)
+            title = self.row_title(info)
+            if record is None:
+                record = registry.add(WindowRecord(info.hwnd, title))
+            record.title = title
+            record.style = info.style
+            record.alpha = info.alpha
+            record.values = self.row_values(info)
+        registry.order = new_order
+
+    def row_title(self, info):
+        """Tree text for a WindowInfo (hung windows are marked)"""
+        return f"{info.title} (응답 없음)" if info.hung else info.title
+
+    def row_values(self, info):
+        """Tree column values for a WindowInfo"""
+        opacity_percent = int((info.alpha / 255) * 100)
+        return (f'{opacity_percent}%', self.get_taskbar_status(info.hwnd, info.style))
+
+    def apply_window_patch(self, patch):
+        """Patch registry and tree in place from a WindowPatch (O(changes))"""
+        self.window_filter.apply_patch(patch)
+        # The virtual list re-renders from the registry instead
+        tree = self.tree if self.virtual_list is None else None
+        registry = self.registry
+        removed = {hwnd for hwnd in patch.removed if hwnd in registry}
+        created = []
+        for info in patch.updated:
+            record = registry.get(info.hwnd)
+            if not self.window_filter.matches(info, self.list_filter):
+                if record is not None:
+                    removed.add(info.hwnd)
+                continue
+            values = self.row_values(info)
+            title = self.row_title(info)
+            if record is None:
+                # New windows open on top of the Z-order
+                record = registry.add(WindowRecord(info.hwnd, title))
+                if tree is not None:
+                    tree.insert('', 0, iid=record.item_id, text=title, values=values)
+                created.append(info.hwnd)
+            elif tree is not None and (record.title != title or record.values != values):
+                tree.item(record.item_id, text=title, values=values)
+            record.title = title
+            record.style = info.style
+            record.alpha = info.alpha
+            record.values = values
+        
+        if removed:
+            items = [registry.remove(hwnd).item_id for hwnd in removed]
+            if tree is not None:
+                tree.delete(*items)
+        if created or removed:
+            created.reverse()
+            registry.order = created + [hwnd for hwnd in registry.order if hwnd not in removed]
+        if self.virtual_list is not None:
+            self.virtual_list.refresh()
+
+    def tree_selection(self):
+        """hwnd of the selected list row, or None"""
         selection = self.tree.selection()
         if selection:
-            # Get the index of the selected item
-            item = selection[0]
-            index = self.tree.index(item)
-            self.selected_hwnd = self.window_list[index][1]
+            record = self.registry.from_item(selection[0])
+            if record is not None:
+                return record.hwnd
+        return None
+
+    def on_select(self, event):
+        hwnd = self.tree_selection()
+        if hwnd is not None:
+            self.select_window(hwnd)
+
+    def select_window(self, hwnd):
+        """Make hwnd the selected window and load its state into the controls"""
+        record = self.registry.get(hwnd)
+        if record is not None:
+            self.selected_hwnd = record.hwnd
             
             # Check if selected window is the tool itself
-            window_title = self.window_list[index][0]
-            is_self = (window_title == "Custom Test Tool")
+            is_self = (record.hwnd == self.get_own_hwnd())
             
             # Read actual opacity from the window (not from saved settings)
             actual_opacity = self.get_window_opacity(self.selected_hwnd)
+            record.alpha = actual_opacity
+            self.opacity.note(record.hwnd, actual_opacity)
             self.level_var.set(actual_opacity)
             
             # Update taskbar checkbox based on current state
@@ -655,9 +1339,10 @@ class CustomTestTool:
                 if self.selected_hwnd in self.hidden_windows:
                     self.taskbar_var.set(False)
                 else:
-                    style = win32gui.GetWindowLong(self.selected_hwnd, win32con.GWL_EXSTYLE)
+                    style = self.state_cache.get(self.selected_hwnd)[0]
+                    record.style = style
                     # If TOOLWINDOW is set, it's hidden from taskbar (so Show = False)
-                    is_toolwindow = bool(style & win32con.WS_EX_TOOLWINDOW)
+                    is_toolwindow = bool(style & wb.WS_EX_TOOLWINDOW)
                     self.taskbar_var.set(not is_toolwindow)
             except:
                 self.taskbar_var.set(True)
@@ -677,40 +1362,34 @@ class CustomTestTool:
         self.hotkey_target_hwnd = self.selected_hwnd
         
         # Get title for display
-        title = ""
-        for t, h in self.window_list:
-            if h == self.hotkey_target_hwnd:
-                title = t
-                break
+        title = self.registry.title(self.hotkey_target_hwnd)
                 
         self.target_label_var.set(f"단축키 대상: {title}")
         messagebox.showinfo("설정 완료", f"단축키 대상이 설정되었습니다.\n[{title}]\n\n[사용법]\n숨김: Ctrl+1 또는 Alt+1\n보임: Ctrl+2 또는 Alt+2")
 
     def update_level(self, val):
         if self.selected_hwnd:
-            try:
-                level = int(float(val))
-                hwnd = self.selected_hwnd
-                
-                # Save this opacity setting for this window
-                self.window_opacity_settings[hwnd] = level
-                
-                # Get current window style
-                style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-                
-                # Add WS_EX_LAYERED if not present
-                if not (style & win32con.WS_EX_LAYERED):
-                    win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, style | win32con.WS_EX_LAYERED)
-                
-                # Set transparency (LWA_ALPHA = 0x2)
-                win32gui.SetLayeredWindowAttributes(hwnd, 0, level, win32con.LWA_ALPHA)
-                
-                # Update tree display
-                self.update_selected_tree_item()
-            except Exception as e:
-                print(f"Error updating level: {e}")
+            level = int(float(val))
+            hwnd = self.selected_hwnd
+            
+            # Latest value wins; the applier drops no-op and excess writes
+            self.opacity.set(hwnd, level)
+            record = self.registry.get(hwnd)
+            if record is not None:
+                record.alpha = level
+            
+            # Update tree display
+            self.update_selected_tree_item()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = CustomTestTool(root)
+    if sys.argv[1:]:
+        app.handle_command(os.getcwd(), sys.argv[1:])
+    # Later launches: no arguments brings the tool to the front
+    handle_command = app.recorded('command', app.handle_command)
+    server = single_instance.CommandServer(
+        lambda cwd, argv: app.ui_queue.post(handle_command, cwd, argv or ['--show']))
+    server.start()
     root.mainloop()
+    server.stop()
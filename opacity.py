@@ -0,0 +1,129 @@
+"""Coalesced opacity writes for slider drags.
+
+ttk.Scale fires its command for every pixel of a drag.  OpacityApplier
+keeps only the newest alpha per window and writes at most max_rate times
+per second, skips writes that would not change anything and remembers
+which windows already carry WS_EX_LAYERED so the style is not re-read on
+every tick.  With an ActionExecutor the writes run on its thread, where
+a newer alpha still waiting replaces the older one; applied/layered are
+then shared with the Tk thread and guarded by a lock.
+"""
+import threading
+import time
+
+import window_backend as wb
+from window_actions import OPACITY
+
+
+def set_window_alpha(backend, hwnd, alpha):
+    """Make hwnd layered if needed and set its alpha; returns the exstyle (no caching, any thread)"""
+    style = backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+    if not (style & wb.WS_EX_LAYERED):
+        style |= wb.WS_EX_LAYERED
+        backend.SetWindowLong(hwnd, wb.GWL_EXSTYLE, style)
+    backend.SetLayeredWindowAttributes(hwnd, 0, alpha, wb.LWA_ALPHA)
+    return style
+
+
+class OpacityApplier:
+    """Latest-value-wins SetLayeredWindowAttributes with a rate limit.
+
+    schedule(ms, fn) must run fn later on the owning thread (root.after);
+    cache (a WindowStateCache) is invalidated for every window written;
+    executor (an ActionExecutor) makes the writes, inline if None.
+    """
+
+    def __init__(self, backend, schedule, max_rate=30, cache=None, executor=None):
+        self.backend = backend
+        self.cache = cache
+        self.executor = executor
+        self.schedule = schedule
+        self.max_rate = max_rate
+        self.pending = {}   # hwnd -> newest requested alpha
+        self.applied = {}   # hwnd -> alpha last written
+        self.layered = set()  # hwnds known to have WS_EX_LAYERED
+        self.requests = 0   # set() calls
+        self.coalesced = 0  # requests replaced before they were applied
+        self.skipped = 0    # applies dropped because the alpha was unchanged
+        self.calls = 0      # win32 calls issued
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()  # applied, layered and calls; never held over win32 calls
+
+    def set(self, hwnd, alpha):
+        """Request alpha (0-255) for hwnd; applied on the next rate slot"""
+        self.requests += 1
+        if hwnd in self.pending:
+            self.coalesced += 1
+        self.pending[hwnd] = alpha
+        if not self._scheduled:
+            self._scheduled = True
+            interval = 1.0 / self.max_rate if self.max_rate else 0.0
+            wait = self._last_flush + interval - time.perf_counter()
+            self.schedule(max(0, int(wait * 1000)), self.flush)
+
+    def flush(self):
+        """Apply every pending alpha now"""
+        self._scheduled = False
+        self._last_flush = time.perf_counter()
+        pending, self.pending = self.pending, {}
+        for hwnd, alpha in pending.items():
+            if self.executor is not None:
+                self.executor.submit(OPACITY, hwnd, alpha, self._apply,
+                                     lambda future, hwnd=hwnd: self._applied(hwnd, future))
+                continue
+            try:
+                self.apply(hwnd, alpha)
+            except Exception as e:
+                self.forget(hwnd)
+                print(f"Error updating level: {e}")
+
+    def _apply(self, backend, hwnd, alpha):
+        self.apply(hwnd, alpha)
+
+    def _applied(self, hwnd, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.forget(hwnd)
+            print(f"Error updating level: {future.exception()}")
+
+    def apply(self, hwnd, alpha):
+        with self._lock:
+            if self.applied.get(hwnd) == alpha:
+                self.skipped += 1
+                return
+            layered = hwnd in self.layered
+        calls = 1
+        if not layered:
+            style = self.backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+            calls += 1
+            # Add WS_EX_LAYERED if not present
+            if not (style & wb.WS_EX_LAYERED):
+                self.backend.SetWindowLong(hwnd, wb.GWL_EXSTYLE, style | wb.WS_EX_LAYERED)
+                calls += 1
+        self.backend.SetLayeredWindowAttributes(hwnd, 0, alpha, wb.LWA_ALPHA)
+        with self._lock:
+            self.calls += calls
+            self.layered.add(hwnd)
+            self.applied[hwnd] = alpha
+        if self.cache is not None:
+            self.cache.invalidate(hwnd)
+
+    def note(self, hwnd, alpha, style=None):
+        """Record state read from the window itself (e.g. on selection)"""
+        with self._lock:
+            self.applied[hwnd] = alpha
+            if style is not None:
+                if style & wb.WS_EX_LAYERED:
+                    self.layered.add(hwnd)
+                else:
+                    self.layered.discard(hwnd)
+
+    def forget(self, hwnd):
+        """Drop cached state for hwnd (window changed behind our back)"""
+        with self._lock:
+            self.applied.pop(hwnd, None)
+            self.layered.discard(hwnd)
+
+    def stats(self):
+        return {'requests': self.requests, 'coalesced': self.coalesced,
+                'skipped': self.skipped, 'calls': self.calls}
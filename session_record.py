@@ -0,0 +1,379 @@
+"""Recording of real sessions for replay on the simulated desktop.
+
+SessionRecorder captures what a performance report from a real desktop
+depends on and writes it as gzipped JSON lines (CTT_RECORD=<file>):
+
+    header   the desktop when recording started (every window with its
+             title, class, process, visibility, exstyle, alpha and hung
+             state), the foreground window and the saved rules
+    calls    every window-system call: arguments, result (EnumWindows:
+             the enumerated hwnds), error and duration
+    actions  every user action (buttons, list selection, slider, typing,
+             hotkeys, forwarded command lines) with its parameters, the
+             time spent in the handler and how long until the UI was idle
+             again (settle)
+
+Actions are recorded where main.py binds its handlers (recorded()), so
+follow-up work the app starts on its own is not mistaken for input.
+Control API requests are not recorded.  Backend calls are wrapped on the
+instance like CallTracer does; records are buffered and written every
+FLUSH_EVENTS, so the hot path only appends a short list.
+
+benchmarks/replay_session.py replays a recording; load_session() and
+summarize() read one back.
+"""
+import gzip
+import json
+import os
+import platform
+import threading
+import time
+from collections import namedtuple
+
+import window_backend as wb
+from win32_trace import TRACED
+
+FORMAT = "ctt-session"
+VERSION = 1
+FLUSH_EVENTS = 20000  # buffered records per write
+SETTLE_POLL = 2       # ms between idle checks while an action is unsettled
+
+# Arguments/results that are handles to a temporary batch, not window state
+BATCH_ARG = {'DeferWindowPos': 0, 'EndDeferWindowPos': 0}
+BATCH_RESULT = ('BeginDeferWindowPos', 'DeferWindowPos')
+
+Call = namedtuple('Call', 't thread name args result duration error')
+Action = namedtuple('Action', 't seq name params duration thread error settle')
+Session = namedtuple('Session', 'header threads calls actions duration')
+
+
+def _plain(value):
+    """value as JSON (tuples become lists, anything else None)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return [_plain(item) for item in value]
+    return None
+
+
+def capture_desktop(backend):
+    """Every top-level window as [hwnd, title, class, process, visible, iconic, exstyle, alpha, flags, hung]"""
+    hwnds = []
+    backend.EnumWindows(lambda hwnd, _: hwnds.append(hwnd) or True, None)
+    windows = []
+    for hwnd in hwnds:
+        try:
+            exstyle = backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+            alpha, flags = 255, 0
+            if exstyle & wb.WS_EX_LAYERED:
+                try:
+                    _, alpha, flags = backend.GetLayeredWindowAttributes(hwnd)
+                except Exception:
+                    pass
+            # InternalGetWindowText never sends a message, so a hung window cannot block us
+            windows.append([hwnd, backend.InternalGetWindowText(hwnd), backend.GetClassName(hwnd),
+                            backend.GetWindowProcessName(hwnd), bool(backend.IsWindowVisible(hwnd)),
+                            bool(backend.IsIconic(hwnd)), exstyle, alpha, flags,
+                            bool(backend.IsHungAppWindow(hwnd))])
+        except Exception:
+            continue  # closed while we looked at it
+    try:
+        foreground = backend.GetForegroundWindow()
+    except Exception:
+        foreground = 0
+    return {'foreground': foreground, 'windows': windows}
+
+
+def app_idle(app):
+    """True once nothing the app started is still running or queued"""
+    return (not app.enumerator.busy and app.snapshot_poll is None and app.filter_job is None
+            and app.restore_job is None and not len(app.actions) and app.actions.current is None
+            and not app.opacity.pending and not len(app.ui_queue))
+
+
+class SessionRecorder:
+    """Records one app's desktop, win32 calls and user actions to path"""
+
+    def __init__(self, path, flush_events=FLUSH_EVENTS):
+        self.path = path
+        self.flush_events = flush_events
+        self.app = None
+        self.backend = None
+        self.handlers = {}   # action name -> recorded handler (used by the replayer)
+        self.recording = False
+        self.origin = time.perf_counter()
+        self.actions = 0
+        self.calls = 0
+        self._buffer = []
+        self._threads = {}    # thread ident -> index
+        self._unsettled = []  # seqs of actions waiting for the UI to go idle
+        self._watching = False
+        self._tk_thread = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def install(self, app):
+        """Capture app's desktop, write the header and start recording"""
+        backend = app.backend
+        desktop = capture_desktop(backend)
+        self.origin = time.perf_counter()
+        self.app = app
+        self._tk_thread = threading.get_ident()
+        header = {'format': FORMAT, 'version': VERSION, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                  'platform': platform.platform(), 'backend': backend.name,
+                  'list_mode': os.environ.get("CTT_LIST_MODE", "tree"),
+                  'rules': [rule.to_dict() for rule in app.window_rules.rules], 'desktop': desktop}
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for name in TRACED:
+            method = getattr(backend, name)
+            if name == 'EnumWindows':
+                setattr(backend, name, self._wrap_enum(method))
+            elif name != 'GetTickCount':  # no window state, called on every idle check
+                setattr(backend, name, self._wrap(name, method))
+        self.backend = backend
+        self.recording = True
+        return self
+
+    def started(self):
+        """Record app start-up (install -> now) as the 'startup' action"""
+        self.action('startup', [], self.origin, time.perf_counter() - self.origin)
+
+    def close(self):
+        """Stop recording and finish the file (wrappers stay, as pass-throughs)"""
+        with self._lock:
+            if not self.recording:
+                return
+            self.recording = False
+            self._buffer.append(['x', round(time.perf_counter() - self.origin, 6)])
+            self._flush()
+            self._file.close()
+            self._file = None
+        print(f"Recorded {self.actions} actions and {self.calls} calls to {self.path}")
+
+    # --- recording ---
+
+    def _thread(self):
+        ident = threading.get_ident()
+        index = self._threads.get(ident)
+        if index is None:
+            index = self._threads[ident] = len(self._threads)
+            self._buffer.append(['t', index, threading.current_thread().name])
+        return index
+
+    def _append(self, record, error=None):
+        if error is not None:
+            record.append(error)
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_events:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write("".join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+                                     for record in self._buffer))
+            self._buffer = []
+
+    def call(self, name, args, result, started, duration, error=None):
+        with self._lock:
+            if not self.recording:
+                return
+            self.calls += 1
+            self._append(['c', round(started - self.origin, 6), self._thread(), name, args, result,
+                          round(duration, 7)], error)
+
+    def _wrap(self, name, method):
+        clock = time.perf_counter
+        batch_arg = BATCH_ARG.get(name)
+        batch_result = name in BATCH_RESULT
+
+        def recorded(*args):
+            if not self.recording:
+                return method(*args)
+            started = clock()
+            try:
+                result = method(*args)
+            except Exception as e:
+                self.call(name, self._args(args, batch_arg), None, started, clock() - started,
+                          f"{type(e).__name__}: {e}")
+                raise
+            self.call(name, self._args(args, batch_arg), None if batch_result else _plain(result),
+                      started, clock() - started)
+            return result
+        recorded.__name__ = name
+        return recorded
+
+    @staticmethod
+    def _args(args, batch_arg):
+        if batch_arg is not None:
+            args = args[:batch_arg] + (None,) + args[batch_arg + 1:]
+        return _plain(args)
+
+    def _wrap_enum(self, method):
+        clock = time.perf_counter
+
+        def recorded(callback, extra):
+            if not self.recording:
+                return method(callback, extra)
+            hwnds = []
+
+            def collecting(hwnd, ctx):
+                hwnds.append(hwnd)
+                return callback(hwnd, ctx)
+            started = clock()
+            try:
+                result = method(collecting, extra)
+            except Exception as e:
+                self.call('EnumWindows', [], hwnds, started, clock() - started, f"{type(e).__name__}: {e}")
+                raise
+            self.call('EnumWindows', [], hwnds, started, clock() - started)
+            return result
+        recorded.__name__ = 'EnumWindows'
+        return recorded
+
+    def action(self, name, params, started, duration, error=None):
+        with self._lock:
+            if not self.recording:
+                return
+            self.actions += 1
+            seq = self.actions
+            self._append(['a', round(started - self.origin, 6), seq, name, params, round(duration, 6),
+                          self._thread()], error)
+            self._unsettled.append(seq)
+            if self._watching:
+                return
+            self._watching = True
+        if threading.get_ident() == self._tk_thread:
+            self._watch()
+        else:
+            self.app.ui_queue.post(self._watch)
+
+    def wrap(self, name, handler, params=None):
+        """handler recording each call as action name.
+
+        params(*args) -> JSON list of what the replayer needs (default: args).
+        """
+        clock = time.perf_counter
+
+        def recorded(*args):
+            if not self.recording:
+                return handler(*args)
+            values = _plain(list(args) if params is None else params(*args))
+            started = clock()
+            try:
+                result = handler(*args)
+            except Exception as e:
+                self.action(name, values, started, clock() - started, f"{type(e).__name__}: {e}")
+                raise
+            self.action(name, values, started, clock() - started)
+            return result
+        recorded.__name__ = getattr(handler, '__name__', name)
+        self.handlers[name] = recorded
+        return recorded
+
+    def _watch(self):
+        """Poll (Tk thread) until the app is idle, then settle the waiting actions"""
+        if not app_idle(self.app):
+            try:
+                self.app.root.after(SETTLE_POLL, self._watch)
+                return
+            except Exception:
+                pass  # root destroyed: settle now
+        now = round(time.perf_counter() - self.origin, 6)
+        with self._lock:
+            self._watching = False
+            if not self.recording:
+                return
+            for seq in self._unsettled:
+                self._append(['s', seq, now])
+            self._unsettled = []
+
+    @property
+    def unsettled(self):
+        with self._lock:
+            return len(self._unsettled)
+
+
+def start_recording(app, path=None):
+    """SessionRecorder installed on app if path or CTT_RECORD is set, else None"""
+    path = path or os.environ.get("CTT_RECORD")
+    if not path:
+        return None
+    try:
+        recorder = SessionRecorder(path).install(app)
+    except OSError as e:
+        print(f"Session recording unavailable: {e}")
+        return None
+    print(f"Recording the session to {path}")
+    return recorder
+
+
+# --- reading ---
+
+def load_session(path):
+    """Session(header, threads, calls, actions, duration) of a recording"""
+    threads = {}
+    calls = []
+    actions = []
+    settled = {}
+    duration = 0.0
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a session recording")
+        if header.get('version', 0) > VERSION:
+            raise ValueError(f"{path} needs a newer version (format {header['version']})")
+        for line in f:
+            record = json.loads(line)
+            kind = record[0]
+            if kind == 'c':
+                t, thread, name, args, result, elapsed = record[1:7]
+                calls.append(Call(t, thread, name, args, result, elapsed, record[7] if len(record) > 7 else None))
+                duration = max(duration, t + elapsed)
+            elif kind == 'a':
+                t, seq, name, params, elapsed, thread = record[1:7]
+                actions.append(Action(t, seq, name, params, elapsed, thread,
+                                      record[7] if len(record) > 7 else None, None))
+                duration = max(duration, t + elapsed)
+            elif kind == 's':
+                settled[record[1]] = record[2]
+            elif kind == 't':
+                threads[record[1]] = record[2]
+            elif kind == 'x':
+                duration = max(duration, record[1])
+    actions = [action._replace(settle=settled[action.seq] - action.t) if action.seq in settled else action
+               for action in actions]
+    calls.sort(key=lambda call: call.t)  # appended when they returned
+    actions.sort(key=lambda action: action.t)
+    return Session(header, threads, calls, actions, duration)
+
+
+def _stats(samples):
+    """ms statistics of samples (seconds)"""
+    if not samples:
+        return None
+    ms = sorted(sample * 1000 for sample in samples)
+    return {'mean': round(sum(ms) / len(ms), 3), 'p50': round(ms[len(ms) // 2], 3),
+            'p95': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3), 'max': round(ms[-1], 3)}
+
+
+def summarize(session):
+    """Per action: count, handler and settle ms; per call: count and time"""
+    grouped = {}
+    for action in session.actions:
+        grouped.setdefault(action.name, []).append(action)
+    actions = {}
+    for name, group in grouped.items():
+        actions[name] = {'count': len(group), 'errors': sum(1 for action in group if action.error),
+                         'handler': _stats([action.duration for action in group]),
+                         'settle': _stats([action.settle for action in group if action.settle is not None])}
+    totals = {}
+    for call in session.calls:
+        stats = totals.get(call.name)
+        if stats is None:
+            stats = totals[call.name] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += call.duration
+    calls = {name: {'count': count, 'total_ms': round(total * 1000, 3), 'mean_us': round(total / count * 1e6, 2)}
+             for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1])}
+    return {'duration_s': round(session.duration, 3), 'actions': actions, 'calls': calls}
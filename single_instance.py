@@ -0,0 +1,233 @@
+"""One running tool per session; later launches hand it their command line.
+
+main.py calls send() before importing tkinter, pystray or PIL: if an
+instance is already listening, the launch's arguments go to it over a
+local channel (a named pipe on Windows, a Unix socket elsewhere) and the
+launch exits within milliseconds.  Otherwise acquire() takes the
+instance lock (a named mutex on Windows, a locked file elsewhere) and
+the new instance starts a CommandServer once its UI exists.
+
+Only the standard library is used, and the client side imports nothing
+on Windows, so a second launch never pays for the heavy modules.  A
+message is the sender's working directory and arguments, NUL-separated.
+"""
+import os
+
+INSTANCE_NAME = "CustomTestTool"
+CONNECT_TIMEOUT = 2.0  # how long a launch waits for a running instance that is still starting
+
+ERROR_ALREADY_EXISTS = 183
+ERROR_PIPE_CONNECTED = 535
+PIPE_ACCESS_INBOUND = 0x00000001
+PIPE_REJECT_REMOTE_CLIENTS = 0x00000008
+PIPE_UNLIMITED_INSTANCES = 255
+
+
+def channel_address(name=INSTANCE_NAME):
+    """Named pipe or Unix socket path of the running instance"""
+    if os.name == "nt":
+        return rf"\\.\pipe\{name}-{os.environ.get('USERNAME', '')}"
+    return os.path.join(runtime_dir(name), f"{name}-{os.getuid()}.sock")
+
+
+def runtime_dir(name=INSTANCE_NAME):
+    """Directory only this user can write to, for the socket and lock file (not Windows).
+
+    XDG_RUNTIME_DIR when set, else a 0700 folder of our own in the temp
+    directory; raises OSError if another user got to create that first.
+    """
+    folder = os.environ.get("XDG_RUNTIME_DIR")
+    if folder:
+        return folder
+    import stat
+    import tempfile
+    folder = os.path.join(tempfile.gettempdir(), f"{name}-{os.getuid()}")
+    try:
+        os.mkdir(folder, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(folder)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise OSError(f"Refusing to use {folder}: not a private directory of this user")
+    return folder
+
+
+def encode(cwd, argv):
+    return "\0".join([cwd] + list(argv)).encode('utf-8')
+
+
+def decode(data):
+    """(cwd, argv) of a message"""
+    parts = data.decode('utf-8', 'replace').split("\0")
+    return parts[0], parts[1:]
+
+
+def send(argv, name=INSTANCE_NAME, timeout=0.0):
+    """Hand argv to the running instance; False if none is listening.
+
+    A busy or not yet listening channel is retried for timeout seconds.
+    """
+    import time
+    data = encode(os.getcwd(), argv)
+    address = channel_address(name)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if os.name == "nt":
+                with open(address, 'wb', buffering=0) as pipe:
+                    pipe.write(data)
+            else:
+                import socket
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(address)
+                    sock.sendall(data)
+            return True
+        except OSError:
+            # No listener (FileNotFoundError/ConnectionRefusedError) or all pipe instances busy
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+
+class InstanceLock:
+    """Held for the lifetime of the running instance"""
+
+    def __init__(self, handle, release):
+        self.handle = handle
+        self._release = release
+
+    def release(self):
+        if self.handle is not None:
+            self._release(self.handle)
+            self.handle = None
+
+
+def acquire(name=INSTANCE_NAME):
+    """Take the instance lock; None if another instance holds it"""
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateMutexW.restype = wintypes.HANDLE
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        # Local\: hotkeys and windows are per session, so is the tool
+        handle = kernel32.CreateMutexW(None, False, f"Local\\{name}")
+        if not handle:
+            return None
+        if kernel32.GetLastError() == ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(handle)
+            return None
+        return InstanceLock(handle, kernel32.CloseHandle)
+
+    import fcntl
+    lock_file = open(channel_address(name) + ".lock", 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return InstanceLock(lock_file, lambda f: f.close())
+
+
+class CommandServer:
+    """Receives the command lines of later launches on a daemon thread.
+
+    handler(cwd, argv) runs on the server thread; marshal to Tk with
+    root.after.  Hold the InstanceLock before starting a server.
+    """
+
+    def __init__(self, handler, name=INSTANCE_NAME):
+        self.handler = handler
+        self.address = channel_address(name)
+        self.received = 0
+        self._running = False
+        self._thread = None
+        self._socket = None
+
+    def start(self):
+        import threading
+        if os.name != "nt":
+            import socket
+            try:
+                os.unlink(self.address)  # left behind by a crashed instance (we hold the lock)
+            except FileNotFoundError:
+                pass
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self.address)
+            self._socket.listen(8)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve_pipe if os.name == "nt" else self._serve_socket,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        # Wake the thread blocked in ConnectNamedPipe/accept
+        if os.name == "nt":
+            send([], timeout=0.2)
+        else:
+            self._socket.close()
+        self._thread.join(timeout=1.0)
+        if os.name != "nt":
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+    def _dispatch(self, data):
+        if not self._running:
+            return
+        self.received += 1
+        try:
+            self.handler(*decode(data))
+        except Exception as e:
+            print(f"Error handling command: {e}")
+
+    def _serve_socket(self):
+        while self._running:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return  # closed by stop()
+            with conn:
+                chunks = []
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            self._dispatch(b"".join(chunks))
+
+    def _serve_pipe(self):
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateNamedPipeW.restype = wintypes.HANDLE
+        kernel32.ConnectNamedPipe.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+        kernel32.ReadFile.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+                                      ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID]
+        kernel32.DisconnectNamedPipe.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        invalid = ctypes.c_void_p(-1).value  # INVALID_HANDLE_VALUE as HANDLE returns it
+        buffer = ctypes.create_string_buffer(65536)
+        read = wintypes.DWORD()
+        while self._running:
+            pipe = kernel32.CreateNamedPipeW(self.address, PIPE_ACCESS_INBOUND,
+                                             PIPE_REJECT_REMOTE_CLIENTS, PIPE_UNLIMITED_INSTANCES,
+                                             0, len(buffer), 0, None)
+            if pipe is None or pipe == invalid:
+                print(f"CreateNamedPipe failed: {kernel32.GetLastError()}")
+                return
+            try:
+                if not kernel32.ConnectNamedPipe(pipe, None) and kernel32.GetLastError() != ERROR_PIPE_CONNECTED:
+                    continue
+                chunks = []
+                while kernel32.ReadFile(pipe, buffer, len(buffer), ctypes.byref(read), None) and read.value:
+                    chunks.append(buffer.raw[:read.value])
+                kernel32.DisconnectNamedPipe(pipe)
+            finally:
+                kernel32.CloseHandle(pipe)
+            self._dispatch(b"".join(chunks))
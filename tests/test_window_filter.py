@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enumeration import WindowInfo  # noqa: E402
+from window_events import WindowPatch  # noqa: E402
+from window_filter import WindowFilter  # noqa: E402
+
+
+def make_filter(count):
+    index = WindowFilter()
+    index.load(tuple(WindowInfo(hwnd, f"Window {hwnd} - Chrome", 0, 255, "chrome.exe")
+                     for hwnd in range(1, count + 1)))
+    return index
+
+
+class PatchDuringPassTest(unittest.TestCase):
+    """A window-event patch may land between begin(), step() and commit()"""
+
+    def test_removal_mid_pass(self):
+        index = make_filter(5000)
+        filter_pass = index.begin("window")
+        self.assertFalse(filter_pass.step())  # first 2000 candidates
+        index.apply_patch(WindowPatch((), (4000,), 1))
+        while not filter_pass.step():
+            pass
+        windows = index.commit(filter_pass)
+        self.assertEqual(len(windows), 4999)
+        self.assertNotIn(4000, [info.hwnd for info in windows])
+
+    def test_removal_before_commit(self):
+        for query in ("", "chrome"):
+            index = make_filter(10)
+            filter_pass = index.begin(query)
+            while not filter_pass.step():
+                pass
+            index.apply_patch(WindowPatch((), (3,), 1))
+            windows = index.commit(filter_pass)
+            self.assertEqual(sorted(info.hwnd for info in windows), [1, 2, 4, 5, 6, 7, 8, 9, 10])
+
+    def test_narrowing_after_removal(self):
+        index = make_filter(10)
+        filter_pass = index.begin("win")
+        index.apply_patch(WindowPatch((), (3,), 1))
+        while not filter_pass.step():
+            pass
+        index.commit(filter_pass)
+        narrowed = index.begin("window")
+        while not narrowed.step():
+            pass
+        self.assertNotIn(3, [info.hwnd for info in index.commit(narrowed)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Queue carrying UI work from other threads to the Tk thread.
+
+Tk must only be touched from the thread running mainloop, yet hotkeys,
+the tray icon, the command server and the control API all run on their
+own threads.  They post() callables here instead; a single root.after
+pump on the Tk thread runs them in order.
+
+post() is a deque append (atomic in CPython, no lock) and never touches
+Tk.  The pump polls every MIN_INTERVAL ms while work keeps arriving and
+backs off to MAX_INTERVAL ms when idle; one pump runs for at most BUDGET
+seconds so a burst cannot starve redraws.  stats() reports the queue
+depth and how long items waited (post -> run).
+"""
+import time
+from collections import deque
+
+from latency import LatencyHistogram
+
+MIN_INTERVAL = 1   # ms between pumps while busy
+MAX_INTERVAL = 50  # ms between pumps when idle (worst-case wait for the first item)
+BUDGET = 0.008     # seconds of queued work per pump
+
+
+class UiQueue:
+    """post() from any thread; start() on the Tk thread"""
+
+    def __init__(self, root, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, budget=BUDGET):
+        self.root = root
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.interval = min_interval
+        self.posted = 0
+        self.ran = 0
+        self.errors = 0
+        self.pumps = 0
+        self.max_depth = 0
+        self.wait = LatencyHistogram()  # post -> run
+        self._items = deque()
+        self._job = None
+        self._running = False
+        self._stopped = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def post(self, fn, *args):
+        """Run fn(*args) on the Tk thread (thread-safe, never blocks)"""
+        self._items.append((fn, args, time.perf_counter()))
+        self.posted += 1
+        depth = len(self._items)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._stopped = False
+            self._job = self.root.after(self.interval, self._pump)
+        return self
+
+    def stop(self):
+        """Stop pumping (safe from a queued task); queued items are dropped"""
+        self._running = False
+        self._stopped = True
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def drain(self, budget=None):
+        """Run queued items on the calling (Tk) thread; returns how many ran"""
+        items = self._items
+        started = time.perf_counter()
+        deadline = started + (self.budget if budget is None else budget)
+        count = 0
+        while items:
+            fn, args, posted = items.popleft()
+            now = time.perf_counter()
+            self.wait.record(now - posted)
+            try:
+                fn(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"UI task {getattr(fn, '__name__', fn)} failed: {e}")
+            count += 1
+            if now >= deadline or self._stopped:
+                break
+        self.ran += count
+        return count
+
+    def _pump(self):
+        self._job = None
+        self.pumps += 1
+        if self.drain() or self._items:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        if self._running:  # unless a task stopped us (exit)
+            self._job = self.root.after(self.interval, self._pump)
+
+    def stats(self):
+        """Depth, counters and post -> run wait (ms)"""
+        return {'depth': len(self._items), 'max_depth': self.max_depth, 'posted': self.posted,
+                'ran': self.ran, 'errors': self.errors, 'pumps': self.pumps,
+                'interval_ms': self.interval, 'wait': self.wait.summary()}
+
+    def format(self):
+        stats = self.stats()
+        wait = stats['wait']
+        return (f"UI 큐: 대기 {stats['depth']} (최대 {stats['max_depth']}), 처리 {stats['ran']}, "
+                f"지연 p50 {wait['p50']:.2f} / p99 {wait['p99']:.2f} / 최대 {wait['max']:.2f} ms")
@@ -0,0 +1,202 @@
+"""Virtualized window list for very large desktops.
+
+A plain ttk.Treeview keeps one Tk item per window.  VirtualWindowList
+keeps a fixed pool of slot items (one per viewport row) and fills them
+from the WindowRegistry as the user scrolls, so Tk cost stays constant
+no matter how many windows are listed.  Selection is tracked by hwnd and
+survives scrolling and refreshes; the arrow, page, Home/End keys and the
+mouse wheel are handled here instead of by Tk.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualWindowList:
+    """Treeview look-alike showing registry.order through a slot window"""
+
+    def __init__(self, parent, registry, on_select, height=10):
+        self.registry = registry
+        self.on_select = on_select  # callback(hwnd) on user selection
+        self.visible_rows = height
+        self.offset = 0          # registry.order index shown in slot 0
+        self.selected = None     # selected hwnd
+        self.slots = []          # slot item ids
+        self.slot_hwnds = []     # hwnd rendered in each slot (None = empty)
+        self.slot_rows = []      # (text, values) rendered in each slot
+
+        self.scrollbar = ttk.Scrollbar(parent, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(parent, columns=('transparency', 'taskbar'), show='tree headings',
+                                 height=height, selectmode='browse')
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+        self.tree.bind('<Configure>', self.on_configure)
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        for key, delta in (('<Up>', -1), ('<Down>', 1)):
+            self.tree.bind(key, lambda e, d=delta: self.move_selection(d))
+        self.tree.bind('<Prior>', lambda e: self.move_selection(-self.visible_rows))
+        self.tree.bind('<Next>', lambda e: self.move_selection(self.visible_rows))
+        self.tree.bind('<Home>', lambda e: self.move_selection(-len(self.registry.order)))
+        self.tree.bind('<End>', lambda e: self.move_selection(len(self.registry.order)))
+
+        self._ensure_slots()
+
+    def _row_height(self):
+        try:
+            return int(ttk.Style().lookup('Treeview', 'rowheight')) or DEFAULT_ROW_HEIGHT
+        except Exception:
+            return DEFAULT_ROW_HEIGHT
+
+    def _ensure_slots(self):
+        """Create or drop slot items to match the viewport"""
+        # The Treeview never scrolls, so rows past the viewport would never be seen;
+        # one extra slot fills the partly visible bottom row
+        wanted = self.visible_rows + 1
+        while len(self.slots) < wanted:
+            self.slots.append(self.tree.insert('', 'end', text='', values=('', '')))
+            self.slot_hwnds.append(None)
+            self.slot_rows.append(None)
+        while len(self.slots) > wanted:
+            self.tree.delete(self.slots.pop())
+            self.slot_hwnds.pop()
+            self.slot_rows.pop()
+
+    # --- rendering ---
+
+    def refresh(self):
+        """Re-render the slots from the registry (call after any change)"""
+        order = self.registry.order
+        max_offset = max(0, len(order) - self.visible_rows)
+        self.offset = min(self.offset, max_offset)
+        records = self.registry.records
+        selected_slot = None
+        for slot_index, item in enumerate(self.slots):
+            index = self.offset + slot_index
+            hwnd = order[index] if index < len(order) else None
+            record = records.get(hwnd) if hwnd is not None else None
+            row = (record.title, record.values or ('', '')) if record is not None else ('', ('', ''))
+            if self.slot_rows[slot_index] != row:
+                self.tree.item(item, text=row[0], values=row[1])
+                self.slot_rows[slot_index] = row
+            self.slot_hwnds[slot_index] = hwnd
+            if hwnd is not None and hwnd == self.selected:
+                selected_slot = item
+
+        current = self.tree.selection()
+        if selected_slot is None:
+            if current:
+                self.tree.selection_remove(*current)
+        elif current != (selected_slot,):
+            self.tree.selection_set(selected_slot)
+            self.tree.focus(selected_slot)
+        # The slots never scroll themselves; only self.offset moves
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def update_row(self, hwnd):
+        """Re-render hwnd's slot if it is on screen"""
+        try:
+            slot_index = self.slot_hwnds.index(hwnd)
+        except ValueError:
+            return
+        record = self.registry.get(hwnd)
+        if record is None:
+            return
+        row = (record.title, record.values or ('', ''))
+        if self.slot_rows[slot_index] != row:
+            self.tree.item(self.slots[slot_index], text=row[0], values=row[1])
+            self.slot_rows[slot_index] = row
+
+    def _update_scrollbar(self):
+        total = len(self.registry.order)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
+
+    # --- scrolling ---
+
+    def scroll_to(self, offset):
+        max_offset = max(0, len(self.registry.order) - self.visible_rows)
+        offset = max(0, min(int(offset), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def see(self, index):
+        """Scroll so that registry.order[index] is inside the viewport"""
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+
+    def on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * len(self.registry.order))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.scroll(amount)
+
+    def on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_configure(self, event):
+        rows = max(1, event.height // self._row_height() - 1)  # minus the heading row
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._ensure_slots()
+            self.refresh()
+
+    # --- selection ---
+
+    def select(self, hwnd, notify=True):
+        """Select hwnd (scrolling it into view)"""
+        self.selected = hwnd
+        index = self.registry.index_of(hwnd) if hwnd is not None else None
+        if index is not None:
+            self.see(index)
+        self.refresh()
+        if notify and hwnd is not None:
+            self.on_select(hwnd)
+
+    def move_selection(self, delta):
+        order = self.registry.order
+        if not order:
+            return "break"
+        index = self.registry.index_of(self.selected)
+        if index is None:
+            index = self.offset if delta > 0 else self.offset + self.visible_rows - 1
+            delta = 0
+        index = max(0, min(len(order) - 1, index + delta))
+        self.select(order[index])
+        return "break"
+
+    def on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        try:
+            hwnd = self.slot_hwnds[self.slots.index(selection[0])]
+        except ValueError:
+            return
+        if hwnd is None:
+            # Clicked an empty slot: put the highlight back where it belongs
+            self.refresh()
+            return
+        if hwnd == self.selected:
+            return
+        self.selected = hwnd
+        self.on_select(hwnd)
@@ -0,0 +1,178 @@
+"""Opt-in tracing of every window-system call, exported as a Chrome trace.
+
+CallTracer.install(backend) shadows each WindowBackend method on that one
+backend instance with a timing wrapper (EnumWindows also times every
+callback it makes).  It keeps per-call counts and cumulative time, a
+per-window breakdown and the last max_events calls, which export() writes
+as Chrome trace-event JSON for chrome://tracing or ui.perfetto.dev.
+
+Nothing is wrapped unless tracing is enabled (CTT_TRACE=<file>), so
+without it every call goes straight to the backend class and costs
+nothing extra; uninstall() removes the wrappers again.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import window_backend as wb
+
+MAX_EVENTS = 200000  # newest calls kept for the trace file (about 20 MB)
+
+# Every call of the backend interface
+TRACED = tuple(name for name in vars(wb.WindowBackend) if name[:1].isupper())
+
+# Position of the hwnd argument where it is not the first one (None: no hwnd)
+HWND_ARG = {'EnumWindows': None, 'BeginDeferWindowPos': None, 'DeferWindowPos': 1,
+            'EndDeferWindowPos': None, 'GetForegroundWindow': None, 'GetTickCount': None,
+            'GetLastInputInfo': None, 'GetCursorPos': None}
+
+ENUM_CALLBACK = 'EnumWindows.callback'
+
+
+class CallTracer:
+    """Counts, times and records the calls made through one backend"""
+
+    def __init__(self, path=None, max_events=MAX_EVENTS):
+        self.path = path  # where export() writes by default
+        self.backend = None
+        self.calls = {}    # name -> [count, total seconds, max seconds]
+        self.by_hwnd = {}  # (name, hwnd) -> [count, total seconds]
+        self.events = deque(maxlen=max_events)  # (name, hwnd, start, duration, thread id)
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._threads = {}  # thread id -> name
+        self._lock = threading.Lock()
+
+    def install(self, backend):
+        """Start tracing backend's calls"""
+        self.uninstall()
+        for name in TRACED:
+            method = getattr(backend, name)
+            if name == 'EnumWindows':
+                setattr(backend, name, self._wrap_enum(method))
+            else:
+                setattr(backend, name, self._wrap(name, method, HWND_ARG.get(name, 0)))
+        self.backend = backend
+        return self
+
+    def uninstall(self):
+        """Put the backend's own methods back"""
+        if self.backend is not None:
+            for name in TRACED:
+                self.backend.__dict__.pop(name, None)
+            self.backend = None
+
+    def _wrap(self, name, method, hwnd_arg):
+        record = self.record
+        clock = time.perf_counter
+
+        def traced(*args):
+            started = clock()
+            try:
+                return method(*args)
+            finally:
+                record(name, args[hwnd_arg] if hwnd_arg is not None else None, started, clock() - started)
+        traced.__name__ = name
+        return traced
+
+    def _wrap_enum(self, method):
+        record = self.record
+        clock = time.perf_counter
+
+        def traced(callback, extra):
+            def traced_callback(hwnd, ctx):
+                started = clock()
+                try:
+                    return callback(hwnd, ctx)
+                finally:
+                    record(ENUM_CALLBACK, hwnd, started, clock() - started)
+            started = clock()
+            try:
+                return method(traced_callback, extra)
+            finally:
+                record('EnumWindows', None, started, clock() - started)
+        traced.__name__ = 'EnumWindows'
+        return traced
+
+    def record(self, name, hwnd, started, duration):
+        thread = threading.get_ident()
+        with self._lock:
+            stats = self.calls.get(name)
+            if stats is None:
+                stats = self.calls[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+            if hwnd is not None:
+                per_hwnd = self.by_hwnd.get((name, hwnd))
+                if per_hwnd is None:
+                    per_hwnd = self.by_hwnd[(name, hwnd)] = [0, 0.0]
+                per_hwnd[0] += 1
+                per_hwnd[1] += duration
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append((name, hwnd, started, duration, thread))
+            if thread not in self._threads:
+                self._threads[thread] = threading.current_thread().name
+
+    # --- reports ---
+
+    def summary(self, top=5):
+        """Per call: count, total/mean/max time and the top windows by time"""
+        with self._lock:
+            calls = {name: list(stats) for name, stats in self.calls.items()}
+            by_hwnd = list(self.by_hwnd.items())
+        windows = {}
+        for (name, hwnd), (count, total) in by_hwnd:
+            windows.setdefault(name, []).append((total, count, hwnd))
+        result = {}
+        for name, (count, total, longest) in sorted(calls.items(), key=lambda item: -item[1][1]):
+            heaviest = sorted(windows.get(name, ()), reverse=True)[:top]
+            result[name] = {'count': count, 'total_ms': round(total * 1000, 3),
+                            'mean_us': round(total / count * 1e6, 2), 'max_ms': round(longest * 1000, 3),
+                            'top_hwnds': [{'hwnd': hwnd, 'count': n, 'total_ms': round(t * 1000, 3)}
+                                          for t, n, hwnd in heaviest]}
+        return result
+
+    def format(self, limit=15):
+        """Plain-text table of the most expensive calls"""
+        lines = [f"{'call':<28}{'count':>8}{'total ms':>11}{'mean µs':>10}{'max ms':>9}  top window"]
+        for name, row in list(self.summary(top=1).items())[:limit]:
+            heaviest = row['top_hwnds'][0] if row['top_hwnds'] else None
+            where = f"{heaviest['hwnd']} ({heaviest['total_ms']:.1f} ms)" if heaviest else ""
+            lines.append(f"{name:<28}{row['count']:>8}{row['total_ms']:>11.1f}{row['mean_us']:>10.1f}"
+                         f"{row['max_ms']:>9.2f}  {where}")
+        return "\n".join(lines)
+
+    def export(self, path=None):
+        """Write the recorded calls as Chrome trace-event JSON"""
+        path = path or self.path
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in threads.items()]
+        for name, hwnd, started, duration, tid in events:
+            event = {'name': name, 'cat': 'win32', 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': round((started - self.origin) * 1e6, 3), 'dur': round(duration * 1e6, 3)}
+            if hwnd is not None:
+                event['args'] = {'hwnd': hwnd}
+            trace.append(event)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped, 'summary': self.summary()}}, f)
+        return path
+
+
+def start_tracing(backend, path=None):
+    """CallTracer installed on backend if path or CTT_TRACE is set, else None"""
+    path = path or os.environ.get("CTT_TRACE")
+    if not path:
+        return None
+    tracer = CallTracer(path).install(backend)
+    print(f"Tracing window-system calls to {path}")
+    return tracer
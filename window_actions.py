@@ -0,0 +1,179 @@
+"""Serialized executor for window-changing win32 calls.
+
+Changing another application's window (SetWindowLong, ShowWindow,
+SetWindowPlacement, ...) sends it messages and waits for it, so against
+a busy application a single call can take seconds.  ActionExecutor runs
+every such action on one worker thread, in submission order, and hands
+back a concurrent.futures.Future; the Tk thread only queues work.
+
+Actions still waiting in the queue are merged per (hwnd, kind):
+
+    opacity    a newer value replaces the queued one (last one wins)
+    taskbar    shown/hidden: the inverse of a queued change cancels both,
+               the same value joins the queued one
+    visible    a different value replaces the queued one, whose futures
+               are cancelled; the same value joins it
+
+A merged future completes together with the action it joined; a
+cancelled future means its change was never made.  Visibility is not
+cancelled in pairs because other code (and the user) shows and hides
+windows too: the executor cannot assume a window is still in the state
+its queued change started from, so the newest request is always made.
+on_done callbacks are passed to notify (UiQueue.post), so they run on
+the Tk thread.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import window_backend as wb
+
+OPACITY = 'opacity'
+TASKBAR = 'taskbar'
+VISIBLE = 'visible'
+ACTIVATE = 'activate'
+
+TOGGLES = (TASKBAR,)  # boolean kinds whose inverse cancels a queued change
+REPLACED = (VISIBLE,)  # kinds whose new value cancels and replaces a queued change
+
+
+def set_window_visible(backend, hwnd, visible):
+    """ShowWindow(SW_SHOW) or ShowWindow(SW_HIDE)"""
+    backend.ShowWindow(hwnd, wb.SW_SHOW if visible else wb.SW_HIDE)
+
+
+def activate_window(backend, hwnd, _=None):
+    """Restore if minimized, show and bring hwnd to the front"""
+    if backend.IsIconic(hwnd):
+        backend.ShowWindow(hwnd, wb.SW_RESTORE)
+    backend.ShowWindow(hwnd, wb.SW_SHOW)
+    backend.SetForegroundWindow(hwnd)
+
+
+class _Action:
+    __slots__ = ('kind', 'hwnd', 'value', 'fn', 'futures')
+
+    def __init__(self, kind, hwnd, value, fn, future):
+        self.kind = kind
+        self.hwnd = hwnd
+        self.value = value
+        self.fn = fn
+        self.futures = [future]
+
+
+class ActionExecutor:
+    """One worker thread running fn(backend, hwnd, value) actions in order"""
+
+    def __init__(self, backend, notify=None):
+        self.backend = backend
+        self.notify = notify  # notify(fn, *args) runs fn on the UI thread; None: call directly
+        self.submitted = 0
+        self.merged = 0     # joined or replaced a queued action
+        self.cancelled = 0  # dropped together with their inverse
+        self.executed = 0
+        self.failed = 0
+        self.current = None  # action running now
+        self._pending = OrderedDict()  # (hwnd, kind) -> _Action
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="window-actions", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Finish queued actions for at most timeout seconds, then stop"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._cond:
+            left = list(self._pending.values())
+            self._pending.clear()
+        for action in left:
+            for future in action.futures:
+                future.cancel()
+
+    def submit(self, kind, hwnd, value, fn, on_done=None):
+        """Queue fn(backend, hwnd, value); returns its Future.
+
+        on_done(future) runs on the UI thread once the action finished,
+        failed or was cancelled by its inverse.
+        """
+        future = Future()
+        if on_done is not None:
+            future.add_done_callback(lambda done: self._notify(on_done, done))
+        key = (hwnd, kind)
+        cancelled = None
+        with self._cond:
+            self.submitted += 1
+            queued = self._pending.get(key)
+            if queued is None:
+                self._pending[key] = _Action(kind, hwnd, value, fn, future)
+                self._cond.notify()
+            elif kind in TOGGLES and queued.value != value:
+                del self._pending[key]
+                self.cancelled += len(queued.futures) + 1
+                cancelled = queued.futures + [future]
+            elif kind in REPLACED and queued.value != value:
+                self.cancelled += len(queued.futures)
+                cancelled = queued.futures
+                queued.value = value
+                queued.fn = fn
+                queued.futures = [future]
+            else:
+                queued.value = value
+                queued.fn = fn
+                queued.futures.append(future)
+                self.merged += 1
+        if cancelled is not None:
+            for pending in cancelled:
+                pending.cancel()
+        return future
+
+    def _notify(self, fn, future):
+        if self.notify is None:
+            fn(future)
+        else:
+            self.notify(fn, future)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and self._running:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                _, action = self._pending.popitem(last=False)
+                self.current = action
+            futures = [future for future in action.futures if future.set_running_or_notify_cancel()]
+            try:
+                if futures:
+                    result = action.fn(self.backend, action.hwnd, action.value)
+                    self.executed += 1
+                    for future in futures:
+                        future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                for future in futures:
+                    future.set_exception(e)
+            finally:
+                self.current = None
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._pending)
+        return {'queued': queued, 'submitted': self.submitted, 'merged': self.merged,
+                'cancelled': self.cancelled, 'executed': self.executed, 'failed': self.failed}
@@ -0,0 +1,684 @@
+"""Window-system backends for Custom Test Tool.
+
+CustomTestTool never talks to win32gui directly; it goes through one of
+these backends.  Win32Backend forwards to pywin32 on a real desktop,
+SimulatedDesktop keeps an in-memory desktop so the hot paths can be
+profiled and load-tested on any machine (no Windows, no GPU).
+
+Method names mirror win32gui so call sites read the same as before.
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+# win32con values used by the tool (duplicated so the simulated backend
+# works without pywin32 installed)
+GWL_EXSTYLE = -20
+
+WS_EX_TOOLWINDOW = 0x00000080
+WS_EX_APPWINDOW = 0x00040000
+WS_EX_LAYERED = 0x00080000
+
+LWA_ALPHA = 0x2
+
+SW_HIDE = 0
+SW_SHOWNORMAL = 1
+SW_SHOWMINIMIZED = 2
+SW_SHOWNOACTIVATE = 4
+SW_SHOW = 5
+SW_MINIMIZE = 6
+SW_RESTORE = 9
+
+SWP_NOSIZE = 0x0001
+SWP_NOMOVE = 0x0002
+SWP_NOZORDER = 0x0004
+SWP_NOACTIVATE = 0x0010
+SWP_FRAMECHANGED = 0x0020
+SWP_SHOWWINDOW = 0x0040
+SWP_HIDEWINDOW = 0x0080
+
+HWND_TOP = 0
+HWND_BOTTOM = 1
+
+WM_GETTEXT = 0x000D
+SMTO_ABORTIFHUNG = 0x0002
+
+# WinEvent ids (SetWinEventHook) the tool listens to
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+
+
+class BackendError(Exception):
+    """Raised by the simulated backend where win32gui would raise pywintypes.error"""
+
+
+class WindowBackend:
+    """Interface of every window-system call the tool makes"""
+
+    name = "base"
+
+    def EnumWindows(self, callback, extra):
+        raise NotImplementedError
+
+    def IsWindow(self, hwnd):
+        raise NotImplementedError
+
+    def IsWindowVisible(self, hwnd):
+        raise NotImplementedError
+
+    def IsIconic(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindowText(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        """Title via WM_GETTEXT with SMTO_ABORTIFHUNG; None if it took over timeout seconds"""
+        raise NotImplementedError
+
+    def InternalGetWindowText(self, hwnd):
+        """Title as stored by the system; never sends a message, so never blocks"""
+        raise NotImplementedError
+
+    def IsHungAppWindow(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindowLong(self, hwnd, index):
+        raise NotImplementedError
+
+    def SetWindowLong(self, hwnd, index, value):
+        raise NotImplementedError
+
+    def GetLayeredWindowAttributes(self, hwnd):
+        raise NotImplementedError
+
+    def SetLayeredWindowAttributes(self, hwnd, color_key, alpha, flags):
+        raise NotImplementedError
+
+    def ShowWindow(self, hwnd, cmd):
+        raise NotImplementedError
+
+    def SetWindowPos(self, hwnd, insert_after, x, y, cx, cy, flags):
+        raise NotImplementedError
+
+    def BeginDeferWindowPos(self, count):
+        """Start a batch of window moves/shows applied together by EndDeferWindowPos"""
+        raise NotImplementedError
+
+    def DeferWindowPos(self, batch, hwnd, insert_after, x, y, cx, cy, flags):
+        """Add a SetWindowPos to batch; returns the (possibly new) batch handle"""
+        raise NotImplementedError
+
+    def EndDeferWindowPos(self, batch):
+        raise NotImplementedError
+
+    def GetWindowPlacement(self, hwnd):
+        raise NotImplementedError
+
+    def SetWindowPlacement(self, hwnd, placement):
+        raise NotImplementedError
+
+    def GetForegroundWindow(self):
+        raise NotImplementedError
+
+    def SetForegroundWindow(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindowProcessName(self, hwnd):
+        """Executable name of the process owning hwnd (e.g. 'chrome.exe')"""
+        raise NotImplementedError
+
+    def GetWindowThreadProcessId(self, hwnd):
+        """(thread id, process id) owning hwnd"""
+        raise NotImplementedError
+
+    def GetClassName(self, hwnd):
+        raise NotImplementedError
+
+    def GetTickCount(self):
+        raise NotImplementedError
+
+    def GetLastInputInfo(self):
+        """Tick count of the last keyboard/mouse input (win32api.GetLastInputInfo)"""
+        raise NotImplementedError
+
+    def GetCursorPos(self):
+        """(x, y) of the mouse pointer"""
+        raise NotImplementedError
+
+
+class Win32Backend(WindowBackend):
+    """Real desktop backend, a thin forwarder to win32gui"""
+
+    name = "win32"
+
+    def __init__(self):
+        import win32api
+        import win32gui
+        import win32process
+        self._api = win32api
+        self._gui = win32gui
+        self._process = win32process
+        self._process_names = {}  # pid -> exe name
+        self._user32 = None       # ctypes user32 for calls pywin32 does not wrap
+
+    def EnumWindows(self, callback, extra):
+        return self._gui.EnumWindows(callback, extra)
+
+    def IsWindow(self, hwnd):
+        return self._gui.IsWindow(hwnd)
+
+    def IsWindowVisible(self, hwnd):
+        return self._gui.IsWindowVisible(hwnd)
+
+    def IsIconic(self, hwnd):
+        return self._gui.IsIconic(hwnd)
+
+    def GetWindowText(self, hwnd):
+        return self._gui.GetWindowText(hwnd)
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        import ctypes
+        user32 = self._ctypes_user32()
+        buf = ctypes.create_unicode_buffer(512)
+        result = ctypes.c_size_t()
+        if not user32.SendMessageTimeoutW(hwnd, WM_GETTEXT, len(buf), ctypes.addressof(buf),
+                                          SMTO_ABORTIFHUNG, int(timeout * 1000), ctypes.byref(result)):
+            return None
+        return buf.value
+
+    def InternalGetWindowText(self, hwnd):
+        import ctypes
+        buf = ctypes.create_unicode_buffer(512)
+        self._ctypes_user32().InternalGetWindowText(hwnd, buf, len(buf))
+        return buf.value
+
+    def IsHungAppWindow(self, hwnd):
+        return bool(self._ctypes_user32().IsHungAppWindow(hwnd))
+
+    def _ctypes_user32(self):
+        if self._user32 is None:
+            import ctypes
+            from ctypes import wintypes
+            user32 = ctypes.WinDLL('user32', use_last_error=True)
+            user32.SendMessageTimeoutW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM,
+                                                   wintypes.LPARAM, wintypes.UINT, wintypes.UINT,
+                                                   ctypes.POINTER(ctypes.c_size_t)]
+            user32.SendMessageTimeoutW.restype = wintypes.LPARAM
+            user32.InternalGetWindowText.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+            user32.IsHungAppWindow.argtypes = [wintypes.HWND]
+            self._user32 = user32
+        return self._user32
+
+    def GetWindowLong(self, hwnd, index):
+        return self._gui.GetWindowLong(hwnd, index)
+
+    def SetWindowLong(self, hwnd, index, value):
+        return self._gui.SetWindowLong(hwnd, index, value)
+
+    def GetLayeredWindowAttributes(self, hwnd):
+        return self._gui.GetLayeredWindowAttributes(hwnd)
+
+    def SetLayeredWindowAttributes(self, hwnd, color_key, alpha, flags):
+        return self._gui.SetLayeredWindowAttributes(hwnd, color_key, alpha, flags)
+
+    def ShowWindow(self, hwnd, cmd):
+        return self._gui.ShowWindow(hwnd, cmd)
+
+    def SetWindowPos(self, hwnd, insert_after, x, y, cx, cy, flags):
+        return self._gui.SetWindowPos(hwnd, insert_after, x, y, cx, cy, flags)
+
+    def BeginDeferWindowPos(self, count):
+        return self._gui.BeginDeferWindowPos(count)
+
+    def DeferWindowPos(self, batch, hwnd, insert_after, x, y, cx, cy, flags):
+        return self._gui.DeferWindowPos(batch, hwnd, insert_after, (x, y, cx, cy), flags)
+
+    def EndDeferWindowPos(self, batch):
+        return self._gui.EndDeferWindowPos(batch)
+
+    def GetWindowPlacement(self, hwnd):
+        return self._gui.GetWindowPlacement(hwnd)
+
+    def SetWindowPlacement(self, hwnd, placement):
+        return self._gui.SetWindowPlacement(hwnd, placement)
+
+    def GetForegroundWindow(self):
+        return self._gui.GetForegroundWindow()
+
+    def SetForegroundWindow(self, hwnd):
+        return self._gui.SetForegroundWindow(hwnd)
+
+    def GetWindowThreadProcessId(self, hwnd):
+        return self._process.GetWindowThreadProcessId(hwnd)
+
+    def GetWindowProcessName(self, hwnd):
+        _, pid = self._process.GetWindowThreadProcessId(hwnd)
+        name = self._process_names.get(pid)
+        if name is None:
+            name = self._query_process_name(pid)
+            self._process_names[pid] = name
+        return name
+
+    def GetClassName(self, hwnd):
+        return self._gui.GetClassName(hwnd)
+
+    def GetTickCount(self):
+        return self._api.GetTickCount()
+
+    def GetLastInputInfo(self):
+        return self._api.GetLastInputInfo()
+
+    def GetCursorPos(self):
+        return self._api.GetCursorPos()
+
+    def _query_process_name(self, pid):
+        import ctypes
+        from ctypes import wintypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ""
+        try:
+            buf = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buf))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                return os.path.basename(buf.value)
+            return ""
+        finally:
+            kernel32.CloseHandle(handle)
+
+
+class SimulatedWindow:
+    """One synthetic top-level window"""
+
+    __slots__ = ('hwnd', 'title', 'class_name', 'process_name', 'visible',
+                 'iconic', 'exstyle', 'alpha', 'layered_flags', 'rect', 'hung', 'pid')
+
+    def __init__(self, hwnd, title, class_name="Chrome_WidgetWin_1",
+                 process_name="chrome.exe", visible=True, exstyle=WS_EX_APPWINDOW, pid=0):
+        self.hwnd = hwnd
+        self.pid = pid  # os.getpid() for windows of the calling process
+        self.title = title
+        self.class_name = class_name
+        self.process_name = process_name
+        self.visible = visible
+        self.iconic = False
+        self.exstyle = exstyle
+        self.alpha = 255
+        self.layered_flags = 0
+        self.rect = (100, 100, 900, 700)
+        self.hung = False  # owning thread not pumping messages (see SimulatedDesktop.hang)
+
+
+FIRST_SIMULATED_PID = 0x10000  # fake process ids handed out per process name
+
+# Titles used by SimulatedDesktop.populate()
+_SYNTHETIC_APPS = (
+    ("{} - Chrome", "Chrome_WidgetWin_1", "chrome.exe"),
+    ("{} - Visual Studio Code", "Chrome_WidgetWin_1", "Code.exe"),
+    ("{} - Notepad", "Notepad", "notepad.exe"),
+    ("{} - Purple", "Chrome_WidgetWin_1", "purple.exe"),
+    ("{} - Explorer", "CabinetWClass", "explorer.exe"),
+    ("{} - Discord", "Chrome_WidgetWin_1", "Discord.exe"),
+)
+_SYNTHETIC_WORDS = ("Inbox", "Docs", "Report", "Build", "Game", "Chat",
+                    "Settings", "Test", "Project", "Music", "Map", "Wiki")
+
+
+class SimulatedDesktop(WindowBackend):
+    """In-memory desktop holding any number of synthetic windows.
+
+    latency is the simulated cost (seconds) of every cross-process call;
+    call_latency overrides it per call name, e.g. {'GetWindowText': 0.001}.
+    Every call is counted in call_counts.  Desktop changes are reported
+    as WinEvents to the callbacks in event_listeners (see window_events).
+    Calls that send a window message (ShowWindow, SetWindowPos, and
+    GetWindowText on a window of the calling process) block for
+    hung_delay seconds on a hung window.
+    """
+
+    name = "simulated"
+
+    def __init__(self, latency=0.0, call_latency=None):
+        self.latency = latency
+        self.call_latency = dict(call_latency or {})
+        self.call_counts = Counter()
+        self.windows = {}
+        self.z_order = []
+        self.foreground = 0
+        self._next_hwnd = 0x10000
+        self._pids = {}  # process_name -> fake pid
+        self._lock = threading.RLock()
+        self.event_listeners = []  # callback(event, hwnd)
+        self.last_input = self.GetTickCount()
+        self.cursor = (0, 0)
+        self.hung_delay = 5.0
+
+    # --- desktop management (not part of the win32 surface) ---
+
+    def add_window(self, title, class_name="Chrome_WidgetWin_1",
+                   process_name="chrome.exe", visible=True, exstyle=WS_EX_APPWINDOW, hwnd=None,
+                   pid=None):
+        """Create a window on top of the Z-order and return its hwnd.
+
+        hwnd picks the handle (e.g. one from a recorded session); pid
+        defaults to one fake process id per process_name.
+        """
+        with self._lock:
+            if hwnd is None:
+                hwnd = self._next_hwnd
+                self._next_hwnd += 4
+            else:
+                self._next_hwnd = max(self._next_hwnd, hwnd + 4)
+            if pid is None:
+                pid = self._pids.setdefault(process_name, FIRST_SIMULATED_PID + 4 * len(self._pids))
+            self.windows[hwnd] = SimulatedWindow(hwnd, title, class_name,
+                                                 process_name, visible, exstyle, pid)
+            self.z_order.insert(0, hwnd)
+        self._notify(EVENT_OBJECT_CREATE, hwnd)
+        if visible:
+            self._notify(EVENT_OBJECT_SHOW, hwnd)
+        return hwnd
+
+    def destroy_window(self, hwnd):
+        with self._lock:
+            if self.windows.pop(hwnd, None) is None:
+                return
+            self.z_order.remove(hwnd)
+            if self.foreground == hwnd:
+                self.foreground = self.z_order[0] if self.z_order else 0
+        self._notify(EVENT_OBJECT_DESTROY, hwnd)
+
+    def set_title(self, hwnd, title):
+        with self._lock:
+            self._window(hwnd).title = title
+        self._notify(EVENT_OBJECT_NAMECHANGE, hwnd)
+
+    def set_visible(self, hwnd, visible):
+        """Show or hide hwnd as its own application would (no ShowWindow call counted)"""
+        with self._lock:
+            window = self._window(hwnd)
+            changed = window.visible != visible
+            window.visible = visible
+        if changed:
+            self._notify(EVENT_OBJECT_SHOW if visible else EVENT_OBJECT_HIDE, hwnd)
+
+    def restack(self, hwnds):
+        """Z-order: hwnds top to bottom, then the windows not in it"""
+        with self._lock:
+            listed = [hwnd for hwnd in hwnds if hwnd in self.windows]
+            seen = set(listed)
+            self.z_order[:] = listed + [hwnd for hwnd in self.z_order if hwnd not in seen]
+
+    def populate(self, count, seed=0, hidden_ratio=0.1):
+        """Add count synthetic windows; about hidden_ratio of them are invisible"""
+        rng = random.Random(seed)
+        hwnds = []
+        for i in range(count):
+            pattern, class_name, process_name = rng.choice(_SYNTHETIC_APPS)
+            title = pattern.format(f"{rng.choice(_SYNTHETIC_WORDS)} {i}")
+            visible = rng.random() >= hidden_ratio
+            hwnds.append(self.add_window(title, class_name, process_name, visible))
+        return hwnds
+
+    def hang(self, hwnd, hung=True):
+        """Make hwnd stop (or resume) answering window messages"""
+        with self._lock:
+            self._window(hwnd).hung = hung
+
+    def simulate_input(self, mouse=False):
+        """Record user input now (see GetLastInputInfo); mouse input also moves the pointer"""
+        self.last_input = self.GetTickCount()
+        if mouse:
+            x, y = self.cursor
+            self.cursor = (x + 1, y)
+
+    def reset_counts(self):
+        self.call_counts.clear()
+
+    def _notify(self, event, hwnd):
+        for callback in list(self.event_listeners):
+            callback(event, hwnd)
+
+    def _call(self, name):
+        self.call_counts[name] += 1
+        delay = self.call_latency.get(name, self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _block_if_hung(self, hwnd, limit=None):
+        """Sleep like a message sent to a hung window; True if it was hung"""
+        window = self.windows.get(hwnd)
+        if window is None or not window.hung:
+            return False
+        time.sleep(self.hung_delay if limit is None else min(limit, self.hung_delay))
+        return True
+
+    def _window(self, hwnd):
+        window = self.windows.get(hwnd)
+        if window is None:
+            raise BackendError(f"Invalid window handle: {hwnd}")
+        return window
+
+    # --- win32gui surface ---
+
+    def EnumWindows(self, callback, extra):
+        self._call('EnumWindows')
+        with self._lock:
+            hwnds = list(self.z_order)
+        for hwnd in hwnds:
+            if callback(hwnd, extra) is False:
+                break
+
+    def IsWindow(self, hwnd):
+        self._call('IsWindow')
+        return hwnd in self.windows
+
+    def IsWindowVisible(self, hwnd):
+        self._call('IsWindowVisible')
+        window = self.windows.get(hwnd)
+        return bool(window and window.visible)
+
+    def IsIconic(self, hwnd):
+        self._call('IsIconic')
+        window = self.windows.get(hwnd)
+        return bool(window and window.iconic)
+
+    def GetWindowText(self, hwnd):
+        self._call('GetWindowText')
+        window = self.windows.get(hwnd)
+        if window is not None and window.pid == os.getpid():
+            self._block_if_hung(hwnd)  # only sends WM_GETTEXT within the own process
+        return window.title if window else ""
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        self._call('GetWindowTextTimeout')
+        if self._block_if_hung(hwnd, timeout) and self.hung_delay > timeout:
+            return None
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def InternalGetWindowText(self, hwnd):
+        self._call('InternalGetWindowText')
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def IsHungAppWindow(self, hwnd):
+        self._call('IsHungAppWindow')
+        window = self.windows.get(hwnd)
+        return bool(window and window.hung)
+
+    def GetWindowLong(self, hwnd, index):
+        self._call('GetWindowLong')
+        if index != GWL_EXSTYLE:
+            return 0
+        return self._window(hwnd).exstyle
+
+    def SetWindowLong(self, hwnd, index, value):
+        self._call('SetWindowLong')
+        with self._lock:
+            window = self._window(hwnd)
+            if index != GWL_EXSTYLE:
+                return 0
+            previous = window.exstyle
+            window.exstyle = value
+            return previous
+
+    def GetLayeredWindowAttributes(self, hwnd):
+        self._call('GetLayeredWindowAttributes')
+        window = self._window(hwnd)
+        if not window.exstyle & WS_EX_LAYERED:
+            raise BackendError("Window is not layered")
+        return 0, window.alpha, window.layered_flags
+
+    def SetLayeredWindowAttributes(self, hwnd, color_key, alpha, flags):
+        self._call('SetLayeredWindowAttributes')
+        with self._lock:
+            window = self._window(hwnd)
+            if not window.exstyle & WS_EX_LAYERED:
+                raise BackendError("Window is not layered")
+            window.alpha = alpha
+            window.layered_flags = flags
+
+    def ShowWindow(self, hwnd, cmd):
+        self._call('ShowWindow')
+        self._block_if_hung(hwnd)
+        with self._lock:
+            window = self.windows.get(hwnd)
+            if window is None:
+                return False
+            was_visible = window.visible
+            if cmd == SW_HIDE:
+                window.visible = False
+            else:
+                window.visible = True
+                if cmd in (SW_MINIMIZE, SW_SHOWMINIMIZED):
+                    window.iconic = True
+                elif cmd in (SW_RESTORE, SW_SHOWNORMAL):
+                    window.iconic = False
+        if was_visible != window.visible:
+            self._notify(EVENT_OBJECT_SHOW if window.visible else EVENT_OBJECT_HIDE, hwnd)
+        return was_visible
+
+    def SetWindowPos(self, hwnd, insert_after, x, y, cx, cy, flags):
+        self._call('SetWindowPos')
+        self._block_if_hung(hwnd)
+        self._set_pos(hwnd, insert_after, x, y, cx, cy, flags)
+
+    def BeginDeferWindowPos(self, count):
+        self._call('BeginDeferWindowPos')
+        return []
+
+    def DeferWindowPos(self, batch, hwnd, insert_after, x, y, cx, cy, flags):
+        self._call('DeferWindowPos')
+        self._window(hwnd)
+        batch.append((hwnd, insert_after, x, y, cx, cy, flags))
+        return batch
+
+    def EndDeferWindowPos(self, batch):
+        self._call('EndDeferWindowPos')
+        for args in batch:
+            self._set_pos(*args)
+
+    def _set_pos(self, hwnd, insert_after, x, y, cx, cy, flags):
+        with self._lock:
+            window = self._window(hwnd)
+            if not flags & SWP_NOMOVE or not flags & SWP_NOSIZE:
+                left, top, right, bottom = window.rect
+                if not flags & SWP_NOMOVE:
+                    left, top = x, y
+                if not flags & SWP_NOSIZE:
+                    right, bottom = left + cx, top + cy
+                else:
+                    right = left + (window.rect[2] - window.rect[0])
+                    bottom = top + (window.rect[3] - window.rect[1])
+                window.rect = (left, top, right, bottom)
+            if not flags & SWP_NOZORDER:
+                self.z_order.remove(hwnd)
+                if insert_after == HWND_TOP:
+                    self.z_order.insert(0, hwnd)
+                elif insert_after == HWND_BOTTOM or insert_after not in self.windows:
+                    self.z_order.append(hwnd)
+                else:
+                    self.z_order.insert(self.z_order.index(insert_after) + 1, hwnd)
+            was_visible = window.visible
+            if flags & SWP_SHOWWINDOW:
+                window.visible = True
+            elif flags & SWP_HIDEWINDOW:
+                window.visible = False
+        if was_visible != window.visible:
+            self._notify(EVENT_OBJECT_SHOW if window.visible else EVENT_OBJECT_HIDE, hwnd)
+
+    def GetWindowPlacement(self, hwnd):
+        self._call('GetWindowPlacement')
+        window = self._window(hwnd)
+        show_cmd = SW_SHOWMINIMIZED if window.iconic else SW_SHOWNORMAL
+        return (0, show_cmd, (-1, -1), (-1, -1), window.rect)
+
+    def SetWindowPlacement(self, hwnd, placement):
+        self._call('SetWindowPlacement')
+        with self._lock:
+            window = self._window(hwnd)
+            _, show_cmd, _, _, rect = placement
+            window.rect = tuple(rect)
+            window.iconic = show_cmd in (SW_MINIMIZE, SW_SHOWMINIMIZED)
+
+    def GetForegroundWindow(self):
+        self._call('GetForegroundWindow')
+        return self.foreground
+
+    def SetForegroundWindow(self, hwnd):
+        self._call('SetForegroundWindow')
+        with self._lock:
+            self._window(hwnd)
+            self.foreground = hwnd
+            self.z_order.remove(hwnd)
+            self.z_order.insert(0, hwnd)
+
+    def GetWindowProcessName(self, hwnd):
+        self._call('GetWindowProcessName')
+        window = self.windows.get(hwnd)
+        return window.process_name if window else ""
+
+    def GetWindowThreadProcessId(self, hwnd):
+        self._call('GetWindowThreadProcessId')
+        window = self.windows.get(hwnd)
+        return (hwnd + 1, window.pid) if window else (0, 0)
+
+    def GetClassName(self, hwnd):
+        self._call('GetClassName')
+        with self._lock:
+            return self._window(hwnd).class_name
+
+    def GetTickCount(self):
+        return int(time.monotonic() * 1000) & 0xFFFFFFFF
+
+    def GetLastInputInfo(self):
+        self._call('GetLastInputInfo')
+        return self.last_input
+
+    def GetCursorPos(self):
+        self._call('GetCursorPos')
+        return self.cursor
+
+
+def create_backend(spec=None):
+    """Build the backend named by spec or the CTT_BACKEND environment variable.
+
+    "win32" (default) uses the real desktop; "simulated" or "simulated:N"
+    starts with N synthetic windows (default 200).
+    """
+    spec = spec or os.environ.get("CTT_BACKEND", "win32")
+    name, _, arg = spec.partition(":")
+    if name == "simulated":
+        desktop = SimulatedDesktop()
+        desktop.populate(int(arg) if arg else 200)
+        return desktop
+    return Win32Backend()
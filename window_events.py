@@ -0,0 +1,262 @@
+"""Live window tracking from WinEvents instead of full re-enumeration.
+
+An event source reports (event, hwnd) pairs for window create / destroy /
+show / hide / name-change.  WindowEventTracker coalesces them per frame on
+its own thread, probes only the windows that changed and publishes one
+WindowPatch per frame, so a burst of 500 events costs one UI update and a
+refresh costs O(changes) instead of O(windows).
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import window_backend as wb
+from enumeration import WindowInfo, process_name, read_state, read_title
+from window_state import WindowStateCache
+
+TRACKED_EVENTS = (wb.EVENT_OBJECT_CREATE, wb.EVENT_OBJECT_DESTROY, wb.EVENT_OBJECT_SHOW,
+                  wb.EVENT_OBJECT_HIDE, wb.EVENT_OBJECT_NAMECHANGE)
+JOIN_TIMEOUT = 1.0  # seconds start() waits for the previous tracker thread
+
+# updated: WindowInfo of changed (still listed) windows, removed: hwnds gone from the list
+WindowPatch = namedtuple('WindowPatch', 'updated removed events')
+
+
+class WindowEventSource:
+    """Delivers callback(event, hwnd) from any thread between start() and stop()"""
+
+    def start(self, callback):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class FakeEventSource(WindowEventSource):
+    """Event source for headless runs.
+
+    emit() can be called directly; with a SimulatedDesktop the source also
+    forwards every change made to that desktop.
+    """
+
+    def __init__(self, desktop=None):
+        self.desktop = desktop
+        self.callback = None
+
+    def start(self, callback):
+        self.callback = callback
+        if self.desktop is not None:
+            self.desktop.event_listeners.append(self.emit)
+
+    def stop(self):
+        if self.desktop is not None and self.emit in self.desktop.event_listeners:
+            self.desktop.event_listeners.remove(self.emit)
+        self.callback = None
+
+    def emit(self, event, hwnd):
+        callback = self.callback
+        if callback is not None and event in TRACKED_EVENTS:
+            callback(event, hwnd)
+
+
+class WinEventHookSource(WindowEventSource):
+    """SetWinEventHook(WINEVENT_OUTOFCONTEXT) on a dedicated message-loop thread"""
+
+    def __init__(self):
+        self.callback = None
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def start(self, callback):
+        self.callback = callback
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="winevent-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def stop(self):
+        import ctypes
+        if self._thread_id:
+            WM_QUIT = 0x0012
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self.callback = None
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        WINEVENT_OUTOFCONTEXT = 0x0000
+        WINEVENT_SKIPOWNPROCESS = 0x0002
+        OBJID_WINDOW = 0
+        CHILDID_SELF = 0
+        GA_ROOT = 2
+
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD,
+                                          wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, timestamp):
+            # Only top-level windows themselves, not their children or accessible objects
+            if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+                return
+            if event != wb.EVENT_OBJECT_DESTROY and user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return
+            callback = self.callback
+            if callback is not None:
+                try:
+                    callback(event, hwnd)
+                except Exception as e:
+                    print(f"Window event error: {e}")
+
+        proc = WinEventProc(on_event)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hook = user32.SetWinEventHook(wb.EVENT_OBJECT_CREATE, wb.EVENT_OBJECT_NAMECHANGE, 0,
+                                      proc, 0, 0, WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._ready.set()
+        if not hook:
+            print("SetWinEventHook failed")
+            return
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+            self._thread_id = None
+
+
+def create_event_source(backend):
+    """Event source matching the backend (fake for the simulated desktop)"""
+    if isinstance(backend, wb.SimulatedDesktop):
+        return FakeEventSource(backend)
+    return WinEventHookSource()
+
+
+def probe_window(backend, hwnd, cache):
+    """WindowInfo for a listable window (visible, titled), else None"""
+    try:
+        if not backend.IsWindowVisible(hwnd):
+            return None
+        title, hung = read_title(backend, hwnd)
+        if not title:
+            return None
+        style, alpha = read_state(cache, hwnd, hung)
+    except Exception:
+        return None
+    return WindowInfo(hwnd, title, style, alpha, process_name(backend, hwnd), hung)
+
+
+class WindowEventTracker:
+    """Coalesces window events per frame into WindowPatches.
+
+    Events are collected from the source thread; a tracker thread wakes
+    once per frame, probes each changed hwnd once and puts a single patch
+    on the patches queue for the UI to drain.
+    """
+
+    def __init__(self, backend, source, frame=1 / 60, cache=None):
+        self.backend = backend
+        self.source = source
+        self.cache = cache if cache is not None else WindowStateCache(backend)
+        self.frame = frame
+        self.patches = queue.Queue()
+        self.events_received = 0
+        self.patches_published = 0
+        self._pending = {}  # hwnd -> last event
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._stopped = threading.Event()  # the current thread's own stop flag
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        if self._thread is not None:
+            # A quick stop/start must not leave the old thread flushing alongside the new one
+            self._thread.join(JOIN_TIMEOUT)
+        self._running = True
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stopped,),
+                                        name="window-events", daemon=True)
+        self._thread.start()
+        self.source.start(self.on_event)
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._stopped.set()
+        self.source.stop()
+        self._wakeup.set()
+
+    @property
+    def running(self):
+        return self._running
+
+    def on_event(self, event, hwnd):
+        """Source callback (any thread): remember the newest event per hwnd"""
+        with self._lock:
+            self.events_received += 1
+            self._pending[hwnd] = event
+        self._wakeup.set()
+
+    def take_patches(self):
+        """Merge every queued patch into one, or None (UI thread)"""
+        updated = {}
+        removed = set()
+        events = 0
+        while True:
+            try:
+                patch = self.patches.get_nowait()
+            except queue.Empty:
+                break
+            for hwnd in patch.removed:
+                updated.pop(hwnd, None)
+                removed.add(hwnd)
+            for info in patch.updated:
+                removed.discard(info.hwnd)
+                updated[info.hwnd] = info
+            events += patch.events
+        if not events:
+            return None
+        return WindowPatch(tuple(updated.values()), tuple(removed), events)
+
+    def flush(self):
+        """Probe pending hwnds and publish one patch; returns it (or None)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return None
+        updated = []
+        removed = []
+        for hwnd, event in pending.items():
+            # The event may have changed the style, so re-read it
+            self.cache.invalidate(hwnd)
+            info = None
+            if event != wb.EVENT_OBJECT_DESTROY:
+                info = probe_window(self.backend, hwnd, self.cache)
+            if info is None:
+                removed.append(hwnd)
+            else:
+                updated.append(info)
+        patch = WindowPatch(tuple(updated), tuple(removed), len(pending))
+        self.patches.put(patch)
+        self.patches_published += 1
+        return patch
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if stopped.is_set():
+                break
+            # Let the rest of the burst arrive, then handle it in one pass
+            time.sleep(self.frame)
+            self.flush()
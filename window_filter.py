@@ -0,0 +1,139 @@
+"""As-you-type filtering over the last window snapshot.
+
+WindowFilter keeps every listed window with its search data (see
+fuzzy_search) computed once.  A query runs as a FilterPass that the UI
+steps in chunks, so a new keystroke can abandon an older pass, and a
+query that only narrows the previous one searches the previous result
+instead of every window.  Window events may remove windows while a pass
+runs; those are skipped rather than failing the pass.  Results are
+ranked by fuzzy score and recency of focus; an empty query keeps the
+Z-order.
+"""
+from fuzzy_search import RECENCY_WEIGHT, FuzzyQuery, SearchEntry, score_entry
+
+
+class FilterPass:
+    """One query over a candidate list, processed chunk by chunk"""
+
+    def __init__(self, query, candidates, entries, positions):
+        self.query = query
+        self._query = FuzzyQuery(query)
+        self._candidates = candidates
+        self._entries = entries
+        self._positions = positions
+        self._position = 0
+        self._scored = []
+        self.matches = None  # ranked hwnds once done
+
+    @property
+    def done(self):
+        return self.matches is not None
+
+    def step(self, budget=2000):
+        """Check up to budget candidates; returns True when finished"""
+        if self.matches is not None:
+            return True
+        end = min(self._position + budget, len(self._candidates))
+        chunk = self._candidates[self._position:end]
+        self._position = end
+        query = self._query
+        if not query.text:
+            self._scored.extend(chunk)
+        else:
+            # Hot loop: mask test inline, rank key built once per match
+            text, mask = query.text, query.mask
+            entries = self._entries
+            positions = self._positions
+            total = len(positions) or 1
+            append = self._scored.append
+            for hwnd in chunk:
+                entry = entries.get(hwnd)
+                if entry is None or mask & ~entry.mask:  # None: removed by a patch mid-pass
+                    continue
+                value = score_entry(text, entry)
+                if value is not None:
+                    position = positions.get(hwnd, total)
+                    append((-(value + RECENCY_WEIGHT * (1 - position / total)), position, hwnd))
+        if end < len(self._candidates):
+            return False
+        if query.text:
+            self._scored.sort()
+            self.matches = [item[2] for item in self._scored]
+        else:
+            self.matches = self._scored
+        return True
+
+
+class WindowFilter:
+    """Snapshot of all listable windows plus incremental ranked search"""
+
+    def __init__(self):
+        self.windows = {}  # hwnd -> WindowInfo
+        self.order = []    # hwnds in Z-order (most recently focused first)
+        self.entries = {}  # hwnd -> SearchEntry
+        self._positions = None
+        self._last_query = None
+        self._last_matches = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def load(self, windows):
+        """Replace the index with a snapshot's WindowInfo tuple"""
+        self.windows = {info.hwnd: info for info in windows}
+        self.order = [info.hwnd for info in windows]
+        self.entries = {info.hwnd: SearchEntry(info.title, info.process) for info in windows}
+        self._positions = None
+        self._forget_last()
+
+    def apply_patch(self, patch):
+        """Fold a WindowPatch (from window_events) into the index"""
+        created = []
+        for info in patch.updated:
+            old = self.windows.get(info.hwnd)
+            if old is None:
+                created.append(info.hwnd)
+            if old is None or old.title != info.title:
+                self.entries[info.hwnd] = SearchEntry(info.title, info.process)
+            self.windows[info.hwnd] = info
+        removed = {hwnd for hwnd in patch.removed if hwnd in self.windows}
+        for hwnd in removed:
+            del self.windows[hwnd]
+            del self.entries[hwnd]
+        if created or removed:
+            created.reverse()
+            self.order = created + [hwnd for hwnd in self.order if hwnd not in removed]
+            self._positions = None
+        self._forget_last()
+
+    def positions(self):
+        """hwnd -> Z-order position, built once per change of order"""
+        if self._positions is None:
+            self._positions = {hwnd: i for i, hwnd in enumerate(self.order)}
+        return self._positions
+
+    def matches(self, info, query):
+        """True if a single window matches query"""
+        fuzzy = FuzzyQuery(query)
+        return not fuzzy.text or fuzzy.score(SearchEntry(info.title, info.process)) is not None
+
+    def begin(self, query):
+        """Start a FilterPass; narrowing queries only search the last result"""
+        last = self._last_query
+        if last is not None and last.casefold().strip() in query.casefold().strip():
+            candidates = self._last_matches
+        else:
+            candidates = self.order
+        return FilterPass(query, candidates, self.entries, self.positions())
+
+    def commit(self, filter_pass):
+        """Remember a finished pass so the next narrowing query can reuse it"""
+        windows = self.windows
+        matches = [hwnd for hwnd in filter_pass.matches if hwnd in windows]
+        self._last_query = filter_pass.query
+        self._last_matches = matches
+        return [windows[hwnd] for hwnd in matches]
+
+    def _forget_last(self):
+        self._last_query = None
+        self._last_matches = None
@@ -0,0 +1,127 @@
+"""Named groups of windows hidden and shown together by hotkey.
+
+A group is hidden or shown as one DeferWindowPos batch: every window is
+queued with SWP_HIDEWINDOW/SWP_SHOWWINDOW and the system applies them
+in a single pass.  Shown windows are chained in the group's order right
+below HWND_TOP, so only one SetForegroundWindow is needed afterwards.
+Windows that no longer exist are pruned from the group instead of
+aborting the pass.
+"""
+import window_backend as wb
+
+GROUP_SLOTS = 9  # groups 1-9: Ctrl+Alt+N hides, Ctrl+Alt+Shift+N shows
+
+
+class WindowGroup:
+    """Ordered set of hwnds sharing a name and hotkeys"""
+
+    def __init__(self, name, hide_hotkey=None, show_hotkey=None):
+        self.name = name
+        self.hide_hotkey = hide_hotkey
+        self.show_hotkey = show_hotkey
+        self.hwnds = []
+
+    def add(self, hwnd):
+        if hwnd not in self.hwnds:
+            self.hwnds.append(hwnd)
+
+    def remove(self, hwnd):
+        if hwnd in self.hwnds:
+            self.hwnds.remove(hwnd)
+
+    def __len__(self):
+        return len(self.hwnds)
+
+    def __repr__(self):
+        return f"WindowGroup({self.name!r}, {len(self.hwnds)} windows)"
+
+
+def slot_hotkeys(slot):
+    """(hide, show) hotkeys of numbered group slot 1-9"""
+    return f'ctrl+alt+{slot}', f'ctrl+alt+shift+{slot}'
+
+
+def set_group_visible(backend, hwnds, visible):
+    """Hide or show hwnds in one batch; returns (applied hwnds, stale hwnds)"""
+    live = []
+    stale = []
+    for hwnd in hwnds:
+        (live if backend.IsWindow(hwnd) else stale).append(hwnd)
+    if not live:
+        return live, stale
+
+    flags = wb.SWP_NOMOVE | wb.SWP_NOSIZE | wb.SWP_NOACTIVATE
+    if visible:
+        flags |= wb.SWP_SHOWWINDOW
+    else:
+        flags |= wb.SWP_HIDEWINDOW | wb.SWP_NOZORDER
+    try:
+        batch = backend.BeginDeferWindowPos(len(live))
+        insert_after = wb.HWND_TOP
+        for hwnd in live:
+            batch = backend.DeferWindowPos(batch, hwnd, insert_after, 0, 0, 0, 0, flags)
+            if visible:
+                insert_after = hwnd
+        backend.EndDeferWindowPos(batch)
+    except Exception:
+        # A window closed after the IsWindow check and the batch was dropped
+        for hwnd in list(live):
+            try:
+                backend.ShowWindow(hwnd, wb.SW_SHOWNOACTIVATE if visible else wb.SW_HIDE)
+            except Exception:
+                live.remove(hwnd)
+                stale.append(hwnd)
+
+    if visible and live:
+        try:
+            backend.SetForegroundWindow(live[0])
+        except Exception:
+            pass  # Foreground changes can be refused; the windows are shown anyway
+    return live, stale
+
+
+class WindowGroups:
+    """Group name -> WindowGroup, applied through a window backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.groups = {}
+
+    def get(self, name):
+        return self.groups.get(name)
+
+    def ensure(self, name, hide_hotkey=None, show_hotkey=None):
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = WindowGroup(name, hide_hotkey, show_hotkey)
+        return group
+
+    def delete(self, name):
+        return self.groups.pop(name, None)
+
+    def forget_window(self, hwnd):
+        """Drop hwnd from every group"""
+        for group in self.groups.values():
+            group.remove(hwnd)
+
+    def hide(self, name):
+        """Hide group name's windows; returns (applied, stale) and leaves the group as is"""
+        return self._apply(name, False)
+
+    def show(self, name):
+        return self._apply(name, True)
+
+    def prune(self, name, stale):
+        """Drop the closed windows hide()/show() reported from group name"""
+        group = self.groups.get(name)
+        if group is not None:
+            for hwnd in stale:
+                group.remove(hwnd)
+
+    def _apply(self, name, visible):
+        # Runs on the hotkey thread: works on a copy and never edits the group
+        group = self.groups.get(name)
+        hwnds = list(group.hwnds) if group is not None else []
+        if not hwnds:
+            return [], []
+        return set_group_visible(self.backend, hwnds, visible)
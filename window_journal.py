@@ -0,0 +1,309 @@
+"""Crash-safe journal of the windows the tool has hidden.
+
+hidden_windows only lives in memory, so a crash or kill used to leave
+windows invisible (SW_HIDE) or off the taskbar (WS_EX_TOOLWINDOW) with
+no record of them.  WindowJournal appends one JSON line per hide, show,
+style change and restore.  A line is written to the OS right away, so it
+survives the process dying; fsync (which survives the machine dying) is
+done by a background thread at most every sync_interval seconds, so a
+hotkey only pays for one small write.  Every compact_every records the
+file is rewritten as the current state plus whatever arrived meanwhile.
+
+On startup open() replays the file and returns the windows a previous
+run left hidden, for the UI to offer restoring.  A torn last line (the
+process died mid-write) is ignored.
+"""
+import json
+import os
+import threading
+import time
+
+SYNC_INTERVAL = 0.2   # seconds between batched fsyncs
+COMPACT_EVERY = 1000  # records between compactions
+
+
+def default_journal_path():
+    """CTT_JOURNAL, else %APPDATA%\\CustomTestTool\\hidden_windows.journal"""
+    path = os.environ.get("CTT_JOURNAL")
+    if path:
+        return path
+    base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    return os.path.join(base, "CustomTestTool", "hidden_windows.journal")
+
+
+class JournalEntry:
+    """What the tool has changed on one window.
+
+    process and class_name identify the window again after a restart
+    (hwnds are reused); style is the exstyle before the tool's first
+    style change, None if the style was never touched.
+    """
+
+    __slots__ = ('hwnd', 'process', 'class_name', 'title', 'hidden', 'style', 'taskbar_hidden')
+
+    def __init__(self, hwnd, process="", class_name="", title=""):
+        self.hwnd = hwnd
+        self.process = process
+        self.class_name = class_name
+        self.title = title
+        self.hidden = False
+        self.style = None
+        self.taskbar_hidden = False
+
+    @property
+    def changed(self):
+        return self.hidden or self.taskbar_hidden
+
+    def to_dict(self):
+        return {'op': 'state', 'hwnd': self.hwnd, 'process': self.process,
+                'class_name': self.class_name, 'title': self.title, 'hidden': self.hidden,
+                'style': self.style, 'taskbar_hidden': self.taskbar_hidden}
+
+    def __repr__(self):
+        return (f"JournalEntry({self.hwnd}, {self.process!r}, {self.title!r}, "
+                f"hidden={self.hidden}, taskbar_hidden={self.taskbar_hidden})")
+
+
+def _apply(entries, record):
+    """Replay one journal record onto entries (hwnd -> JournalEntry)"""
+    op = record.get('op')
+    hwnd = record.get('hwnd')
+    if op in ('restore', 'forget'):
+        entries.pop(hwnd, None)
+        return
+    entry = entries.get(hwnd)
+    if entry is None:
+        if op == 'show':
+            return
+        entry = entries[hwnd] = JournalEntry(hwnd)
+    for field in ('process', 'class_name', 'title'):
+        if record.get(field):
+            setattr(entry, field, record[field])
+    if op == 'hide':
+        entry.hidden = True
+    elif op == 'show':
+        entry.hidden = False
+    elif op == 'style':
+        if entry.style is None:
+            entry.style = record.get('old')
+        entry.taskbar_hidden = bool(record.get('taskbar_hidden'))
+    elif op == 'state':
+        entry.hidden = bool(record.get('hidden'))
+        entry.style = record.get('style')
+        entry.taskbar_hidden = bool(record.get('taskbar_hidden'))
+    if not entry.changed:
+        del entries[hwnd]
+
+
+def replay(path):
+    """Entries (hwnd -> JournalEntry) recorded in the journal at path"""
+    entries = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write
+                if isinstance(record, dict):
+                    _apply(entries, record)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class WindowJournal:
+    """Append-only hide/show/style journal with batched fsync and compaction.
+
+    The record methods are thread-safe (hotkeys run them on the hotkey
+    thread).  fsync is the function used to flush a file to disk.
+    """
+
+    def __init__(self, path=None, sync_interval=SYNC_INTERVAL, compact_every=COMPACT_EVERY,
+                 fsync=os.fsync):
+        self.path = path or default_journal_path()
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.entries = {}  # hwnd -> JournalEntry
+        self.records = 0
+        self.syncs = 0
+        self.compactions = 0
+        self._file = None
+        self._since_compact = 0
+        self._dirty = False
+        self._pending = None  # lines written while a compaction runs
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._closing = False
+
+    def open(self):
+        """Replay the existing journal and start appending; returns the entries
+        a previous run left behind (hwnd -> JournalEntry)"""
+        orphans = replay(self.path)
+        self.entries = dict(orphans)
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.compact()  # start from the replayed state
+        return orphans
+
+    # --- records ---
+
+    def hidden(self, hwnd, process="", class_name="", title=""):
+        """hwnd was hidden with SW_HIDE"""
+        self._record({'op': 'hide', 'hwnd': hwnd, 'process': process,
+                      'class_name': class_name, 'title': title})
+
+    def shown(self, hwnd):
+        """hwnd was shown again"""
+        if hwnd in self.entries:
+            self._record({'op': 'show', 'hwnd': hwnd})
+
+    def style_changed(self, hwnd, old, new, taskbar_hidden, process="", class_name="", title=""):
+        """hwnd's exstyle went from old to new (taskbar_hidden: now off the taskbar)"""
+        if not taskbar_hidden and hwnd not in self.entries:
+            return
+        self._record({'op': 'style', 'hwnd': hwnd, 'old': old, 'new': new,
+                      'taskbar_hidden': taskbar_hidden, 'process': process,
+                      'class_name': class_name, 'title': title})
+
+    def restored(self, hwnds):
+        """hwnds were shown and put back on the taskbar"""
+        for hwnd in hwnds:
+            if hwnd in self.entries:
+                self._record({'op': 'restore', 'hwnd': hwnd})
+
+    def forget(self, hwnds):
+        """Stop tracking hwnds (closed, or left hidden on purpose)"""
+        for hwnd in hwnds:
+            if hwnd in self.entries:
+                self._record({'op': 'forget', 'hwnd': hwnd})
+
+    def _record(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            _apply(self.entries, record)
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()  # in the OS now: survives the process, not yet a power cut
+            except (OSError, ValueError) as e:
+                # Callers run on the hotkey thread: losing a line beats losing the hotkey
+                print(f"Journal write failed: {e}")
+                return
+            if self._pending is not None:
+                self._pending.append(line)
+            self.records += 1
+            self._since_compact += 1
+            if not self._dirty:
+                self._dirty = True
+                self._wake.notify()
+
+    # --- background sync ---
+
+    def _run(self):
+        next_sync = 0.0
+        with self._wake:
+            while True:
+                while not self._dirty and not self._closing:
+                    self._wake.wait()
+                # Records arriving within sync_interval of the last fsync share the next one
+                delay = next_sync - time.monotonic()
+                while delay > 0 and not self._closing:
+                    self._wake.wait(delay)
+                    delay = next_sync - time.monotonic()
+                if self._closing:
+                    return
+                self._dirty = False
+                compact = self._since_compact >= self.compact_every
+                file = self._file
+                self._wake.release()
+                try:
+                    if compact:
+                        self.compact()
+                    else:
+                        self.fsync(file.fileno())
+                        self.syncs += 1
+                except (OSError, ValueError) as e:
+                    print(f"Journal sync failed: {e}")
+                finally:
+                    self._wake.acquire()
+                next_sync = time.monotonic() + self.sync_interval
+
+    def sync(self):
+        """fsync now"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            self.fsync(self._file.fileno())
+            self._dirty = False
+            self.syncs += 1
+
+    def compact(self):
+        """Rewrite the journal as the current state (records keep flowing meanwhile)"""
+        with self._lock:
+            if self._file is None:
+                return
+            lines = [json.dumps(entry.to_dict(), ensure_ascii=False, separators=(',', ':')) + "\n"
+                     for entry in self.entries.values()]
+            self._pending = []
+            self._since_compact = 0
+        temp = self.path + ".tmp"
+        try:
+            with open(temp, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                self.fsync(f.fileno())
+        except OSError:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            with open(temp, 'a', encoding='utf-8') as f:
+                f.writelines(pending)  # written to the old file during the rewrite
+            # Windows cannot replace a file that is still open; reopen whatever happens
+            self._file.close()
+            try:
+                os.replace(temp, self.path)
+            finally:
+                self._reopen()
+            self._dirty = True  # the carried-over lines still need an fsync
+            self._wake.notify()
+            self.compactions += 1
+
+    def _reopen(self):
+        try:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"Journal unavailable ({e}); hidden windows are no longer recorded")
+            self._file = None
+
+    def close(self):
+        """Flush and stop; the file is removed if nothing is left hidden"""
+        with self._wake:
+            self._closing = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            file, self._file = self._file, None
+            if file is None:
+                return
+            file.flush()
+            self.fsync(file.fileno())
+            file.close()
+            if not self.entries:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
@@ -0,0 +1,86 @@
+"""hwnd-keyed registry of the windows shown in the list.
+
+Every lookup (by hwnd or by tree item id) is a dict access, and the
+display order is kept separately so rows can be reordered freely.
+"""
+
+
+class WindowRecord:
+    """What the tool knows about one listed window"""
+
+    __slots__ = ('hwnd', 'title', 'item_id', 'style', 'alpha', 'values')
+
+    def __init__(self, hwnd, title, item_id=None):
+        self.hwnd = hwnd
+        self.title = title
+        self.item_id = item_id if item_id is not None else str(hwnd)
+        self.style = None   # cached GWL_EXSTYLE (None = not read yet)
+        self.alpha = None   # cached opacity 0-255
+        self.values = None  # tree column values last shown
+
+    def __repr__(self):
+        return f"WindowRecord({self.hwnd}, {self.title!r})"
+
+
+class WindowRegistry:
+    """hwnd -> WindowRecord index plus the current display order"""
+
+    def __init__(self):
+        self.records = {}
+        self._order = []   # hwnds in display order
+        self._positions = None
+        self._items = {}   # tree item id -> hwnd
+
+    @property
+    def order(self):
+        return self._order
+
+    @order.setter
+    def order(self, hwnds):
+        self._order = hwnds
+        self._positions = None
+
+    def index_of(self, hwnd):
+        """Display position of hwnd, or None (position map built once per order)"""
+        if self._positions is None:
+            self._positions = {h: i for i, h in enumerate(self._order)}
+        return self._positions.get(hwnd)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, hwnd):
+        return hwnd in self.records
+
+    def __iter__(self):
+        """Records in display order"""
+        records = self.records
+        return (records[hwnd] for hwnd in self.order)
+
+    def get(self, hwnd):
+        return self.records.get(hwnd)
+
+    def title(self, hwnd, default=""):
+        record = self.records.get(hwnd)
+        return record.title if record else default
+
+    def from_item(self, item_id):
+        """Record shown in the given tree item, or None"""
+        hwnd = self._items.get(item_id)
+        return self.records.get(hwnd) if hwnd is not None else None
+
+    def add(self, record):
+        self.records[record.hwnd] = record
+        self._items[record.item_id] = record.hwnd
+        return record
+
+    def remove(self, hwnd):
+        record = self.records.pop(hwnd, None)
+        if record is not None:
+            self._items.pop(record.item_id, None)
+        return record
+
+    def clear(self):
+        self.records.clear()
+        self._items.clear()
+        self.order = []
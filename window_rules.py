@@ -0,0 +1,273 @@
+"""Persistent per-window settings applied by rule when a window appears.
+
+A rule names a window by process name, window class and/or a title
+pattern (a case-insensitive regular expression searched in the title)
+and carries the settings to apply: alpha (0-255) and/or taskbar
+(True shown, False hidden).  Rules are kept in a JSON file so they
+survive restarts and apply again whenever the application reopens.
+
+RuleMatcher compiles the rule list once.  Rules are bucketed by their
+(process, class) key, so a window only looks at four buckets.  Inside a
+bucket each title pattern is filed under a trigram of a literal it
+requires; a title is cut into its trigrams once and only rules whose
+literal actually occurs are run as regexes, so the cost follows the
+title length and the number of near hits rather than the rule count.
+Earlier rules take precedence, per setting.
+"""
+import json
+import os
+import re
+import warnings
+from collections import namedtuple
+
+# The regex parser is private; without it every title pattern is simply scanned
+try:
+    from re import _parser  # Python 3.11+
+except ImportError:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            import sre_parse as _parser
+    except ImportError:
+        _parser = None
+
+# Characters IGNORECASE matches to an ASCII letter that str.lower() keeps apart
+_LOWER_FIXES = str.maketrans({'\u0131': 'i', '\u017f': 's'})
+
+RULES_VERSION = 1
+
+# Settings a window ends up with (None: leave as is)
+WindowSettings = namedtuple('WindowSettings', 'alpha taskbar')
+
+
+def default_rules_path():
+    """CTT_RULES, else %APPDATA%\\CustomTestTool\\window_rules.json"""
+    path = os.environ.get("CTT_RULES")
+    if path:
+        return path
+    base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    return os.path.join(base, "CustomTestTool", "window_rules.json")
+
+
+class WindowRule:
+    """Match criteria (None: any) plus the settings to apply"""
+
+    def __init__(self, process=None, class_name=None, title=None, alpha=None, taskbar=None):
+        self.process = process or None
+        self.class_name = class_name or None
+        self.title = title or None
+        self.alpha = alpha
+        self.taskbar = taskbar
+        self.pattern = re.compile(title, re.IGNORECASE | re.DOTALL) if title else None
+
+    @property
+    def key(self):
+        """Criteria tuple; two rules with the same key describe the same windows"""
+        return (_fold(self.process), _fold(self.class_name), self.title)
+
+    def matches(self, process, class_name, title):
+        """Plain check against one window (RuleMatcher does this in bulk)"""
+        return ((self.process is None or _fold(self.process) == _fold(process))
+                and (self.class_name is None or _fold(self.class_name) == _fold(class_name))
+                and (self.pattern is None or self.pattern.search(title or "") is not None))
+
+    def to_dict(self):
+        data = {}
+        for field in ('process', 'class_name', 'title', 'alpha', 'taskbar'):
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        alpha = data.get('alpha')
+        if alpha is not None:
+            alpha = max(0, min(255, int(alpha)))
+        taskbar = data.get('taskbar')
+        return cls(data.get('process'), data.get('class_name'), data.get('title'),
+                   alpha, None if taskbar is None else bool(taskbar))
+
+    def __repr__(self):
+        return f"WindowRule({self.to_dict()!r})"
+
+
+def _fold(value):
+    return value.casefold() if value else None
+
+
+def required_literal(pattern):
+    """Longest literal run every match of pattern contains (lowercase), or ""
+
+    Only top-level literals are used: text inside groups, alternations or
+    repeats may be skipped by a match.  Non-ASCII characters with case end
+    a run, so a substring test on lower_title() never rejects a title the
+    IGNORECASE regex would accept.  "" whenever the private parser is
+    missing or does not look as expected: the rule is then scanned.
+    """
+    if _parser is None:
+        return ""
+    try:
+        items = list(_parser.parse(pattern, re.IGNORECASE | re.DOTALL))
+        literal = _parser.LITERAL
+    except Exception:
+        return ""  # re.error, or a changed private API that must not break loading rules
+    best = ""
+    run = []
+    for item in items + [(None, None)]:
+        op, value = item if isinstance(item, tuple) and len(item) == 2 else (None, None)
+        char = chr(value) if op is literal and isinstance(value, int) else None
+        if char is not None and (char.isascii() or char.lower() == char.upper()):
+            run.append(char.lower())
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best
+
+
+def lower_title(title):
+    """Title lowered for required_literal() substring tests"""
+    return title.lower().translate(_LOWER_FIXES)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Bucket:
+    """Rules sharing one (process, class) key"""
+
+    __slots__ = ('always', 'indexed', 'scanned')
+
+    def __init__(self):
+        self.always = []   # indexes of rules without a title pattern
+        self.indexed = {}  # trigram -> [(index, literal, pattern)] of rules requiring it
+        self.scanned = []  # (index, pattern) without a usable literal
+
+    def add(self, index, rule):
+        if rule.pattern is None:
+            self.always.append(index)
+            return
+        literal = required_literal(rule.title)
+        if len(literal) < 3:
+            self.scanned.append((index, rule.pattern))
+            return
+        # File the rule under its least crowded trigram
+        gram = min(sorted(_trigrams(literal)), key=lambda g: len(self.indexed.get(g, ())))
+        self.indexed.setdefault(gram, []).append((index, literal, rule.pattern))
+
+    def collect(self, title, lowered, grams, hits):
+        hits.extend(self.always)
+        indexed = self.indexed
+        if indexed:
+            for gram in grams:
+                entries = indexed.get(gram)
+                if entries is not None:
+                    for index, literal, pattern in entries:
+                        if literal in lowered and pattern.search(title):
+                            hits.append(index)
+        for index, pattern in self.scanned:
+            if pattern.search(title):
+                hits.append(index)
+
+
+class RuleMatcher:
+    """Compiled, immutable view of a rule list"""
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.uses_class = any(rule.class_name for rule in self.rules)
+        self._buckets = {}
+        for index, rule in enumerate(self.rules):
+            bucket = self._buckets.get(rule.key[:2])
+            if bucket is None:
+                bucket = self._buckets[rule.key[:2]] = _Bucket()
+            bucket.add(index, rule)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def matching(self, process, class_name, title):
+        """Indexes of every rule matching the window, in precedence order"""
+        process, class_name, title = _fold(process), _fold(class_name), title or ""
+        lowered = lower_title(title)
+        grams = None
+        buckets = self._buckets
+        hits = []
+        for key in ((process, class_name), (process, None), (None, class_name), (None, None)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                if grams is None and bucket.indexed:
+                    grams = _trigrams(lowered)
+                bucket.collect(title, lowered, grams or (), hits)
+        hits.sort()
+        return hits
+
+    def match(self, process, class_name, title):
+        """WindowSettings for the window, or None when no rule matches"""
+        if not self._buckets:
+            return None
+        hits = self.matching(process, class_name, title)
+        if not hits:
+            return None
+        alpha = taskbar = None
+        for index in hits:
+            rule = self.rules[index]
+            if alpha is None:
+                alpha = rule.alpha
+            if taskbar is None:
+                taskbar = rule.taskbar
+        return WindowSettings(alpha, taskbar)
+
+
+class WindowRules:
+    """The rule list, its JSON file and its compiled matcher"""
+
+    def __init__(self, path=None):
+        self.path = path or default_rules_path()
+        self.rules = []
+        self.matcher = RuleMatcher(())
+
+    def __len__(self):
+        return len(self.rules)
+
+    def load(self):
+        """Read the rule file (a missing file means no rules)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            rules = [WindowRule.from_dict(item) for item in data.get('rules', [])]
+        except FileNotFoundError:
+            rules = []
+        except (OSError, ValueError, TypeError, AttributeError, re.error) as e:
+            print(f"Error loading window rules from {self.path}: {e}")
+            rules = []
+        self.set_rules(rules)
+        return self
+
+    def save(self):
+        """Write the rules atomically (temp file + replace)"""
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': RULES_VERSION, 'rules': [rule.to_dict() for rule in self.rules]},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.path)
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        self.matcher = RuleMatcher(self.rules)
+
+    def put(self, rule):
+        """Add rule ahead of the others, replacing one with the same criteria"""
+        rules = [existing for existing in self.rules if existing.key != rule.key]
+        self.set_rules([rule] + rules)
+
+    def remove(self, rule):
+        self.set_rules([existing for existing in self.rules if existing.key != rule.key])
+
+    def match(self, process, class_name, title):
+        return self.matcher.match(process, class_name, title)
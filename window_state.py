@@ -0,0 +1,90 @@
+"""Per-window exstyle/alpha cache.
+
+Enumeration, selection and the status columns all need the same two
+values per window.  WindowStateCache reads them once per refresh (one
+GetWindowLong, plus GetLayeredWindowAttributes only for layered windows)
+and serves every later lookup from memory until the window is
+invalidated, either by a new refresh or because this tool changed it.
+Invalidated values stay available through last_known() for windows that
+must not be asked again (hung applications).
+"""
+import threading
+
+import window_backend as wb
+
+
+def read_alpha(backend, hwnd, style):
+    """Opacity 0-255 of a window whose exstyle is already known"""
+    if style & wb.WS_EX_LAYERED:
+        try:
+            # GetLayeredWindowAttributes returns (crKey, alpha, flags)
+            _, alpha, flags = backend.GetLayeredWindowAttributes(hwnd)
+            if flags & wb.LWA_ALPHA:
+                return alpha
+        except Exception:
+            pass
+    return 255
+
+
+class WindowStateCache:
+    """hwnd -> (exstyle, alpha), safe to share between threads"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._previous = {}  # invalidated entries, see last_known()
+        # Bumped by invalidate(): a read that started before it must not be stored
+        self._epoch = 0
+        self._generations = {}  # hwnd -> invalidations since the last full one
+        self._lock = threading.Lock()
+
+    def get(self, hwnd):
+        """(exstyle, alpha) for hwnd, read from the window on a miss"""
+        with self._lock:
+            entry = self._entries.get(hwnd)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            token = (self._epoch, self._generations.get(hwnd, 0))
+        style = self.backend.GetWindowLong(hwnd, wb.GWL_EXSTYLE)
+        entry = (style, read_alpha(self.backend, hwnd, style))
+        with self._lock:
+            if token == (self._epoch, self._generations.get(hwnd, 0)):
+                self._entries[hwnd] = entry
+        return entry
+
+    def last_known(self, hwnd):
+        """Current or last invalidated (exstyle, alpha) without touching the window, or None"""
+        with self._lock:
+            entry = self._entries.get(hwnd)
+            return entry if entry is not None else self._previous.get(hwnd)
+
+    def invalidate(self, hwnd=None):
+        """Forget one window (or everything when hwnd is None)"""
+        with self._lock:
+            if hwnd is None:
+                self._previous.update(self._entries)
+                self._entries = {}
+                self._epoch += 1
+                self._generations = {}
+            else:
+                entry = self._entries.pop(hwnd, None)
+                if entry is not None:
+                    self._previous[hwnd] = entry
+                self._generations[hwnd] = self._generations.get(hwnd, 0) + 1
+
+    def prune(self, live):
+        """Drop every window not in live (the hwnds a full enumeration saw)"""
+        with self._lock:
+            self._entries = {hwnd: entry for hwnd, entry in self._entries.items() if hwnd in live}
+            self._previous = {hwnd: entry for hwnd, entry in self._previous.items() if hwnd in live}
+            self._generations = {hwnd: n for hwnd, n in self._generations.items() if hwnd in live}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries), 'previous': len(self._previous)}